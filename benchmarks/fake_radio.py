@@ -0,0 +1,127 @@
+# benchmarks/fake_radio.py
+"""Simulated Meshtastic radio for benchmarks: a synthetic NodeDB and scripted packet streams over pubsub."""
+
+import itertools
+import random
+import threading
+import time
+from pubsub import pub
+
+BROADCAST_NUM = 0xFFFFFFFF
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakePacket:
+    def __init__(self, packet_id):
+        self.id = packet_id
+
+
+def make_node(num, now=None):
+    """One NodeDB entry shaped like meshtastic's interface.nodes values."""
+    now = now or int(time.time())
+    node_id = f"!{num:08x}"
+    return {
+        "num": num,
+        "user": {
+            "id": node_id,
+            "longName": f"Node {num:04d}",
+            "shortName": f"N{num % 10000:03d}"[:4],
+            "macaddr": ":".join(f"{(num >> s) & 0xff:02x}" for s in (40, 32, 24, 16, 8, 0)),
+            "hwModel": "TBEAM",
+        },
+        "position": {"latitude": 40 + random.random(), "longitude": -75 + random.random(), "altitude": 100},
+        "deviceMetrics": {"batteryLevel": random.randint(1, 100), "voltage": 3.7,
+                          "channelUtilization": random.random() * 30, "airUtilTx": random.random() * 5},
+        "snr": random.uniform(-20, 10),
+        "lastHeard": now - random.randint(0, 86400),
+        "hopsAway": random.randint(0, 7),
+    }
+
+
+def _channel(index, role, name):
+    return _Namespace(index=index, role=role, settings=_Namespace(name=name))
+
+
+class FakeMeshInterface:
+    """Stands in for a SerialInterface/TCPInterface with `node_count` synthetic nodes."""
+
+    def __init__(self, node_count=300, my_num=1, modem_preset=0):
+        self.port = "simulated"
+        self.devPath = "simulated"
+        self.nodes = {}
+        for num in range(my_num, my_num + node_count):
+            node = make_node(num)
+            self.nodes[node["user"]["id"]] = node
+        self.my_num = my_num
+        self.myInfo = _Namespace(my_node_num=my_num)
+        self.sent = []
+        self.isConnected = threading.Event()
+        self.isConnected.set()
+        self.localNode = _Namespace(localConfig=_Namespace(lora=_Namespace(modem_preset=modem_preset)),
+                                    channels=[_channel(0, 1, ""), _channel(1, 2, "ops")]
+                                    + [_channel(i, 0, "") for i in range(2, 8)])
+        self._packet_ids = itertools.count(1)
+
+    def getMyNodeInfo(self):
+        return self.nodes[f"!{self.my_num:08x}"]
+
+    def sendText(self, text, destinationId=None, wantAck=False, channelIndex=0, **_kwargs):
+        packet = FakePacket(next(self._packet_ids))
+        self.sent.append((packet.id, text, destinationId, wantAck, channelIndex))
+        return packet
+
+    def sendHeartbeat(self):
+        pass
+
+    def close(self):
+        self.isConnected.clear()
+
+    # --- Scripted traffic ---
+    def text_packet(self, text, from_num=None, to_num=BROADCAST_NUM, channel=0):
+        from_num = from_num or random.choice(list(self.nodes.values()))["num"]
+        return {
+            "id": next(self._packet_ids),
+            "from": from_num, "fromId": f"!{from_num:08x}",
+            "to": to_num, "toId": "^all" if to_num == BROADCAST_NUM else f"!{to_num:08x}",
+            "channel": channel, "rxTime": int(time.time()),
+            "decoded": {"portnum": "TEXT_MESSAGE_APP", "text": text},
+        }
+
+    def inject_text(self, text, **kwargs):
+        pub.sendMessage("meshtastic.receive.text", packet=self.text_packet(text, **kwargs), interface=self)
+
+    def inject_node_update(self, key=None):
+        """Touch one node (new lastHeard/SNR) and publish meshtastic.node.updated for it."""
+        key = key or random.choice(list(self.nodes))
+        node = self.nodes[key]
+        node["lastHeard"] = int(time.time())
+        node["snr"] = random.uniform(-20, 10)
+        node["user"]["longName"] = f"Node {node['num']:04d} ({node['lastHeard'] % 1000})"
+        pub.sendMessage("meshtastic.node.updated", node=node, interface=self)
+
+    def ack(self, packet_id):
+        packet = {"from": self.my_num, "decoded": {"portnum": "ROUTING_APP", "requestId": packet_id,
+                                                   "routing": {"errorReason": "NONE"}}}
+        pub.sendMessage("meshtastic.receive.routing", packet=packet, interface=self)
+
+    def stream(self, rate, duration, kind="text"):
+        """Publish `rate` packets per second for `duration` seconds on this thread; returns the count sent."""
+        interval = 1.0 / rate if rate else 0
+        deadline = time.perf_counter() + duration
+        next_at = time.perf_counter()
+        sent = 0
+        while time.perf_counter() < deadline:
+            if kind == "text":
+                self.inject_text(f"msg {sent}")
+            else:
+                self.inject_node_update()
+            sent += 1
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return sent
@@ -0,0 +1,331 @@
+# benchmarks/run.py
+"""Benchmarks against a simulated radio; no hardware needed.
+
+    python -m benchmarks.run                       # all suites, table on stdout
+    python -m benchmarks.run --nodes 2000 -k nodes # only suites whose name contains "nodes"
+    python -m benchmarks.run --json results.json   # machine-readable results to track across releases
+    python -m benchmarks.run -k stream --rate 500  # receive throughput with the radio sending 500 packets/s
+
+Each benchmark runs `rounds` timed rounds of `number` calls and reports per-call seconds
+(min/max/mean/median/stddev) and ops/s, in the spirit of pytest-benchmark. Calls that return
+a count of items (packets, messages) also get items/s over all rounds.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS = []
+
+
+def benchmark(name, number=1, rounds=20):
+    """Register fn(ctx) -> callable; the callable is what gets timed."""
+    def register(fn):
+        BENCHMARKS.append((name, fn, number, rounds))
+        return fn
+    return register
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def measure(call, number, rounds, warmup=1):
+    for _ in range(warmup):
+        call()
+    timings = []
+    items = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            result = call()
+            if isinstance(result, int):
+                items += result
+        timings.append((time.perf_counter() - start) / number)
+    mean = statistics.fmean(timings)
+    stats = {
+        "rounds": rounds,
+        "number": number,
+        "min": min(timings),
+        "max": max(timings),
+        "mean": mean,
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "ops": 1 / mean if mean else float("inf"),
+    }
+    if items:
+        stats["items_per_s"] = items / (sum(timings) * number)
+    return stats
+
+
+# --- Suites ---
+@benchmark("nodes: build records (uncached list_nodes)", rounds=30)
+def bench_build_records(ctx):
+    from utils.node_store import build_records
+    nodes = ctx.radio.nodes
+    return lambda: build_records(nodes)
+
+
+@benchmark("nodes: list_nodes (cached snapshot)", number=1000)
+def bench_list_nodes(ctx):
+    from scripts.nodes import list_nodes
+    return list_nodes
+
+
+@benchmark("nodes: node update -> drain", number=200)
+def bench_node_update(ctx):
+    from utils.node_store import NodeStore
+    store = NodeStore.get_instance()
+    cursor = store.open_cursor()
+    store.drain(cursor)
+
+    def update():
+        ctx.radio.inject_node_update()
+        store.drain(cursor)
+    return update
+
+
+@benchmark("table: sort + page window data prep", rounds=30)
+def bench_table_prep(ctx):
+    from scripts.nodes import list_nodes
+    from utils.paging import Pager
+    pager = Pager(page_size=50)
+
+    def prep():
+        records = {n.num: n for n in list_nodes()}
+        pager.set_keys(sorted(records, key=lambda num: records[num].long_name.lower()))
+        pager.last()
+        return [(str(n.num), n.long_name, n.short_name, n.mac) for n in map(records.get, pager.window())]
+    return prep
+
+
+@benchmark("table: node update -> sort index + page window", number=200)
+def bench_sorted_index(ctx):
+    from scripts.nodes import list_nodes
+    from utils.node_store import NodeStore
+    from utils.paging import Pager, SortedIndex
+    store = NodeStore.get_instance()
+    cursor = store.open_cursor()
+    # The sortable columns of the Nodes tab
+    index = SortedIndex({field: lambda n, field=field: getattr(n, field) for field in
+                         ("num", "long_name", "short_name", "mac", "last_heard", "snr", "hops_away", "battery")})
+    for n in list_nodes():
+        index.update(n.num, n)
+    store.drain(cursor)
+    pager = Pager(page_size=50)
+
+    def update():
+        ctx.radio.inject_node_update()
+        for n in store.drain(cursor)[1]:
+            index.update(n.num, n)
+        pager.set_keys(index.ordered("last_heard", descending=True))
+        return pager.window()
+    return update
+
+
+@benchmark("search: contact prefix + fuzzy queries", number=200)
+def bench_contact_search(ctx):
+    from utils.search_index import NodeSearch
+    search = NodeSearch.get_instance()
+    queries = ["N01", "node 00", "!0000002", "Noed 0042", "42"]
+
+    def run():
+        for query in queries:
+            search.search(query, limit=50)
+    return run
+
+
+@benchmark("table: create_info_section", number=50)
+def bench_info_section(ctx):
+    try:
+        from utils.format_utils import create_info_section
+    except ImportError:
+        raise SkipBenchmark("flet not installed")
+    node = ctx.radio.getMyNodeInfo()
+    data = {**node["user"], **node["position"], **node["deviceMetrics"]}
+    return lambda: create_info_section("Node", "📡", data)
+
+
+@benchmark("table: update_info_section (one value changed)", number=50)
+def bench_info_section_update(ctx):
+    try:
+        from utils.format_utils import create_info_section, update_info_section
+    except ImportError:
+        raise SkipBenchmark("flet not installed")
+    node = ctx.radio.getMyNodeInfo()
+    data = {**node["user"], **node["position"], **node["deviceMetrics"]}
+    section = create_info_section("Node", "📡", data)
+    readings = [dict(data, batteryLevel=level) for level in range(100)]
+
+    def run():
+        for reading in readings:
+            update_info_section(section, "Node", "📡", reading)
+    return run
+
+
+@benchmark("cards: contact list refresh (keyed, one node changed)", number=20)
+def bench_contact_cards(ctx):
+    try:
+        import flet as ft
+        from utils.format_utils import create_contact_card, update_contact_card
+    except ImportError:
+        raise SkipBenchmark("flet not installed")
+    from utils.keyed_render import KeyedControls, ControlPool
+    contacts = ft.ListView()
+    cards = KeyedControls(contacts, lambda num, props: create_contact_card(num, *props, None),
+                          lambda num, card, props: update_contact_card(card, num, *props), pool=ControlPool())
+    items = [(key, (n["user"]["longName"], n["user"]["shortName"])) for key, n in ctx.radio.nodes.items()]
+    cards.render(items)
+    renamed = {0: items, 1: [(items[0][0], ("Renamed", "RN"))] + items[1:]}
+    state = {"turn": 0}
+
+    def run():
+        state["turn"] ^= 1
+        cards.render(renamed[state["turn"]])
+    return run
+
+
+@benchmark("handler: _run_callbacks (10 callbacks)", number=1000)
+def bench_callbacks(ctx):
+    from utils.meshtastic_helpers import MeshtasticHandler
+    handler = MeshtasticHandler.get_instance()
+    for _ in range(10):
+        handler.register_callback(lambda: None)
+    return handler._run_callbacks
+
+
+@benchmark("ingest: 500 text packets -> decode + store", rounds=10)
+def bench_ingest(ctx):
+    from utils.message_store import MessageStore
+    from utils.receive_pipeline import ReceivePipeline
+    ReceivePipeline.get_instance()
+    store = MessageStore.get_instance()
+
+    # Sink delivery is paced by ReceivePipeline.FLUSH_INTERVAL, so only the radio-thread side is timed
+    def ingest(count=500):
+        for i in range(count):
+            ctx.radio.inject_text(f"bench {i}")
+        store.flush()
+    return ingest
+
+
+@benchmark("receive: scripted stream at --rate -> UI sink", rounds=3)
+def bench_stream(ctx):
+    from utils.receive_pipeline import ReceivePipeline
+    pipeline = ReceivePipeline.get_instance()
+    delivered = []
+    pipeline.add_sink(lambda batch: delivered.append(len(batch)))
+
+    # The radio publishes at ctx.rate for STREAM_SECONDS; the call ends once the last batch reached
+    # the sink, so a round much longer than STREAM_SECONDS + FLUSH_INTERVAL means ingest fell behind
+    def stream():
+        delivered.clear()
+        sent = ctx.radio.stream(ctx.rate, STREAM_SECONDS)
+        received, idle_since = sum(delivered), time.perf_counter()
+        while received < sent and time.perf_counter() - idle_since < 3 * pipeline.FLUSH_INTERVAL:
+            time.sleep(pipeline.FLUSH_INTERVAL / 10)
+            if sum(delivered) != received:
+                received, idle_since = sum(delivered), time.perf_counter()
+        return received  # fewer than sent if the live buffer overflowed
+    return stream
+
+
+@benchmark("send: 200 messages through SendQueue", rounds=10)
+def bench_send(ctx):
+    from utils.send_queue import SendQueue
+    # Rate limiting off: this measures queue and transmit overhead, not airtime
+    SendQueue.BURST_SECONDS = SendQueue.CHANNEL_DUTY = SendQueue.DESTINATION_DUTY = 1e9
+    queue = SendQueue.get_instance()
+
+    def send(count=200):
+        messages = [queue.enqueue(f"bench {i}", want_ack=False) for i in range(count)]
+        for m in messages:
+            m.future.result(timeout=30)
+    return send
+
+
+# --- Harness ---
+STREAM_SECONDS = 2.0
+
+
+class Context:
+    def __init__(self, radio, rate):
+        self.radio = radio
+        self.rate = rate
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def format_seconds(value):
+    for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if value * scale >= 1:
+            return f"{value * scale:.2f} {unit}"
+    return f"{value * 1e9:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="Benchmarks against a simulated radio")
+    parser.add_argument("--nodes", type=int, default=500, help="synthetic NodeDB size (default 500)")
+    parser.add_argument("-k", dest="keyword", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, help="override the number of rounds for every benchmark")
+    parser.add_argument("--rate", type=float, default=200,
+                        help="packets per second sent by the simulated radio in stream benchmarks (default 200)")
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    # Keep the message database out of the user's data dir
+    os.environ["MESHTASTIC_DESKTOP_HOME"] = tempfile.mkdtemp(prefix="meshtastic-bench-")
+
+    from benchmarks.fake_radio import FakeMeshInterface
+    from utils.meshtastic_helpers import MeshtasticHandler
+
+    radio = FakeMeshInterface(node_count=args.nodes)
+    MeshtasticHandler.get_instance().attach_interface(radio)
+    ctx = Context(radio, args.rate)
+
+    results = []
+    for name, setup, number, rounds in BENCHMARKS:
+        if args.keyword and args.keyword.lower() not in name.lower():
+            continue
+        try:
+            call = setup(ctx)
+        except SkipBenchmark as e:
+            print(f"{name:<48} skipped ({e})")
+            continue
+        stats = measure(call, number, args.rounds or rounds)
+        results.append({"name": name, **stats})
+        print(f"{name:<48} median {format_seconds(stats['median']):>10}  "
+              f"mean {format_seconds(stats['mean']):>10} ± {format_seconds(stats['stddev']):>10}  "
+              f"{stats['ops']:>12,.1f} ops/s"
+              + (f"  {stats['items_per_s']:>10,.1f} items/s" if "items_per_s" in stats else ""), flush=True)
+
+    if args.json_path:
+        report = {
+            "datetime": datetime.now(timezone.utc).isoformat(),
+            "commit": git_revision(),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor()},
+            "params": {"nodes": args.nodes, "rate": args.rate},
+            "benchmarks": results,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json_path}")
+    MeshtasticHandler.get_instance().disconnect_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
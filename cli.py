@@ -0,0 +1,166 @@
+# cli.py
+"""Headless Meshtastic desktop: a daemon holding one persistent radio connection, and a CLI client.
+
+    python cli.py daemon --port /dev/ttyUSB0        # or --host 192.168.1.100; --capture FILE records traffic
+    python cli.py daemon --replay FILE [--speed 0]  # serve a recorded capture instead of a radio
+    python cli.py nodes | info | status
+    python cli.py send "hello" [--dest !a1b2c3d4 | --group NAME | --channel 1] [--wait]
+    python cli.py channels
+    python cli.py batch [ID]                        # per-recipient status of group sends
+    python cli.py history [--dest !a1b2c3d4 | --channel 0]
+    python cli.py tail
+    python cli.py metrics [--json]                  # Prometheus text (default) or JSON
+
+Nothing here imports flet; the daemon imports the radio stack only when it starts.
+"""
+import argparse
+import sys
+from datetime import datetime
+from utils.daemon import DEFAULT_ADDRESS, call, tail
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return (host or DEFAULT_ADDRESS[0], int(port))
+
+
+def run_daemon(args):
+    import signal
+    from utils.daemon import DaemonServer
+    from scripts.group_msg import enable_auto_resume
+    from utils.meshtastic_helpers import MeshtasticHandler
+
+    handler = MeshtasticHandler.get_instance()
+    enable_auto_resume()
+    handler.register_state_listener(lambda cid, state: print(f"[{cid}] {state}", flush=True))
+    if args.replay:
+        handler.replay_capture(args.replay, speed=args.speed, connection_id=args.connection or "default")
+    else:
+        supervisor = handler.connect_in_background(port=args.port, hostname=args.host, portnum=args.tcp_port)
+        if args.capture:
+            start_capture_when_ready(handler, supervisor, args.capture)
+
+    server = DaemonServer(args.listen)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Daemon listening on {args.listen[0]}:{args.listen[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        handler.disconnect_all()
+
+
+def start_capture_when_ready(handler, supervisor, path):
+    from utils.connection_supervisor import READY
+
+    def on_state(cid, state):
+        if cid == supervisor.connection_id and state == READY and handler.get_capture(cid) is None:
+            handler.start_capture(path, cid)
+            print(f"Recording to {path}", flush=True)
+    handler.register_state_listener(on_state)
+
+
+def print_message(m):
+    direction = "->" if m["direction"] == "out" else "<-"
+    where = m["peer"] if m["peer"] is not None else f"ch{m['channel']}"
+    stamp = datetime.fromtimestamp(m["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"{stamp} {direction} {where} {m['from_id'] or 'me'}: {m['text']}", flush=True)
+
+
+def run_client(args):
+    if args.command == "tail":
+        for message in tail(args.listen):
+            print_message(message)
+        return
+
+    request = {"cmd": args.command, "connection": args.connection}
+    if args.command == "send":
+        request.update(text=args.text, destination=args.dest, group=args.group, channel=args.channel, wait=args.wait)
+    elif args.command == "batch":
+        request.update(id=args.id)
+    elif args.command == "history":
+        request.update(destination=args.dest, channel=args.channel)
+    elif args.command == "metrics":
+        request.update(format="json" if args.json else "prometheus")
+    result = call(request, args.listen)
+
+    if args.command == "nodes":
+        print(f"Total nodes connected: {len(result)}")
+        for n in result:
+            print(f"Node {n['num']} | Long: {n['long_name']} | Short: {n['short_name']} | MAC: {n['mac']}")
+    elif args.command == "history":
+        for message in result:
+            print_message(message)
+    elif args.command == "channels":
+        for c in result:
+            print(f"{c['index']} | {c['name']} | {c['role']} | {c['unread']} unread")
+    elif args.command == "batch" and args.id is None:
+        for b in result:
+            counts = ", ".join(f"{count} {status}" for status, count in sorted(b["counts"].items()))
+            print(f"Batch {b['id']} | {b['group_name'] or 'ad hoc'} | {b['text']} | {counts}")
+    elif args.command == "batch":
+        print(f"Batch {result['id']} ({result['group_name'] or 'ad hoc'}): {result['text']}")
+        for r in result["recipients"]:
+            print(f"{r['node_id']} | {r['status']} | attempts {r['attempts']} | {r['error'] or ''}")
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            print(f"{key}: {value}")
+    else:
+        print(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="meshtastic-desktop", description="Headless Meshtastic desktop")
+    parser.add_argument("--listen", type=parse_address, default=DEFAULT_ADDRESS,
+                        help="daemon address host:port (default 127.0.0.1:4410)")
+    parser.add_argument("--connection", default=None, help="connection id in the daemon's pool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    daemon = sub.add_parser("daemon", help="keep a radio connected and serve local clients")
+    daemon.add_argument("--port", help="serial port (default: first available)")
+    daemon.add_argument("--host", help="IP address or hostname of a network radio")
+    daemon.add_argument("--tcp-port", type=int, default=4403)
+    daemon.add_argument("--capture", help="record everything the radio sends to this file")
+    daemon.add_argument("--replay", help="replay a capture file instead of connecting to a radio")
+    daemon.add_argument("--speed", type=float, default=1.0, help="replay speed (0 = as fast as possible)")
+
+    sub.add_parser("status", help="connection state")
+    sub.add_parser("nodes", help="list nodes")
+    sub.add_parser("info", help="my node info")
+    sub.add_parser("channels", help="enabled channels and unread counts")
+    send = sub.add_parser("send", help="send a text message")
+    send.add_argument("text")
+    send.add_argument("--dest", help="destination node id (default: primary channel broadcast)")
+    send.add_argument("--group", help="send a direct message to every member of a saved group")
+    send.add_argument("--channel", type=int, default=0, help="channel index for broadcasts (default: primary)")
+    send.add_argument("--wait", action="store_true", help="wait for the ACK")
+    batch = sub.add_parser("batch", help="group send results")
+    batch.add_argument("id", type=int, nargs="?", help="batch id (default: list recent batches)")
+    history = sub.add_parser("history", help="stored message history")
+    history.add_argument("--dest", help="node id for direct messages")
+    history.add_argument("--channel", type=int, default=0)
+    sub.add_parser("tail", help="follow received messages")
+    metrics = sub.add_parser("metrics", help="daemon counters and timings")
+    metrics.add_argument("--json", action="store_true", help="JSON instead of Prometheus text")
+
+    args = parser.parse_args(argv)
+    if args.command == "daemon":
+        run_daemon(args)
+        return 0
+    try:
+        run_client(args)
+    except ConnectionRefusedError:
+        print(f"No daemon running on {args.listen[0]}:{args.listen[1]}. Start one with: python cli.py daemon")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"[Error] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,7 @@
 # main.py
+import time
+_STARTED = time.perf_counter()  # before the heavy imports, so they show up in the startup report
+
 import flet as ft
 import atexit
 from ui.node_info_tab import create_node_info_tab
@@ -6,50 +9,95 @@ from ui.messaging_tab import create_messaging_tab
 from ui.nodes_tab import create_nodes_tab
 from ui.settings_tab import create_settings_tab
 from ui.connection_tab import create_connection_tab
+from ui.diagnostics_tab import create_diagnostics_tab
+from ui.map_tab import create_map_tab
+from ui.components import instrument_page
+from ui.refresh_scheduler import RefreshScheduler
+from scripts.group_msg import enable_auto_resume
 from utils.meshtastic_helpers import MeshtasticHandler
+from utils.metrics import MetricsRegistry
+from utils.nodedb_cache import NodeDbCache
+from utils.timing import PhaseTimer
 
 def main(page: ft.Page):
+    startup = PhaseTimer("Startup", start=_STARTED)
+    startup.mark("imports and flet startup")
+
     page.title = "Meshtastic Dashboard"
     page.theme_mode = "dark"
     page.scroll = "hidden"
     page.padding = 20
+    instrument_page(page)
+
+    # Refresh functions of built tabs, and the scheduler that batches them, live in page.data for the connection tab
+    scheduler = RefreshScheduler(page)
+    page.data = {"refresh_functions": [], "refresh_scheduler": scheduler, "startup": startup}
+    enable_auto_resume()  # group sends interrupted by a restart continue once a radio connects
+    with startup.phase("node cache"):
+        NodeDbCache.get_instance().warm_start()  # last known nodes, shown until a radio connects
 
-    # Initialize tabs and collect refresh functions
-    refresh_functions = []
-    
     # Connection tab (doesn't return a refresh function, but we'll handle it separately)
-    connection_content = create_connection_tab(page)
-    
-    # Other tabs return (content, refresh_function)
-    node_info_content, node_info_refresh = create_node_info_tab(page)
-    messaging_content, messaging_refresh = create_messaging_tab(page)
-    nodes_content, nodes_refresh = create_nodes_tab(page)
-    settings_content, settings_refresh = create_settings_tab(page)
-    
-    # Store refresh functions in page.data for access by connection tab
-    refresh_functions = [node_info_refresh, messaging_refresh, nodes_refresh, settings_refresh]
-    page.data = {"refresh_functions": refresh_functions}
-    
+    with startup.phase("connection tab"):
+        connection_content = create_connection_tab(page)
+
+    # Other tabs return (content, refresh_function) and are only built when first selected
+    builders = {
+        1: create_node_info_tab,
+        2: create_messaging_tab,
+        3: create_nodes_tab,
+        4: create_map_tab,
+        5: create_settings_tab,
+        6: create_diagnostics_tab,
+    }
+
+    def build_tab(index):
+        builder = builders.pop(index, None)
+        if builder is None:
+            return
+        timer = PhaseTimer(f"{builder.__name__}")
+        content, refresh = builder(page)
+        page.data["refresh_functions"].append(refresh)
+        scheduler.register(refresh)  # the builder already loaded data for a connected radio; later changes come here
+        tabs.tabs[index].content = content
+        MetricsRegistry.get_instance().histogram("ui_tab_build_seconds", "Time to build a tab on first selection",
+                                                 tab=builder.__name__).observe(timer.elapsed())
+
+    def on_tab_change(e):
+        build_tab(tabs.selected_index)
+        for listener in page.data.get("tab_listeners", []):
+            listener(tabs.tabs[tabs.selected_index].content)  # lets built tabs know whether they are on screen
+        page.update()
+
+    placeholder = lambda: ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.center, expand=True)
+
     # Initialize tabs
     tabs = ft.Tabs(
         selected_index=0,
         expand=1,
+        on_change=on_tab_change,
         tabs=[
             ft.Tab(text="Connection", content=connection_content),
-            ft.Tab(text="Node Info", content=node_info_content),
-            ft.Tab(text="Messaging", content=messaging_content),
-            ft.Tab(text="Nodes", content=nodes_content),
-            ft.Tab(text="Settings", content=settings_content),
+            ft.Tab(text="Node Info", content=placeholder()),
+            ft.Tab(text="Messaging", content=placeholder()),
+            ft.Tab(text="Nodes", content=placeholder()),
+            ft.Tab(text="Map", content=placeholder()),
+            ft.Tab(text="Settings", content=placeholder()),
+            ft.Tab(text="Diagnostics", content=placeholder()),
         ]
     )
 
-    page.add(tabs)
+    with startup.phase("first frame"):
+        page.add(tabs)
+    print(startup.report())
+    for name, seconds in startup.phases:
+        MetricsRegistry.get_instance().gauge("app_startup_seconds", "Duration of each startup phase",
+                                             phase=name).set(seconds)
 
 def cleanup_connection():
     """Clean up persistent connection when app closes."""
     try:
         handler = MeshtasticHandler.get_instance()
-        handler.disconnect()
+        handler.disconnect_all()
         print("Meshtastic connection closed.")
     except:
         pass
@@ -60,4 +108,4 @@ if __name__ == "__main__":
     try:
         ft.app(target=main)
     finally:
-        cleanup_connection()
\ No newline at end of file
+        cleanup_connection()
@@ -7,26 +7,87 @@ if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
 from utils.meshtastic_helpers import MeshtasticHandler
+from utils.message_store import MessageStore
+from utils.receive_pipeline import ReceivePipeline
+from utils.send_queue import SendQueue
 
 
-def send_to_channel(message: str, *_args, **_kwargs):
-    """
-    Send a message to the primary broadcast channel using a persistent connection.
-    Works with the Flet front end. Ignores channel index arguments if passed.
+# Channel.Role values
+ROLE_DISABLED = 0
+ROLE_PRIMARY = 1
+ROLE_SECONDARY = 2
+ROLE_NAMES = {ROLE_PRIMARY: "PRIMARY", ROLE_SECONDARY: "SECONDARY"}
+
+
+def list_channels(connection_id=None):
+    """Get the radio's enabled channels as [{"index", "name", "role"}], primary first.
+
+    Read from interface.localNode.channels; the primary channel falls back to "Primary" when it has
+    no name (it then uses the modem preset's default name on the radio).
     """
     handler = MeshtasticHandler.get_instance()
-    interface = handler.get_interface()
+    interface = handler.get_interface(connection_id)
+    channels = getattr(getattr(interface, "localNode", None), "channels", None)
+    if not channels:
+        return [{"index": 0, "name": "Primary", "role": "PRIMARY"}]  # not loaded yet: the primary always exists
+    result = []
+    for channel in channels:
+        role = getattr(channel, "role", ROLE_DISABLED)
+        if role == ROLE_DISABLED:
+            continue
+        name = getattr(getattr(channel, "settings", None), "name", "") or (
+            "Primary" if role == ROLE_PRIMARY else f"Channel {channel.index}")
+        result.append({"index": channel.index, "name": name, "role": ROLE_NAMES.get(role, str(role))})
+    return sorted(result, key=lambda c: c["index"])
+
+
+def queue_broadcast(message: str, channel_index: int = 0, connection_id=None):
+    """Queue a broadcast on an enabled channel without blocking; returns the OutboundMessage."""
+    handler = MeshtasticHandler.get_instance()
+    handler.get_interface(connection_id)
+
+    channel_index = int(channel_index or 0)
+    if channel_index not in {c["index"] for c in list_channels(connection_id)}:
+        raise Exception(f"Channel {channel_index} is not enabled on this radio")
+    # The queue paces broadcasts by airtime like any other message
+    outbound = SendQueue.get_instance().enqueue(message, channel_index=channel_index, want_ack=False,
+                                                connection_id=connection_id)
+    MessageStore.get_instance().add_message(message, "out", channel=channel_index, to_id="^all")
+    return outbound
+
 
+def send_to_channel(message: str, channel_index: int = 0, connection_id=None):
+    """
+    Send a broadcast message on a channel (primary by default) using a persistent connection.
+    Works with the Flet front end.
+    """
     try:
-        # Always send to the primary broadcast channel (channel index 0)
-        interface.sendText(message)
-        return "Message sent to primary broadcast channel."
+        queue_broadcast(message, channel_index, connection_id)
+        return f"Message queued for channel {int(channel_index or 0)}."
     except Exception as e:
         print(f"[Error] Failed to send message: {e}")
         return f"Error sending message: {e}"
 
 
+def get_channel_history(channel_index: int = 0, before=None):
+    """Get one page of broadcast history on a channel, oldest first."""
+    return MessageStore.get_instance().get_channel_history(channel_index, before=before)
+
+
+def get_unread_counts():
+    """Get {channel index: unread count} for channels with unread broadcasts."""
+    return {key[1]: count for key, count in ReceivePipeline.get_instance().unread_counts().items()
+            if key[0] == "channel"}
+
+
+def mark_channel_read(channel_index: int = 0):
+    ReceivePipeline.get_instance().mark_read(channel=channel_index)
+
+
 if __name__ == "__main__":
     # Simple CLI test
+    for c in list_channels():
+        print(f"{c['index']}: {c['name']} ({c['role']})")
+    index = int(input("Channel index: ") or 0)
     msg = input("Enter message to broadcast: ")
-    print(send_to_channel(msg))
+    print(send_to_channel(msg, index))
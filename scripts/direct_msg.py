@@ -7,16 +7,28 @@ if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
 from utils.meshtastic_helpers import MeshtasticHandler
+from utils.message_store import MessageStore
+from utils.send_queue import SendQueue
 
-def send_message(message: str, destination: int = 0):
-    """Send message using persistent connection (does not disconnect)."""
+def queue_message(message: str, destination: int = 0, want_ack: bool = True, connection_id=None):
+    """Queue a direct message without blocking; returns the OutboundMessage (id, status, future)."""
     handler = MeshtasticHandler.get_instance()
-    interface = handler.get_interface()
+    handler.get_interface(connection_id)
+
+    outbound = SendQueue.get_instance().enqueue(message, destination, want_ack=want_ack, connection_id=connection_id)
+    MessageStore.get_instance().add_message(message, "out", peer=destination, to_id=destination)
+    return outbound
 
-    interface.sendText(message, destination)
+def send_message(message: str, destination: int = 0, connection_id=None):
+    """Send message using persistent connection (does not disconnect)."""
+    outbound = queue_message(message, destination, connection_id=connection_id)
 
     # Note: We don't disconnect to maintain persistent connection
-    return f"Message '{message}' sent to node {destination}."
+    return f"Message '{message}' queued for node {destination} (id {outbound.id})."
+
+def get_message_history(destination, before=None):
+    """Get one page of direct-message history with a node, oldest first."""
+    return MessageStore.get_instance().get_direct_history(destination, before=before)
 
 if __name__ == "__main__":
     message = input("Enter message: ")
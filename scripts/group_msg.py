@@ -0,0 +1,165 @@
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path to allow importing utils
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from scripts.direct_msg import queue_message
+from scripts.nodes import list_nodes
+from utils.group_store import GroupStore
+from utils.meshtastic_helpers import MeshtasticHandler
+from utils.send_queue import SendQueue
+
+# (batch id, node id) -> OutboundMessage for recipients queued by this process
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def list_groups():
+    """Get saved groups as {name: [node ids]}."""
+    return GroupStore.get_instance().list_groups()
+
+
+def save_group(name: str, members):
+    name = (name or "").strip()
+    if not name:
+        raise Exception("Group name is required")
+    if not members:
+        raise Exception("A group needs at least one member")
+    GroupStore.get_instance().save_group(name, members)
+
+
+def delete_group(name: str):
+    GroupStore.get_instance().delete_group(name)
+
+
+def select_nodes(filter_text: str, connection_id=None):
+    """Node ids whose long name, short name or id contains filter_text (case-insensitive); all nodes if empty."""
+    needle = (filter_text or "").strip().lower()
+    return [node.num for node in list_nodes(connection_id)
+            if node.num and (not needle or needle in node.long_name.lower()
+                             or needle in node.short_name.lower() or needle in str(node.num).lower())]
+
+
+def send_to_group(message: str, members, group_name=None, connection_id=None):
+    """Fan a direct message out to every member without blocking; returns the batch id.
+
+    Each recipient is a separate SendQueue entry, so the queue paces the batch by airtime
+    (per destination and for the channel as a whole) and tracks each ACK independently.
+    """
+    message = (message or "").strip()
+    if not message:
+        raise Exception("Message is empty")
+    if isinstance(members, str):
+        group_name = members
+        members = GroupStore.get_instance().get_group(members)
+        if members is None:
+            raise Exception(f"No group named {group_name}")
+    members = list(dict.fromkeys(members))
+    if not members:
+        raise Exception("No recipients")
+    MeshtasticHandler.get_instance().get_interface(connection_id)
+    batch_id = GroupStore.get_instance().create_batch(message, members, group_name, connection_id)
+    _dispatch(batch_id, message, members, connection_id)
+    return batch_id
+
+
+def _dispatch(batch_id, message, members, connection_id, resend=False):
+    store = GroupStore.get_instance()
+    for node_id in members:
+        try:
+            if resend:  # already in the chat history from the first attempt
+                outbound = SendQueue.get_instance().enqueue(message, node_id, connection_id=connection_id)
+            else:
+                outbound = queue_message(message, node_id, connection_id=connection_id)
+        except Exception as e:
+            store.update_recipient(batch_id, node_id, "failed", error=str(e))
+            continue
+        with _in_flight_lock:
+            _in_flight[(batch_id, node_id)] = outbound
+        store.update_recipient(batch_id, node_id, "queued")
+        outbound.future.add_done_callback(
+            lambda _f, b=batch_id, n=node_id, m=outbound: _on_done(b, n, m))
+
+
+def _on_done(batch_id, node_id, outbound):
+    with _in_flight_lock:
+        _in_flight.pop((batch_id, node_id), None)
+    # A want_ack send that couldn't be ACK-tracked resolves as "sent" with an error: unconfirmed, so failed
+    status = "acked" if outbound.status == "acked" or not (outbound.want_ack or outbound.error) else "failed"
+    error = str(outbound.error) if outbound.error else None
+    try:
+        GroupStore.get_instance().update_recipient(batch_id, node_id, status, outbound.attempts, error)
+    except Exception as e:
+        print(f"Group batch update error: {e}")
+
+
+def get_batch(batch_id):
+    """Batch with per-recipient status; recipients still in the send queue show its live status ("sent")."""
+    batch = GroupStore.get_instance().get_batch(batch_id)
+    if batch is None:
+        raise Exception(f"No batch {batch_id}")
+    with _in_flight_lock:
+        for recipient in batch["recipients"]:
+            outbound = _in_flight.get((batch_id, recipient["node_id"]))
+            if outbound is not None:
+                recipient["status"] = outbound.status
+                recipient["attempts"] = outbound.attempts
+    return batch
+
+
+def list_batches(limit=20):
+    """Recent batches, newest first, with per-status recipient counts."""
+    return GroupStore.get_instance().list_batches(limit)
+
+
+def cancel_batch(batch_id):
+    """Stop resuming a batch; recipients already in the send queue are still sent."""
+    GroupStore.get_instance().cancel_batch(batch_id)
+
+
+def resume_batches(connection_id=None):
+    """Re-queue recipients of unfinished batches that aren't already queued in this process.
+
+    Used after a restart: a recipient whose ACK was never recorded is sent again, so delivery
+    is at-least-once. Returns the number of recipients queued.
+    """
+    queued = 0
+    for batch_id, message, batch_connection, members in GroupStore.get_instance().unfinished():
+        with _in_flight_lock:
+            members = [n for n in members if (batch_id, n) not in _in_flight]
+        if not members:
+            continue
+        # The batch's own connection if it is up again, else whichever one is active now
+        handler = MeshtasticHandler.get_instance()
+        target = batch_connection if batch_connection in handler.list_connections() else connection_id
+        try:
+            handler.get_interface(target)
+        except Exception:
+            continue
+        _dispatch(batch_id, message, members, target, resend=True)
+        queued += len(members)
+    return queued
+
+
+def enable_auto_resume():
+    """Resume unfinished batches whenever a radio connects."""
+    def on_connected():
+        try:
+            count = resume_batches()
+            if count:
+                print(f"Resumed {count} group message recipients")
+        except Exception as e:
+            print(f"Group resume error: {e}")
+
+    MeshtasticHandler.get_instance().register_callback(on_connected)
+
+
+if __name__ == "__main__":
+    for name, members in list_groups().items():
+        print(f"{name}: {', '.join(members)}")
+    for batch in list_batches():
+        print(f"Batch {batch['id']} ({batch['group_name'] or 'ad hoc'}): {batch['counts']}")
@@ -6,12 +6,26 @@ parent_dir = Path(__file__).parent.parent
 if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
+import time
 from utils.meshtastic_helpers import MeshtasticHandler
+from utils.node_store import NodeStore, node_key
 
-def get_node_info():
-    """Get node info using persistent connection (does not disconnect)."""
+_info_cache = {}  # id(interface) -> (interface, node key, node event seq, expires, data)
+
+def get_node_info(connection_id=None):
+    """Get node info using persistent connection (does not disconnect).
+
+    The result is cached until NodeStore sees an event for this node (or the TTL expires);
+    callers share it and must not mutate it.
+    """
     handler = MeshtasticHandler.get_instance()
-    interface = handler.get_interface()
+    interface = handler.get_interface(connection_id)
+    store = NodeStore.get_instance()
+
+    cached = _info_cache.get(id(interface))
+    if (cached and cached[0] is interface and cached[3] > time.monotonic()
+            and store.node_version(cached[1]) == cached[2]):
+        return cached[4]
 
     info = interface.getMyNodeInfo()
 
@@ -23,6 +37,10 @@ def get_node_info():
         "metrics": info.get("deviceMetrics", {})
     }
 
+    key = node_key(info)
+    _info_cache[id(interface)] = (interface, key, store.node_version(key),
+                                  time.monotonic() + store.SNAPSHOT_TTL, data)
+
     # Note: We don't disconnect to maintain persistent connection
     return data
 
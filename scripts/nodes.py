@@ -7,12 +7,20 @@ if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
 from utils.meshtastic_helpers import MeshtasticHandler
+from utils.node_store import NodeStore
 
-def list_nodes():
-    """Get list of nodes using persistent connection (does not disconnect)."""
+def list_nodes(connection_id=None):
+    """Get list of nodes using persistent connection (does not disconnect).
+
+    Returns the shared, cached tuple of NodeRecords from NodeStore; callers must not mutate it.
+    Before the first connection this is the last known NodeDB, if one was preloaded.
+    """
     handler = MeshtasticHandler.get_instance()
+    store = NodeStore.get_instance()
+    if connection_id is None and store.warm:
+        return store.snapshot()
     try:
-        interface = handler.get_interface()
+        interface = handler.get_interface(connection_id)
         
         if not interface:
             raise Exception("Failed to connect to Meshtastic device")
@@ -20,34 +28,37 @@ def list_nodes():
         nodes = getattr(interface, 'nodes', None)
         if nodes is None:
             raise Exception("Nodes data not available. Make sure your device is connected and powered on.")
-
-        node_list = []
-
-        # Handle both dict and other iterable types
-        if isinstance(nodes, dict):
-            for node_num, node in nodes.items():
-                try:
-                    user = node.get("user", {}) if isinstance(node, dict) else {}
-                    node_list.append({
-                        "num": node_num,
-                        "long_name": user.get("longName", "Unknown") if isinstance(user, dict) else "Unknown",
-                        "short_name": user.get("shortName", "Unknown") if isinstance(user, dict) else "Unknown",
-                        "mac": user.get("macaddr", "Unknown") if isinstance(user, dict) else "Unknown"
-                    })
-                except Exception as e:
-                    # Skip problematic nodes
-                    print(f"Error processing node {node_num}: {e}")
-                    continue
-        else:
+        if not isinstance(nodes, dict):
             raise Exception(f"Unexpected nodes format: {type(nodes)}")
 
-        return node_list
+        return store.snapshot_of(interface)
     except Exception as e:
         raise Exception(f"Error loading nodes: {str(e)}")
     # Note: We don't disconnect to maintain persistent connection
 
+def list_all_nodes():
+    """Get nodes from every pooled connection, merged by node; "connections" lists the radios that see each node."""
+    handler = MeshtasticHandler.get_instance()
+    merged = {}
+    for connection_id in handler.list_connections():
+        for node in list_nodes(connection_id):
+            entry = merged.setdefault(node.num, dict(node.as_dict(), connections=[]))
+            entry["connections"].append(connection_id)
+    return list(merged.values())
+
+def get_node_changes(cursor):
+    """Get (reset, nodes) changed since the cursor was last drained, without rescanning the NodeDB."""
+    handler = MeshtasticHandler.get_instance()
+    store = NodeStore.get_instance()
+    try:
+        if not store.warm:
+            handler.get_interface()
+        return store.drain(cursor)
+    except Exception as e:
+        raise Exception(f"Error loading nodes: {str(e)}")
+
 if __name__ == "__main__":
     nodes = list_nodes()
     print(f"Total nodes connected: {len(nodes)}")
     for n in nodes:
-        print(f"Node {n['num']} | Long: {n['long_name']} | Short: {n['short_name']} | MAC: {n['mac']}")
+        print(f"Node {n.num} | Long: {n.long_name} | Short: {n.short_name} | MAC: {n.mac}")
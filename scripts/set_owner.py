@@ -8,10 +8,10 @@ if str(parent_dir) not in sys.path:
 
 from utils.meshtastic_helpers import MeshtasticHandler
 
-def set_owner(longname: str, shortname: str):
+def set_owner(longname: str, shortname: str, connection_id=None):
     """Set owner info using persistent connection (does not disconnect)."""
     handler = MeshtasticHandler.get_instance()
-    interface = handler.get_interface()
+    interface = handler.get_interface(connection_id)
 
     interface.localNode.setOwner(long_name=longname, short_name=shortname)
 
@@ -0,0 +1,56 @@
+# tests/test_nodedb_cache.py
+"""NodeDB cache regression tests, on the simulated radio: python -m unittest discover tests"""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+
+class WarmStartThenAttachTest(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"MESHTASTIC_DESKTOP_HOME": self.home.name})
+        self.env.start()
+        self.attach = None
+
+    def tearDown(self):
+        from utils.meshtastic_helpers import MeshtasticHandler
+        if not (self.attach and self.attach.is_alive()):  # a deadlocked attach still holds the connection lock
+            MeshtasticHandler.get_instance().disconnect_all()
+        self.env.stop()
+        self.home.cleanup()
+
+    def test_attach_same_radio_while_nodes_change(self):
+        import utils.node_store
+        from benchmarks.fake_radio import FakeMeshInterface
+        from utils.meshtastic_helpers import MeshtasticHandler
+        from utils.node_store import NodeStore, build_records
+        from utils.nodedb_cache import NodeDbCache, save_records
+
+        radio = FakeMeshInterface(50, my_num=1)
+        save_records(1, list(build_records(radio.nodes).values()))
+        self.assertEqual(NodeDbCache.get_instance().warm_start(), 50)
+        self.assertTrue(NodeStore.get_instance().warm)
+
+        def hear_nodes(nodes):
+            # The radio keeps hearing nodes while attach() runs, so any TTL reload finds changes
+            records = build_records(nodes)
+            for node in radio.nodes.values():
+                node["lastHeard"] += 5
+            return records
+
+        with mock.patch.object(utils.node_store, "build_records", hear_nodes):
+            self.attach = threading.Thread(target=MeshtasticHandler.get_instance().attach_interface,
+                                           args=(radio,), daemon=True)
+            self.attach.start()
+            self.attach.join(5)
+        self.assertFalse(self.attach.is_alive(), "attach_interface deadlocked")
+        self.assertIs(NodeStore.get_instance().interface, radio)
+        self.assertFalse(NodeStore.get_instance().warm)
+        self.assertEqual(len(NodeStore.get_instance()), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
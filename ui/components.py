@@ -1,5 +1,7 @@
 # ui/components.py
 import flet as ft
+import time
+from utils.metrics import MetricsRegistry
 
 def show_snackbar(page, message, success=True):
     page.snack_bar = ft.SnackBar(
@@ -8,4 +10,18 @@ def show_snackbar(page, message, success=True):
         open=True,
         duration=3000
     )
-    page.update()
\ No newline at end of file
+    page.update()
+
+def instrument_page(page):
+    """Count and time every page.update() (from any tab or thread) in the metrics registry."""
+    histogram = MetricsRegistry.get_instance().histogram("ui_page_update_seconds", "Duration of page.update() calls")
+    update = page.update
+
+    def timed_update(*controls):
+        start = time.perf_counter()
+        try:
+            return update(*controls)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    page.update = timed_update
@@ -1,12 +1,22 @@
 # ui/connection_tab.py
 
 import flet as ft
-import threading
-from utils.meshtastic_helpers import MeshtasticHandler
+import time
+from datetime import datetime
+from utils.async_mesh import AsyncMesh
+from utils.meshtastic_helpers import MeshtasticHandler, DEFAULT_CONNECTION, REPLAY_CONNECTION
+from utils.capture import CAPTURE_SUFFIX
+from utils.paths import get_data_dir
+from utils.serial_discovery import SerialDiscovery, MESHTASTIC
+from utils.network_discovery import NetworkDiscovery
+from utils.connection_supervisor import CONNECTING, SYNCING, DEGRADED, LOST, DISCONNECTED
 from ui.components import show_snackbar
 
+CONNECTION_TYPE_LABELS = {"serial": "Serial", "network": "Network", "replay": "Replay", "simulated": "Simulated"}
+
 def create_connection_tab(page: ft.Page):
     handler = MeshtasticHandler.get_instance()
+    mesh = AsyncMesh.get_instance()  # blocking radio calls run off the event loop, without a thread each
 
     # --- Status indicator ---
     status_text = ft.Text("Disconnected", size=18, weight="bold")
@@ -41,116 +51,241 @@ def create_connection_tab(page: ft.Page):
     # --- Network section ---
     ip_input = ft.TextField(label="IP Address or Hostname", hint_text="192.168.1.100", width=300)
     port_input = ft.TextField(label="Port", hint_text="4403", value="4403", width=150)
+    discover_button = ft.ElevatedButton("Discover")
+    discovered_list = ft.Column([], spacing=5)  # radios found on the LAN and hosts connected to before
     network_section = ft.Container(
         content=ft.Column([
             ft.Text("Network Connection (TCP)", size=16, weight="bold", color=ft.Colors.WHITE),
-            ft.Row([ip_input, port_input], spacing=10),
-            ft.Text("Enter IP of your Meshtastic device.", size=12, color=ft.Colors.GREY_400, italic=True)
+            ft.Row([ip_input, port_input, discover_button], spacing=10),
+            ft.Text("Enter IP of your Meshtastic device, or pick one found on your network.",
+                    size=12, color=ft.Colors.GREY_400, italic=True),
+            discovered_list
         ], spacing=10),
         visible=False
     )
 
+    # --- Connection name (one per radio in the pool) ---
+    connection_name_input = ft.TextField(label="Connection Name", value=DEFAULT_CONNECTION, width=200,
+                                         hint_text="Name this radio to connect several at once")
+
+    def selected_connection():
+        return connection_name_input.value.strip() or DEFAULT_CONNECTION
+
     # --- Connected info ---
     connected_port_text = ft.Text("", size=14, color=ft.Colors.GREY_400)
     connection_type_text = ft.Text("", size=12, color=ft.Colors.GREY_500)
+    pool_text = ft.Text("", size=12, color=ft.Colors.GREY_500)
 
     # --- Update UI ---
-    def update_connection_status():
+    def pending_status():
+        """Status line for a supervised connection that is not up yet, or None."""
+        state = handler.get_state(selected_connection())
+        supervisor = handler.get_supervisor(selected_connection())
+        if state == CONNECTING:
+            return "Connecting..."
+        if state == SYNCING:
+            return "Syncing node database..."
+        if state == LOST and supervisor:
+            wait = max(0, int((supervisor.retry_at or time.time()) - time.time()))
+            return f"Connection lost, retrying in {wait}s ({supervisor.last_error})"
+        return None
+
+    def update_connection_status(update=True):
+        pending = pending_status()
         if handler.is_connected():
-            status_text.value = "Connected"
-            status_icon.color = ft.Colors.GREEN_400
+            degraded = handler.get_state() == DEGRADED
+            status_text.value = "Connected (no recent traffic)" if degraded else "Connected"
+            status_icon.color = ft.Colors.AMBER_400 if degraded else ft.Colors.GREEN_400
             status_indicator.bgcolor = ft.Colors.GREEN_900
             connection_type_val = handler.get_connection_type()
             info = handler.get_connected_port()
             connected_port_text.value = f"Connected to: {info}" if info else "Connected (unknown)"
-            connection_type_text.value = f"Connection type: {'Network' if connection_type_val=='network' else 'Serial'}"
+            connection_type_text.value = f"Connection type: {CONNECTION_TYPE_LABELS.get(connection_type_val, 'Serial')}"
+        elif pending:
+            status_text.value = pending
+            status_icon.color = ft.Colors.AMBER_400
+            status_indicator.bgcolor = ft.Colors.BLUE_GREY_800
+            connected_port_text.value = ""
+            connection_type_text.value = ""
         else:
             status_text.value = "Disconnected"
             status_icon.color = ft.Colors.RED_400
             status_indicator.bgcolor = ft.Colors.RED_900
             connected_port_text.value = ""
             connection_type_text.value = ""
-        page.update()
+        connections = handler.list_connections()
+        pool_text.value = (
+            "Radios: " + ", ".join(
+                f"{cid}{' (active)' if cid == handler.get_active_id() else ''} - {handler.get_connected_port(cid)}"
+                for cid in connections
+            ) if len(connections) > 1 else ""
+        )
+        record_switch.value = handler.get_capture() is not None
+        if update:
+            page.update()
 
     # --- Refresh all tabs ---
     def refresh_all_tabs():
-        if hasattr(page, "data") and page.data.get("refresh_functions"):
-            for func in page.data["refresh_functions"]:
-                try:
-                    func()
-                except Exception as e:
-                    print(f"Tab refresh error: {e}")
+        """Ask the shared scheduler for one coalesced refresh (and one page.update()) of every tab."""
+        if hasattr(page, "data") and page.data and page.data.get("refresh_scheduler"):
+            page.data["refresh_scheduler"].request()
+        else:
+            page.update()
 
     # Register the callback for auto-refresh
-    handler.register_callback(lambda: (update_connection_status(), refresh_all_tabs()))
+    handler.register_callback(lambda: (update_connection_status(update=False), refresh_all_tabs()))
+    handler.register_state_listener(lambda _cid, _state: update_connection_status())
 
     # --- Scan serial ports ---
-    def scan_ports(e=None):
+    def port_label(p):
+        label = f"{p['device']} - {p['description']}"
+        return f"{label} (Meshtastic)" if p["verdict"] == MESHTASTIC else label
+
+    async def scan_ports(e=None, quiet=False):
+        """Scan off the event loop; quiet=True (startup, hot-plug) lists ports without probing them,
+        and skips the snackbars and the pre-scan page.update()."""
+        previous = port_dropdown.value
         port_dropdown.options.clear()
         port_dropdown.disabled = True
-        page.update()
-
-        def _scan():
-            try:
-                ports = handler.scan_serial_ports()
-                port_dropdown.options = [
-                    ft.dropdown.Option(key=p["device"], text=f"{p['device']} - {p['description']}") for p in ports
-                ]
-                if ports:
-                    port_dropdown.value = ports[0]["device"]
-                    show_snackbar(page, f"Found {len(ports)} port(s)", success=True)
-                else:
-                    show_snackbar(page, "No serial ports found.", success=False)
-            except Exception as ex:
-                show_snackbar(page, f"Scan error: {ex}", success=False)
-            finally:
-                port_dropdown.disabled = False
-                page.update()
-
-        threading.Thread(target=_scan, daemon=True).start()
+        if not quiet:
+            page.update()
+        try:
+            radios = [] if quiet else await mesh.find_serial_radios()
+            ports = await mesh.scan_serial_ports()  # radios first
+            port_dropdown.options = [ft.dropdown.Option(key=p["device"], text=port_label(p)) for p in ports]
+            if ports:
+                keep = quiet and any(p["device"] == previous for p in ports)
+                port_dropdown.value = previous if keep else ports[0]["device"]
+                if not quiet:
+                    found = f", {len(radios)} Meshtastic radio(s)" if radios else ""
+                    show_snackbar(page, f"Found {len(ports)} port(s){found}", success=True)
+            elif not quiet:
+                show_snackbar(page, "No serial ports found.", success=False)
+        except Exception as ex:
+            show_snackbar(page, f"Scan error: {ex}", success=False)
+        finally:
+            port_dropdown.disabled = False
+            page.update()
 
     # --- Connect ---
+    # Supervised connect: returns at once, progress arrives through the state listener
     def connect_device(e=None):
-        if handler.is_connected():
+        name = selected_connection()
+        if handler.get_state(name) != DISCONNECTED:
             show_snackbar(page, "Already connected. Disconnect first.", success=False)
             return
 
-        def _connect():
-            try:
-                if connection_type.value == "serial":
-                    selected_port = port_dropdown.value
-                    if not selected_port:
-                        show_snackbar(page, "Select a serial port", success=False)
-                        return
-                    handler.connect(port=selected_port)
-                    show_snackbar(page, f"Connected to {selected_port}", success=True)
-                else:
-                    ip = ip_input.value.strip()
-                    portnum = int(port_input.value.strip() or 4403)
-                    if not ip:
-                        show_snackbar(page, "Enter IP/hostname", success=False)
-                        return
-                    handler.connect(hostname=ip, portnum=portnum)
-                    show_snackbar(page, f"Connected to {ip}:{portnum}", success=True)
-            except Exception as ex:
-                show_snackbar(page, f"Connection failed: {ex}", success=False)
-
-        threading.Thread(target=_connect, daemon=True).start()
+        try:
+            if connection_type.value == "serial":
+                selected_port = port_dropdown.value
+                if not selected_port:
+                    show_snackbar(page, "Select a serial port", success=False)
+                    return
+                handler.connect_in_background(port=selected_port, connection_id=name)
+                show_snackbar(page, f"Connecting to {selected_port}...", success=True)
+            else:
+                ip = ip_input.value.strip()
+                portnum = int(port_input.value.strip() or 4403)
+                if not ip:
+                    show_snackbar(page, "Enter IP/hostname", success=False)
+                    return
+                handler.connect_in_background(hostname=ip, portnum=portnum, connection_id=name)
+                show_snackbar(page, f"Connecting to {ip}:{portnum}...", success=True)
+        except Exception as ex:
+            show_snackbar(page, f"Connection failed: {ex}", success=False)
+
+    # --- Network discovery ---
+    discovery = NetworkDiscovery.get_instance()
+
+    def host_row(h):
+        if h["latency_ms"] is not None:
+            latency = f"{h['latency_ms']:.0f} ms"
+        else:
+            latency = "" if h["reachable"] else "offline"
+        return ft.Row([
+            ft.Icon(ft.Icons.WIFI if h["reachable"] else ft.Icons.HISTORY, size=16,
+                    color=ft.Colors.GREEN_400 if h["reachable"] else ft.Colors.GREY_500),
+            ft.Text(h["name"] or h["host"], width=160, weight="bold"),
+            ft.Text(f"{h['host']}:{h['port']}", width=160, color=ft.Colors.GREY_400),
+            ft.Text(latency, width=80, color=ft.Colors.GREY_400),
+            ft.TextButton("Connect", on_click=lambda _e, h=h: connect_host(h))
+        ], spacing=10)
+
+    def render_hosts(update=True):
+        discovered_list.controls = [host_row(h) for h in discovery.hosts()]
+        if update:
+            page.update()
+
+    def connect_host(h):
+        connection_type.value = "network"
+        ip_input.value = h["host"]
+        port_input.value = str(h["port"])
+        connect_device()
+        page.update()
+
+    async def discover_hosts(e=None):
+        discover_button.disabled = True
+        page.update()
+        try:
+            hosts = await mesh.find_network_radios()
+            found = sum(1 for h in hosts if h["reachable"])
+            show_snackbar(page, f"Found {found} reachable radio(s)", success=bool(found))
+        except Exception as ex:
+            show_snackbar(page, f"Discovery error: {ex}", success=False)
+        finally:
+            discover_button.disabled = False
+            render_hosts()
 
     # --- Disconnect ---
-    def disconnect_device(e=None):
-        if not handler.is_connected():
+    async def disconnect_device(e=None):
+        name = selected_connection()
+        if handler.get_state(name) == DISCONNECTED:
             show_snackbar(page, "Not connected", success=False)
             return
+        try:
+            await mesh.disconnect(name)
+            show_snackbar(page, "Disconnected", success=True)
+        except Exception as ex:
+            show_snackbar(page, f"Disconnect error: {ex}", success=False)
+
+    # --- Capture and replay ---
+    record_switch = ft.Switch(label="Record traffic", value=False)
+    capture_text = ft.Text("", size=12, color=ft.Colors.GREY_400)
+    replay_path_input = ft.TextField(label="Capture File", hint_text=f"recording{CAPTURE_SUFFIX}", width=400)
+    replay_speed = ft.Dropdown(
+        label="Speed", width=150, value="1",
+        options=[ft.dropdown.Option(key="1", text="1x"), ft.dropdown.Option(key="10", text="10x"),
+                 ft.dropdown.Option(key="0", text="As fast as possible")]
+    )
 
-        def _disconnect():
-            try:
-                handler.disconnect()
-                show_snackbar(page, "Disconnected", success=True)
-            except Exception as ex:
-                show_snackbar(page, f"Disconnect error: {ex}", success=False)
+    def toggle_recording(e=None):
+        try:
+            if record_switch.value:
+                captures = get_data_dir() / "captures"
+                captures.mkdir(exist_ok=True)
+                path = captures / f"{datetime.now():%Y%m%d-%H%M%S}{CAPTURE_SUFFIX}"
+                handler.start_capture(path)
+                capture_text.value = f"Recording to {path}"
+            else:
+                recorder = handler.stop_capture()
+                capture_text.value = f"Saved {recorder.count} packets to {recorder.path}" if recorder else ""
+            page.update()
+        except Exception as ex:
+            record_switch.value = False
+            show_snackbar(page, f"Recording failed: {ex}", success=False)
 
-        threading.Thread(target=_disconnect, daemon=True).start()
+    def replay_capture(e=None):
+        path = replay_path_input.value.strip()
+        if not path:
+            show_snackbar(page, "Enter a capture file", success=False)
+            return
+        try:
+            handler.replay_capture(path, speed=float(replay_speed.value or 1))
+            show_snackbar(page, f"Replaying {path} as connection '{REPLAY_CONNECTION}'", success=True)
+        except Exception as ex:
+            show_snackbar(page, f"Replay failed: {ex}", success=False)
+
+    record_switch.on_change = toggle_recording
 
     # --- Event handlers ---
     connection_type.on_change = lambda e=None: (
@@ -159,10 +294,17 @@ def create_connection_tab(page: ft.Page):
         page.update()
     )
     serial_section.content.controls[1].controls[1].on_click = scan_ports  # Scan button
+    discover_button.on_click = discover_hosts
 
-    # --- Initial setup ---
-    scan_ports()
-    update_connection_status()
+    # --- Initial setup (nothing here may block or update the page before it is shown) ---
+    page.run_task(scan_ports, None, True)
+    # Re-list ports when a device is plugged in or removed
+    SerialDiscovery.get_instance().add_listener(lambda _added, _removed: page.run_task(scan_ports, None, True))
+    # Cached hosts show up at once; mDNS announcements (if zeroconf is installed) add radios as they arrive
+    render_hosts(update=False)
+    discovery.add_listener(render_hosts)
+    discovery.start_mdns()
+    update_connection_status(update=False)
 
     # --- Layout ---
     return ft.Column([
@@ -170,11 +312,12 @@ def create_connection_tab(page: ft.Page):
             ft.Text("Connection", size=24, weight="bold"),
             ft.ElevatedButton("Refresh Ports", on_click=scan_ports)
         ], alignment="spaceBetween"),
-        ft.Container(content=ft.Column([status_indicator, connected_port_text, connection_type_text]),
+        ft.Container(content=ft.Column([status_indicator, connected_port_text, connection_type_text, pool_text]),
                      padding=20, bgcolor=ft.Colors.GREY_900, border_radius=10, margin=ft.margin.only(bottom=20)),
         ft.Container(content=ft.Column([
             ft.Text("Connection Type", size=18, weight="bold", color=ft.Colors.WHITE),
             connection_type,
+            connection_name_input,
             ft.Divider(),
             serial_section,
             network_section,
@@ -183,5 +326,12 @@ def create_connection_tab(page: ft.Page):
                 ft.ElevatedButton("Connect", on_click=connect_device, bgcolor=ft.Colors.GREEN_700, color=ft.Colors.WHITE),
                 ft.ElevatedButton("Disconnect", on_click=disconnect_device, bgcolor=ft.Colors.RED_700, color=ft.Colors.WHITE)
             ], spacing=10)
-        ], spacing=15), padding=20, bgcolor=ft.Colors.GREY_900, border_radius=10)
+        ], spacing=15), padding=20, bgcolor=ft.Colors.GREY_900, border_radius=10),
+        ft.Container(content=ft.Column([
+            ft.Text("Capture & Replay", size=18, weight="bold", color=ft.Colors.WHITE),
+            ft.Row([record_switch, capture_text], spacing=10),
+            ft.Row([replay_path_input, replay_speed, ft.ElevatedButton("Replay", on_click=replay_capture)], spacing=10),
+            ft.Text(f"Replays appear as the '{REPLAY_CONNECTION}' connection; disconnect it to stop.",
+                    size=12, color=ft.Colors.GREY_400, italic=True)
+        ], spacing=10), padding=20, bgcolor=ft.Colors.GREY_900, border_radius=10)
     ], expand=True, spacing=20)
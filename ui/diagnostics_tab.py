@@ -0,0 +1,94 @@
+# ui/diagnostics_tab.py
+import flet as ft
+from ui.components import show_snackbar
+from utils.metrics import MetricsRegistry
+from utils.paths import get_data_dir
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:.1f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+def format_labels(labels):
+    return ", ".join(f"{k}={v}" for k, v in labels.items()) or "-"
+
+def create_diagnostics_tab(page: ft.Page):
+    metrics = MetricsRegistry.get_instance()
+
+    startup_text = ft.Text("", size=12, font_family="monospace", color=ft.Colors.GREY_300, selectable=True)
+    values_table = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("Metric")),
+            ft.DataColumn(ft.Text("Labels")),
+            ft.DataColumn(ft.Text("Value"), numeric=True)
+        ],
+        rows=[],
+        column_spacing=30,
+        heading_row_color=ft.Colors.BLUE_GREY_900,
+        heading_text_style=ft.TextStyle(weight="bold", color=ft.Colors.WHITE)
+    )
+    timings_table = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("Metric")),
+            ft.DataColumn(ft.Text("Labels")),
+            ft.DataColumn(ft.Text("Count"), numeric=True),
+            ft.DataColumn(ft.Text("Mean"), numeric=True),
+            ft.DataColumn(ft.Text("p50"), numeric=True),
+            ft.DataColumn(ft.Text("p95"), numeric=True),
+            ft.DataColumn(ft.Text("Max"), numeric=True)
+        ],
+        rows=[],
+        column_spacing=30,
+        heading_row_color=ft.Colors.BLUE_GREY_900,
+        heading_text_style=ft.TextStyle(weight="bold", color=ft.Colors.WHITE)
+    )
+
+    def cells(*values):
+        return [ft.DataCell(ft.Text(str(v))) for v in values]
+
+    def refresh_diagnostics(e=None, nodes=None, update=True):
+        """Re-read the metrics registry; with update=False (scheduled refresh) only mutate controls."""
+        startup = (page.data or {}).get("startup")
+        startup_text.value = startup.report() if startup else ""
+        values, timings = [], []
+        for name, _help, kind, samples in metrics.collect():
+            for labels, metric in samples:
+                if kind == "histogram":
+                    is_time = name.endswith("_seconds")
+                    fmt = format_seconds if is_time else (lambda v: f"{v:.1f}")
+                    timings.append(ft.DataRow(cells=cells(
+                        name, format_labels(labels), metric.count, fmt(metric.mean()),
+                        fmt(metric.quantile(0.5)), fmt(metric.quantile(0.95)), fmt(metric.max))))
+                else:
+                    values.append(ft.DataRow(cells=cells(name, format_labels(labels), metric.value)))
+        values_table.rows = values
+        timings_table.rows = timings
+        if update:
+            page.update()
+
+    def export(fmt):
+        path = get_data_dir() / f"metrics.{fmt}"
+        try:
+            path.write_text(metrics.to_prometheus() if fmt == "prom" else metrics.to_json())
+            show_snackbar(page, f"Metrics written to {path}", success=True)
+        except Exception as ex:
+            show_snackbar(page, f"Export failed: {ex}", success=False)
+
+    tab_content = ft.Container(
+        content=ft.Column([
+            ft.Row([
+                ft.Text("Diagnostics", size=20, weight="bold"),
+                ft.ElevatedButton("Refresh", icon=ft.Icons.REFRESH, on_click=refresh_diagnostics),
+                ft.OutlinedButton("Export Prometheus", on_click=lambda e: export("prom")),
+                ft.OutlinedButton("Export JSON", on_click=lambda e: export("json"))
+            ], spacing=10),
+            startup_text,
+            ft.Text("Counters & Gauges", size=16, weight="bold", color=ft.Colors.BLUE_200),
+            values_table,
+            ft.Text("Timings", size=16, weight="bold", color=ft.Colors.BLUE_200),
+            timings_table
+        ], spacing=15, scroll="auto"),
+        padding=15,
+        expand=True
+    )
+
+    refresh_diagnostics(update=False)
+    return tab_content, refresh_diagnostics
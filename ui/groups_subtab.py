@@ -0,0 +1,263 @@
+# ui/groups_subtab.py
+import flet as ft
+import threading
+import time
+from scripts.group_msg import (list_groups, save_group, delete_group, select_nodes, send_to_group,
+                               get_batch, list_batches, cancel_batch)
+from ui.components import show_snackbar
+from utils.group_store import FINAL_STATES
+from utils.keyed_render import KeyedControls
+from utils.node_store import NodeStore
+
+MEMBER_LIMIT = 200  # filter matches listed with a checkbox; selected nodes are always listed
+STATUS_POLL = 2.0  # seconds between results refreshes while a batch is still being delivered
+STATUS_COLORS = {"acked": ft.Colors.GREEN_400, "failed": ft.Colors.RED_400, "cancelled": ft.Colors.GREY_500}
+
+def create_groups_subtab(page: ft.Page):
+    store = NodeStore.get_instance()
+    selected = set()  # node ids ticked in the member list
+    state = {"batch": None, "timer": None}
+
+    def display_name(node_id):
+        record = store.get(node_id)
+        return record.long_name if record and record.long_name != "Unknown" else node_id
+
+    # --- Recipients ---
+    group_dropdown = ft.Dropdown(label="Saved group", width=250, options=[],
+                                 on_change=lambda _e: load_group(group_dropdown.value))
+    group_name_input = ft.TextField(label="Group name", width=250)
+    filter_input = ft.TextField(label="Filter (name or id)", expand=True,
+                                on_change=lambda _e: (render_members(), page.update()),
+                                on_submit=lambda _e: select_matching())
+    members_list = ft.ListView(height=220, spacing=0)
+    members_hint = ft.Text("", size=12, color=ft.Colors.GREY_400, italic=True)
+    selection_text = ft.Text("No recipients selected", size=12, color=ft.Colors.GREY_400)
+    message_input = ft.TextField(label="Message", expand=True, multiline=True, min_lines=2, max_lines=4)
+    send_button = ft.ElevatedButton("Send to group", on_click=lambda _e: send(), width=200)
+
+    def load_groups():
+        groups = list_groups()
+        group_dropdown.options = [ft.dropdown.Option(name) for name in groups]
+        if group_dropdown.value not in groups:
+            group_dropdown.value = None
+        return groups
+
+    # Checkboxes are keyed by node id, so a refresh only patches labels and ticks that changed
+    members = KeyedControls(
+        members_list,
+        lambda n, props: ft.Checkbox(label=props[0], value=props[1], on_change=lambda e: toggle(n, e.control.value)),
+        lambda n, checkbox, props: patch_member(checkbox, *props)
+    )
+
+    def patch_member(checkbox, label, value):
+        checkbox.label = label
+        checkbox.value = value
+        return checkbox
+
+    def render_members():
+        """List the selected nodes, then nodes matching the filter (at most MEMBER_LIMIT), with a checkbox."""
+        needle = (filter_input.value or "").strip()
+        matches = []
+        if needle:
+            try:
+                matches = [n for n in select_nodes(needle) if n not in selected]
+            except Exception:
+                pass
+        shown = sorted(selected) + matches[:MEMBER_LIMIT]
+        members.render([(n, (f"{display_name(n)} ({n})", n in selected)) for n in shown])
+        if not needle:
+            members_hint.value = "Type in the filter to find nodes to add."
+        elif len(matches) > MEMBER_LIMIT:
+            members_hint.value = f"Showing {MEMBER_LIMIT} of {len(matches)} matching nodes; refine the filter."
+        else:
+            members_hint.value = f"{len(matches)} matching nodes not selected"
+        update_selection_text()
+
+    def update_selection_text():
+        selection_text.value = f"{len(selected)} recipients selected" if selected else "No recipients selected"
+        send_button.text = f"Send to {len(selected)}" if selected else "Send to group"
+
+    def toggle(node_id, value):
+        if value:
+            selected.add(node_id)
+        else:
+            selected.discard(node_id)
+        update_selection_text()
+        page.update()
+
+    def load_group(name):
+        members = list_groups().get(name)
+        if members is None:
+            return
+        selected.clear()
+        selected.update(members)
+        group_name_input.value = name
+        render_members()
+        page.update()
+
+    def select_matching():
+        try:
+            matches = select_nodes(filter_input.value)
+        except Exception as ex:
+            show_snackbar(page, f"Error: {ex}", success=False)
+            return
+        selected.update(matches)
+        render_members()
+        show_snackbar(page, f"Selected {len(matches)} matching nodes", success=True)
+        page.update()
+
+    def clear_selection(_e=None):
+        selected.clear()
+        group_dropdown.value = None
+        render_members()
+        page.update()
+
+    def save_selection(_e=None):
+        try:
+            save_group(group_name_input.value, selected)
+            load_groups()
+            group_dropdown.value = group_name_input.value.strip()
+            show_snackbar(page, f"Saved group {group_dropdown.value}", success=True)
+        except Exception as ex:
+            show_snackbar(page, f"Error: {ex}", success=False)
+        page.update()
+
+    def delete_selected_group(_e=None):
+        if not group_dropdown.value:
+            show_snackbar(page, "Pick a saved group first", success=False)
+            return
+        delete_group(group_dropdown.value)
+        group_dropdown.value = None
+        load_groups()
+        show_snackbar(page, "Group deleted", success=True)
+        page.update()
+
+    def send():
+        if not selected:
+            show_snackbar(page, "Select at least one recipient", success=False)
+            return
+        # Only name the group if the recipients are still exactly its saved members
+        group_name = group_dropdown.value
+        if group_name and set(list_groups().get(group_name) or ()) != selected:
+            group_name = None
+        try:
+            batch_id = send_to_group(message_input.value, sorted(selected), group_name=group_name)
+        except Exception as ex:
+            show_snackbar(page, f"Error: {ex}", success=False)
+            page.update()
+            return
+        message_input.value = ""
+        show_snackbar(page, f"Queued for {len(selected)} recipients", success=True)
+        load_batches()
+        show_batch(batch_id)
+
+    # --- Results ---
+    batch_dropdown = ft.Dropdown(label="Batch", width=420, options=[],
+                                 on_change=lambda _e: show_batch(int(batch_dropdown.value)))
+    summary_text = ft.Text("", size=12, color=ft.Colors.GREY_400)
+    results_table = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("Node")),
+            ft.DataColumn(ft.Text("Name")),
+            ft.DataColumn(ft.Text("Status")),
+            ft.DataColumn(ft.Text("Attempts"), numeric=True),
+            ft.DataColumn(ft.Text("Error"))
+        ],
+        rows=[],
+        border_radius=5,
+        column_spacing=30,
+        heading_row_color=ft.Colors.BLUE_GREY_900,
+        heading_text_style=ft.TextStyle(weight="bold", color=ft.Colors.WHITE),
+        data_row_color=ft.Colors.BLUE_GREY_800
+    )
+
+    def batch_label(batch):
+        sent = time.strftime("%m-%d %H:%M", time.localtime(batch["created"]))
+        target = batch["group_name"] or "ad hoc"
+        text = batch["text"] if len(batch["text"]) <= 30 else batch["text"][:29] + "…"
+        return f"#{batch['id']} {sent} {target}: {text}"
+
+    def load_batches():
+        batches = list_batches()
+        batch_dropdown.options = [ft.dropdown.Option(key=str(b["id"]), text=batch_label(b)) for b in batches]
+
+    def show_batch(batch_id, update=True):
+        state["batch"] = batch_id
+        batch_dropdown.value = str(batch_id)
+        try:
+            batch = get_batch(batch_id)
+        except Exception as ex:
+            summary_text.value = f"Error: {ex}"
+            if update:
+                page.update()
+            return
+        counts = {}
+        rows = []
+        for r in batch["recipients"]:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+            rows.append(ft.DataRow(cells=[
+                ft.DataCell(ft.Text(r["node_id"])),
+                ft.DataCell(ft.Text(display_name(r["node_id"]))),
+                ft.DataCell(ft.Text(r["status"], color=STATUS_COLORS.get(r["status"]))),
+                ft.DataCell(ft.Text(str(r["attempts"]))),
+                ft.DataCell(ft.Text(r["error"] or ""))
+            ]))
+        results_table.rows = rows
+        summary_text.value = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        cancel_button.disabled = bool(batch["cancelled"]) or all(s in FINAL_STATES for s in counts)
+        if not cancel_button.disabled:
+            schedule_poll()
+        if update:
+            page.update()
+
+    def schedule_poll():
+        if state["timer"] is None:
+            state["timer"] = threading.Timer(STATUS_POLL, poll)
+            state["timer"].daemon = True
+            state["timer"].start()
+
+    def poll():
+        state["timer"] = None
+        if state["batch"] is not None:
+            show_batch(state["batch"])
+
+    def cancel_selected_batch(_e=None):
+        if state["batch"] is None:
+            return
+        cancel_batch(state["batch"])
+        show_snackbar(page, "Batch cancelled; messages already queued are still sent", success=True)
+        show_batch(state["batch"])
+
+    cancel_button = ft.TextButton("Cancel batch", on_click=cancel_selected_batch, disabled=True)
+
+    def refresh_groups(e=None, nodes=None, update=True):
+        """Reload saved groups, the member list and the results table."""
+        load_groups()
+        render_members()
+        load_batches()
+        if state["batch"] is not None:
+            show_batch(state["batch"], update=False)
+        if update:
+            page.update()
+
+    groups_subtab = ft.Container(
+        content=ft.Column([
+            ft.Text("Group Messages", size=20, weight="bold"),
+            ft.Row([group_dropdown, group_name_input,
+                    ft.ElevatedButton("Save group", on_click=save_selection),
+                    ft.TextButton("Delete group", on_click=delete_selected_group)], spacing=10),
+            ft.Row([filter_input, ft.ElevatedButton("Select matching", on_click=lambda _e: select_matching()),
+                    ft.TextButton("Clear", on_click=clear_selection)], spacing=10),
+            ft.Row([selection_text, members_hint], spacing=20),
+            members_list,
+            ft.Row([message_input, send_button], spacing=10),
+            ft.Divider(),
+            ft.Row([batch_dropdown, cancel_button, summary_text], spacing=10),
+            results_table
+        ], spacing=10, scroll="auto"),
+        padding=10,
+        expand=True
+    )
+
+    refresh_groups(update=False)
+    return groups_subtab, refresh_groups
@@ -0,0 +1,204 @@
+# ui/map_tab.py
+import flet as ft
+import flet.canvas as cv
+import math
+import threading
+from utils.node_store import NodeStore
+from utils.spatial_index import PositionStore, KM_PER_DEGREE, GRID_CELL_DEG
+
+MAP_WIDTH = 900
+MAP_HEIGHT = 560
+CLUSTER_PX = 48      # clusters are about this many pixels across
+MAX_MARKERS = 400    # more individual nodes than this in view -> cluster even when zoomed in
+LABEL_LIMIT = 150    # draw short names only when this few nodes are in view
+HIT_PX = 12          # tap tolerance
+REDRAW_DELAY = 0.5   # coalesce position updates
+
+def create_map_tab(page: ft.Page):
+    positions = PositionStore.get_instance()
+    store = NodeStore.get_instance()
+    view = {"lat": 0.0, "lon": 0.0, "dpp": 0.01, "width": MAP_WIDTH, "height": MAP_HEIGHT, "fitted": False}
+    state = {"selected": None, "clusters": [], "timer": None}
+
+    canvas = cv.Canvas(shapes=[], width=MAP_WIDTH, height=MAP_HEIGHT)
+    status_text = ft.Text("", size=12, color=ft.Colors.GREY_400)
+    selection_text = ft.Text("Tap a node for details", size=14, color=ft.Colors.GREY_300, selectable=True)
+
+    # --- Projection (equirectangular around the view center) ---
+    def lon_scale():
+        return max(math.cos(math.radians(view["lat"])), 0.01)
+
+    def to_screen(lat, lon):
+        x = view["width"] / 2 + (lon - view["lon"]) * lon_scale() / view["dpp"]
+        y = view["height"] / 2 - (lat - view["lat"]) / view["dpp"]
+        return x, y
+
+    def to_geo(x, y):
+        lat = view["lat"] - (y - view["height"] / 2) * view["dpp"]
+        lon = view["lon"] + (x - view["width"] / 2) * view["dpp"] / lon_scale()
+        return lat, lon
+
+    def viewport():
+        half_lat = view["height"] / 2 * view["dpp"]
+        half_lon = min(180.0, view["width"] / 2 * view["dpp"] / lon_scale())
+        lon0, lon1 = view["lon"] - half_lon, view["lon"] + half_lon
+        if half_lon >= 180:
+            lon0, lon1 = -180.0, 180.0
+        else:
+            lon0, lon1 = (lon0 + 540) % 360 - 180, (lon1 + 540) % 360 - 180
+        return max(-90.0, view["lat"] - half_lat), lon0, min(90.0, view["lat"] + half_lat), lon1
+
+    def node_label(key):
+        record = store.get(key)
+        return record.short_name if record and record.short_name != "Unknown" else key[-4:]
+
+    # --- Rendering ---
+    def redraw(update=True):
+        """Draw only what is in the viewport: clusters when zoomed out, individual nodes otherwise."""
+        shapes = [cv.Rect(0, 0, view["width"], view["height"], paint=ft.Paint(color=ft.Colors.BLUE_GREY_900))]
+        box = viewport()
+        cluster_deg = CLUSTER_PX * view["dpp"]
+        # Clusters at least a grid cell wide come from per-cell sums, without touching single nodes
+        points = None if cluster_deg >= GRID_CELL_DEG else positions.query(*box)
+        state["clusters"] = []
+        if points is None or len(points) > MAX_MARKERS:
+            clusters = positions.clusters(*box, cluster_deg)
+            state["clusters"] = clusters
+            for c in clusters:
+                x, y = to_screen(c.lat, c.lon)
+                if c.count == 1:
+                    shapes.append(cv.Circle(x, y, 5, paint=ft.Paint(color=ft.Colors.GREEN_400)))
+                    continue
+                radius = 8 + 3 * math.log2(c.count)
+                shapes.append(cv.Circle(x, y, radius,
+                                        paint=ft.Paint(color=ft.Colors.with_opacity(0.7, ft.Colors.BLUE_400))))
+                shapes.append(cv.Text(x - 4 * len(str(c.count)), y - 7, str(c.count),
+                                      style=ft.TextStyle(size=11, weight="bold", color=ft.Colors.WHITE)))
+            shown = sum(c.count for c in clusters)
+            status_text.value = f"{shown} positioned nodes in view ({len(clusters)} clusters), {len(positions)} total"
+        else:
+            labels = len(points) <= LABEL_LIMIT
+            for key, lat, lon in points:
+                x, y = to_screen(lat, lon)
+                selected = key == state["selected"]
+                color = ft.Colors.AMBER_400 if selected else ft.Colors.GREEN_400
+                shapes.append(cv.Circle(x, y, 7 if selected else 5, paint=ft.Paint(color=color)))
+                if labels:
+                    shapes.append(cv.Text(x + 8, y - 7, node_label(key),
+                                          style=ft.TextStyle(size=11, color=ft.Colors.WHITE)))
+            status_text.value = f"{len(points)} positioned nodes in view, {len(positions)} total"
+        if not len(positions):
+            status_text.value = "No node positions yet"
+            view["fitted"] = False  # fit the next radio's nodes when they arrive
+        canvas.shapes = shapes
+        if update:
+            page.update()
+
+    def fit_all(e=None, update=True):
+        bounds = positions.bounds()
+        if not bounds:
+            return redraw(update)
+        min_lat, min_lon, max_lat, max_lon = bounds
+        view["lat"], view["lon"] = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+        span_lat = (max_lat - min_lat) / (view["height"] * 0.9)
+        span_lon = (max_lon - min_lon) * lon_scale() / (view["width"] * 0.9)
+        view["dpp"] = max(span_lat, span_lon, 1e-5)
+        view["fitted"] = True
+        redraw(update)
+
+    def zoom(factor, e=None):
+        view["dpp"] = min(max(view["dpp"] * factor, 1e-6), 1.0)
+        redraw()
+
+    # --- Interaction ---
+    def on_pan(e: ft.DragUpdateEvent):
+        view["lat"] = min(85.0, max(-85.0, view["lat"] + e.delta_y * view["dpp"]))
+        view["lon"] = (view["lon"] - e.delta_x * view["dpp"] / lon_scale() + 540) % 360 - 180
+        redraw()
+
+    def on_scroll(e: ft.ScrollEvent):
+        zoom(1.25 if (e.scroll_delta_y or 0) > 0 else 0.8)
+
+    def on_tap(e: ft.TapEvent):
+        lat, lon = to_geo(e.local_x, e.local_y)
+        for c in state["clusters"]:
+            x, y = to_screen(c.lat, c.lon)
+            if c.count > 1 and math.hypot(x - e.local_x, y - e.local_y) <= 8 + 3 * math.log2(c.count):
+                view["lat"], view["lon"] = c.lat, c.lon
+                zoom(0.25)
+                return
+        hit = positions.nearest(lat, lon, k=1, max_km=HIT_PX * view["dpp"] * KM_PER_DEGREE)
+        state["selected"] = hit[0][0] if hit else None
+        show_selection()
+        redraw()
+
+    def show_selection():
+        key = state["selected"]
+        point = positions.get(key) if key else None
+        if not point:
+            selection_text.value = "Tap a node for details"
+            return
+        record = store.get(key)
+        name = record.long_name if record else key
+        lines = [f"{name} ({key})", f"Position: {point[0]:.5f}, {point[1]:.5f}"]
+        neighbour = positions.nearest(*point, k=1, exclude={key})
+        if neighbour:
+            other, km = neighbour[0]
+            other_record = store.get(other)
+            lines.append(f"Nearest node: {other_record.long_name if other_record else other} ({km:.2f} km)")
+        selection_text.value = "\n".join(lines)
+
+    def on_resize(e):
+        view["width"], view["height"] = e.width, e.height
+        redraw()
+
+    canvas.on_resize = on_resize
+
+    # --- Live updates: position packets arrive on the radio thread, redraws are coalesced ---
+    def on_positions_changed():
+        if state["timer"] is None:
+            state["timer"] = threading.Timer(REDRAW_DELAY, flush_positions)
+            state["timer"].daemon = True
+            state["timer"].start()
+
+    def flush_positions():
+        state["timer"] = None
+        if not view["fitted"]:
+            fit_all()
+        else:
+            show_selection()
+            redraw()
+
+    positions.add_listener(on_positions_changed)
+
+    def refresh_map(e=None, nodes=None, update=True):
+        """Redraw from the position index; with update=False (scheduled refresh) only mutate controls."""
+        if not view["fitted"]:
+            fit_all(update=update)
+        else:
+            show_selection()
+            redraw(update)
+
+    tab_content = ft.Container(
+        content=ft.Column([
+            ft.Row([
+                ft.Text("Map", size=20, weight="bold"),
+                ft.IconButton(ft.Icons.ZOOM_IN, tooltip="Zoom in", on_click=lambda e: zoom(0.5)),
+                ft.IconButton(ft.Icons.ZOOM_OUT, tooltip="Zoom out", on_click=lambda e: zoom(2.0)),
+                ft.IconButton(ft.Icons.FIT_SCREEN, tooltip="Show all nodes", on_click=fit_all),
+                status_text
+            ], spacing=10),
+            ft.Container(
+                content=ft.GestureDetector(content=canvas, on_pan_update=on_pan, on_scroll=on_scroll,
+                                           on_tap_down=on_tap, drag_interval=30),
+                border_radius=5,
+                clip_behavior=ft.ClipBehavior.HARD_EDGE
+            ),
+            selection_text
+        ], spacing=10, scroll="auto"),
+        padding=15,
+        expand=True
+    )
+
+    refresh_map(update=False)
+    return tab_content, refresh_map
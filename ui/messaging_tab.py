@@ -1,14 +1,110 @@
 # ui/messaging_tab.py
 import flet as ft
-from scripts.channels import send_to_channel
-from scripts.direct_msg import send_message
+import time
+from scripts.channels import send_to_channel, get_channel_history, list_channels
+from scripts.direct_msg import send_message, get_message_history
 from scripts.nodes import list_nodes
 from ui.components import show_snackbar
-from utils.format_utils import create_contact_card
+from ui.groups_subtab import create_groups_subtab
+from utils.meshtastic_helpers import MeshtasticHandler
+from utils.format_utils import create_contact_card, update_contact_card, create_message_bubble
+from utils.keyed_render import KeyedControls, ControlPool
+from utils.node_store import NodeStore
+from utils.receive_pipeline import ReceivePipeline
+from utils.search_index import NodeSearch
+
+MAX_CHANNEL_BUBBLES = 200  # live channel view keeps only the newest messages; history stays in the store
+SEARCH_LIMIT = 50  # contact cards shown for a search
+CONTACT_POOL_SIZE = 100  # released contact cards kept for reuse (e.g. while a search narrows the list)
 
 def create_messaging_tab(page: ft.Page):
+    store = NodeStore.get_instance()
+
+    def sender_name(node_id):
+        record = store.get(node_id)
+        return record.long_name if record and record.long_name != "Unknown" else node_id
+
+    def bubble_for(m):
+        outgoing = m["direction"] == "out"
+        return create_message_bubble(m["text"], outgoing, m["ts"],
+                                     sender=None if outgoing else sender_name(m["from_id"]))
+
     # Channels Sub-tab
+    pipeline = ReceivePipeline.get_instance()
+    selected_channel = {"index": 0, "names": {0: "Primary"}}
+    # Conversations are only marked read while on screen: this tab is built when first selected,
+    # and main.py reports later tab changes through page.data["tab_listeners"]
+    view = {"shown": True, "subtab": 0}
+    channel_title = ft.Text("Primary Channel", size=20, weight="bold")
+    channel_dropdown = ft.Dropdown(label="Channel", width=250, value="0",
+                                   options=[ft.dropdown.Option(key="0", text="Primary")],
+                                   on_change=lambda _e: select_channel(int(channel_dropdown.value)))
+    channel_hint = ft.Text("Send a message to the primary channel (broadcast)", color=ft.Colors.GREY_400, size=12)
     channel_message_input = ft.TextField(label="Message", expand=True, multiline=True, min_lines=3)
+    channel_history = ft.ListView(expand=True, spacing=5, padding=10, auto_scroll=True)
+    channel_send_button = ft.ElevatedButton("Send to Primary Channel", on_click=lambda _e: send_channel_message(_e),
+                                            width=250)
+
+    def channel_label(index):
+        name = selected_channel["names"].get(index, f"Channel {index}")
+        unread = pipeline.unread(channel=index)
+        return f"{index}: {name} ({unread})" if unread else f"{index}: {name}"
+
+    def update_channel_labels():
+        for option in channel_dropdown.options:
+            option.text = channel_label(int(option.key))
+
+    def load_channels(update=True):
+        """Fill the channel picker from the radio; keeps the current channel if it is still enabled."""
+        try:
+            channels = list_channels()
+        except Exception:
+            channels = [{"index": 0, "name": "Primary"}]
+        selected_channel["names"] = {c["index"]: c["name"] for c in channels}
+        channel_dropdown.options = [ft.dropdown.Option(key=str(c["index"])) for c in channels]
+        if selected_channel["index"] not in selected_channel["names"]:
+            select_channel(0, update=False)
+        else:
+            show_channel_header()
+        update_channel_labels()
+        if update:
+            page.update()
+
+    def show_channel_header():
+        index = selected_channel["index"]
+        name = selected_channel["names"].get(index, f"Channel {index}")
+        channel_title.value = "Primary Channel" if index == 0 else f"Channel {index}: {name}"
+        channel_hint.value = f"Send a message to {name} (broadcast)"
+        channel_send_button.text = "Send to Primary Channel" if index == 0 else f"Send to {name}"
+        channel_dropdown.value = str(index)
+
+    def channel_visible():
+        return view["shown"] and view["subtab"] == 0
+
+    def chat_visible():
+        return view["shown"] and view["subtab"] == 1 and selected_contact["num"] is not None
+
+    def mark_visible_read():
+        if channel_visible():
+            pipeline.mark_read(channel=selected_channel["index"])
+        elif chat_visible():
+            pipeline.mark_read(peer=selected_contact["num"])
+
+    def select_channel(index, update=True):
+        selected_channel["index"] = index
+        if channel_visible():
+            pipeline.mark_read(channel=index)
+        show_channel_header()
+        load_channel_history()
+        update_channel_labels()
+        if update:
+            page.update()
+
+    def load_channel_history():
+        try:
+            channel_history.controls = [bubble_for(m) for m in get_channel_history(selected_channel["index"])]
+        except Exception as ex:
+            print(f"Error loading channel history: {ex}")
 
     def send_channel_message(_e):
         msg = channel_message_input.value.strip()
@@ -16,22 +112,26 @@ def create_messaging_tab(page: ft.Page):
             show_snackbar(page, "Please enter a message", success=False)
             return
         try:
-            channel_idx = 0  # Primary channel
-            result = send_to_channel(msg, channel_idx)
-            show_snackbar(page, result, success=True)
-            channel_message_input.value = ""
+            result = send_to_channel(msg, selected_channel["index"])
+            if result.startswith("Error"):
+                show_snackbar(page, result, success=False)
+            else:
+                channel_history.controls.append(create_message_bubble(msg, True, time.time()))
+                show_snackbar(page, result, success=True)
+                channel_message_input.value = ""
         except Exception as ex:
             show_snackbar(page, f"Error: {ex}", success=False)
         page.update()
 
     channels_subtab = ft.Container(
         content=ft.Column([
-            ft.Text("Primary Channel", size=20, weight="bold"),
+            ft.Row([channel_title, channel_dropdown], alignment="spaceBetween"),
             ft.Divider(),
-            ft.Text("Send a message to the primary channel (broadcast)", color=ft.Colors.GREY_400, size=12),
+            channel_history,
+            channel_hint,
             channel_message_input,
-            ft.ElevatedButton("Send to Primary Channel", on_click=send_channel_message, width=250)
-        ], spacing=15, scroll="auto"),
+            channel_send_button
+        ], spacing=15),
         expand=True
     )
 
@@ -47,15 +147,42 @@ def create_messaging_tab(page: ft.Page):
 
     selected_contact = {"num": None, "name": None}
     contacts_list = ft.ListView(expand=True, spacing=5)
+    contact_search = ft.TextField(label="Search name, node id or MAC", prefix_icon=ft.Icons.SEARCH, dense=True,
+                                  on_change=lambda _e: load_contacts(update=True))
     direct_messages_view = ft.Container()
+    chat_history = ft.ListView(expand=True, spacing=5, padding=10)
+    history_cursor = {"oldest": None}  # first loaded message, used to page further back
+    load_older_button = ft.TextButton(text="Load older messages", on_click=lambda _e: load_older_messages())
+
+    def load_older_messages():
+        """Prepend one page of history older than what is already shown."""
+        try:
+            older = get_message_history(selected_contact["num"], before=history_cursor["oldest"])
+        except Exception as ex:
+            show_snackbar(page, f"Error loading history: {ex}", success=False)
+            return
+        if older:
+            history_cursor["oldest"] = older[0]
+        bubbles = [bubble_for(m) for m in older]
+        chat_history.controls[1:1] = bubbles
+        load_older_button.visible = bool(older)
+        page.update()
 
-    def show_contacts_view():
+    def load_chat_history():
+        pipeline.mark_read(peer=selected_contact["num"])
+        history_cursor["oldest"] = None
+        chat_history.controls = [load_older_button]
+        load_older_messages()
+
+    def show_contacts_view(update=True):
+        selected_contact.update({"num": None, "name": None})  # no chat open: live DMs only go to the store
         direct_messages_view.content = ft.Container(
             content=ft.Column([
                 ft.Row([
                     ft.Text("Direct Messages", size=24, weight="bold"),
                     ft.ElevatedButton("Refresh", on_click=load_contacts, width=150)
                 ], alignment="spaceBetween"),
+                contact_search,
                 ft.Divider(),
                 ft.Container(
                     content=contacts_list,
@@ -65,7 +192,8 @@ def create_messaging_tab(page: ft.Page):
             ], spacing=10),
             expand=True
         )
-        page.update()
+        if update:
+            page.update()
 
     def show_chat_view(node_num, name):
         chat_header = ft.Container(
@@ -104,68 +232,81 @@ def create_messaging_tab(page: ft.Page):
         direct_messages_view.content = ft.Container(
             content=ft.Column([
                 chat_header,
+                chat_history,
                 chat_input_area
             ], spacing=0),
             expand=True
         )
-        page.update()
+        load_chat_history()
 
-    def load_contacts(_e=None):
-        contacts_list.controls.clear()
+    # Contact cards are keyed by node number and reused across refreshes (see utils.keyed_render);
+    # index 0 of the list is a note shown instead of cards when there are none or loading failed
+    contacts_note = ft.Container(content=ft.Text("", color=ft.Colors.GREY_400), padding=15, border_radius=5,
+                                 visible=False)
+    contacts_list.controls.append(contacts_note)
+
+    def open_contact(e):
+        num, name = e.control.data
+        selected_contact.update({'num': num, 'name': name})
+        show_chat_view(num, name)
+
+    contact_cards = KeyedControls(
+        contacts_list,
+        lambda num, props: create_contact_card(num, *props, open_contact),
+        lambda num, card, props: update_contact_card(card, num, *props),
+        pool=ControlPool(capacity=CONTACT_POOL_SIZE),
+        start=1
+    )
+
+    def show_contacts_note(text, error=False):
+        contacts_note.content.value = text
+        contacts_note.content.color = ft.Colors.RED_400 if error else ft.Colors.GREY_400
+        contacts_note.bgcolor = ft.Colors.RED_900 if error else None
+        contacts_note.visible = bool(text)
+
+    def load_contacts(_e=None, nodes=None, update=True):
+        """Refresh the contact list in place; scheduled refreshes pass a shared node list and update=False.
+
+        With a search query only the best matches from the search index get a card.
+        """
+        query = (contact_search.value or "").strip()
         try:
-            nodes = list_nodes()
-            if not nodes:
-                contacts_list.controls.append(
-                    ft.Container(
-                        content=ft.Text("No nodes found. Make sure your device is connected.", color=ft.Colors.GREY_400),
-                        padding=15
-                    )
-                )
-            else:
-                contact_count = 0
-                for node in nodes:
-                    try:
-                        node_num = node.get("num")
-                        if not node_num:
-                            continue
-                        long_name = node.get("long_name", "Unknown")
-                        short_name = node.get("short_name", "Unknown")
-                        display_name = long_name if long_name != "Unknown" else f"Node {node_num}"
-
-                        contacts_list.controls.append(
-                            create_contact_card(
-                                node_num, display_name, short_name,
-                                lambda _e, n=node_num, name=display_name: (
-                                    selected_contact.update({'num': n, 'name': name}) or
-                                    show_chat_view(n, name)
-                                )
-                            )
-                        )
-                        contact_count += 1
-                    except Exception as node_ex:
-                        print(f"Error processing node: {node_ex}")
+            if query:
+                if not NodeStore.get_instance().warm:
+                    MeshtasticHandler.get_instance().get_interface()  # raises when not connected
+                nodes = NodeSearch.get_instance().search(query, limit=SEARCH_LIMIT)
+            elif nodes is None:
+                nodes = list_nodes()
+            items = []
+            for node in nodes or ():
+                try:
+                    node_num = node.num
+                    if not node_num:
                         continue
+                    long_name = node.long_name
+                    display_name = long_name if long_name != "Unknown" else f"Node {node_num}"
+                    items.append((node_num, (display_name, node.short_name)))
+                except Exception as node_ex:
+                    print(f"Error processing node: {node_ex}")
+            contact_cards.render(items)
 
-                if contact_count == 0:
-                    contacts_list.controls.append(
-                        ft.Container(
-                            content=ft.Text("No contacts available. All nodes may be broadcast nodes.", color=ft.Colors.GREY_400),
-                            padding=15
-                        )
-                    )
-                else:
-                    show_snackbar(page, f"Loaded {contact_count} contacts", success=True)
+            if not nodes and query:
+                show_contacts_note(f"No contacts match \"{query}\"")
+            elif not nodes:
+                show_contacts_note("No nodes found. Make sure your device is connected.")
+            elif not items:
+                show_contacts_note("No contacts available. All nodes may be broadcast nodes.")
+            else:
+                show_contacts_note("")
+                if update and not query:
+                    show_snackbar(page, f"Loaded {len(items)} contacts", success=True)
         except Exception as ex:
-            contacts_list.controls.append(
-                ft.Container(
-                    content=ft.Text(f"Error: {str(ex)}", color=ft.Colors.RED_400),
-                    padding=15,
-                    bgcolor=ft.Colors.RED_900,
-                    border_radius=5
-                )
-            )
-            show_snackbar(page, f"Error loading contacts: {ex}", success=False)
-        page.update()
+            contact_cards.clear()
+            show_contacts_note(f"Error: {ex}", error=True)
+            if update:
+                show_snackbar(page, f"Error loading contacts: {ex}", success=False)
+        if update:
+            page.update()
 
     def send_chat_message():
         if selected_contact["num"] is None:
@@ -181,28 +322,75 @@ def create_messaging_tab(page: ft.Page):
 
         try:
             send_message(msg, node_num)
+            chat_history.controls.append(create_message_bubble(msg, True, time.time()))
             chat_message_input.value = ""
-            show_snackbar(page, "Message sent", success=True)
+            show_snackbar(page, "Message queued", success=True)
         except Exception as ex:
             show_snackbar(page, f"Error sending message: {ex}", success=False)
         page.update()
 
-    show_contacts_view()
-    load_contacts()
+    # --- Live receive: append batches from the pipeline, one page.update() per batch ---
+    def on_messages(batch):
+        changed = False
+        for m in batch:
+            if m["peer"] is None and m["channel"] == selected_channel["index"]:
+                channel_history.controls.append(bubble_for(m))
+                changed = True
+            elif m["peer"] is None:
+                changed = True  # unread count on another channel
+            elif m["peer"] is not None and m["peer"] == selected_contact["num"]:
+                chat_history.controls.append(bubble_for(m))
+                changed = True
+        mark_visible_read()
+        update_channel_labels()
+        excess = len(channel_history.controls) - MAX_CHANNEL_BUBBLES
+        if excess > 0:
+            del channel_history.controls[:excess]
+        if changed:
+            page.update()
+
+    pipeline.add_sink(on_messages)
+
+    show_contacts_view(update=False)
+    load_channel_history()
+    # Contacts and channels need a radio; without one they are loaded by the connect refresh
+    if MeshtasticHandler.get_instance().is_connected():
+        load_channels(update=False)
+        load_contacts(update=False)
 
     direct_messages_subtab = direct_messages_view
+    groups_subtab, refresh_groups = create_groups_subtab(page)
+
+    def on_subtab_change(e):
+        view["subtab"] = e.control.selected_index
+        mark_visible_read()
+        update_channel_labels()
+        page.update()
+
+    def on_tab_shown(content):
+        view["shown"] = content is messaging_subtabs
+        if view["shown"]:
+            mark_visible_read()
+            update_channel_labels()
 
     messaging_subtabs = ft.Tabs(
         selected_index=0,
         expand=True,
+        on_change=on_subtab_change,
         tabs=[
             ft.Tab(text="Channels", content=channels_subtab),
-            ft.Tab(text="Direct Messages", content=direct_messages_subtab)
+            ft.Tab(text="Direct Messages", content=direct_messages_subtab),
+            ft.Tab(text="Groups", content=groups_subtab)
         ]
     )
 
-    def refresh_messaging():
-        """Refresh messaging tab - reload contacts"""
-        load_contacts()
+    if isinstance(page.data, dict):
+        page.data.setdefault("tab_listeners", []).append(on_tab_shown)
+
+    def refresh_messaging(nodes=None, update=True):
+        """Refresh messaging tab - reload channels, contacts and groups"""
+        load_channels(update=False)
+        load_contacts(nodes=nodes, update=update)
+        refresh_groups(nodes=nodes, update=update)
 
     return messaging_subtabs, refresh_messaging
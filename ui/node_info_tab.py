@@ -2,7 +2,23 @@
 import flet as ft
 from scripts.my_node_info import get_node_info
 from ui.components import show_snackbar
-from utils.format_utils import format_key, format_value, create_info_section
+from utils.meshtastic_helpers import MeshtasticHandler
+from utils.format_utils import create_info_section, update_info_section
+from utils.keyed_render import KeyedControls
+from utils.node_store import NodeStore
+from utils.telemetry_store import TelemetryStore
+import time
+
+MESH_AVERAGE = "mesh"
+CHART_METRICS = {
+    "batteryLevel": "Battery (%)",
+    "channelUtilization": "Channel Utilization (%)",
+    "airUtilTx": "Air Util TX (%)",
+    "voltage": "Voltage (V)",
+}
+CHART_RANGES = {"24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400, "1y": 365 * 86400}
+LOCAL_SAMPLE_INTERVAL = 300  # seconds between samples of our own radio's metrics
+INFO_SECTIONS = {"user": "User Information", "position": "Position Information", "metrics": "Device Metrics"}
 
 def create_node_info_tab(page: ft.Page):
     node_info_container = ft.Container(
@@ -11,70 +27,168 @@ def create_node_info_tab(page: ft.Page):
         expand=True
     )
 
-    def load_node_info(e=None):
-        node_info_container.content.controls.clear()
-        node_info_container.content.controls.append(
-            ft.Text("Loading...", size=16, color=ft.Colors.GREY_400)
+    # --- Telemetry history chart ---
+    telemetry = TelemetryStore.get_instance()
+    my_node = {"key": None}
+    chart_node = ft.Dropdown(label="Node", width=260)
+    chart_metric = ft.Dropdown(
+        label="Metric", width=220, value="batteryLevel",
+        options=[ft.dropdown.Option(key=k, text=v) for k, v in CHART_METRICS.items()]
+    )
+    chart_range = ft.Dropdown(
+        label="Range", width=100, value="7d",
+        options=[ft.dropdown.Option(key=k, text=k) for k in CHART_RANGES]
+    )
+    chart_status = ft.Text("", size=12, color=ft.Colors.GREY_400)
+    chart = ft.LineChart(
+        data_series=[],
+        left_axis=ft.ChartAxis(labels_size=40),
+        bottom_axis=ft.ChartAxis(labels_size=30, title=ft.Text("hours ago", size=12)),
+        horizontal_grid_lines=ft.ChartGridLines(color=ft.Colors.BLUE_GREY_800, width=1),
+        tooltip_bgcolor=ft.Colors.BLUE_GREY_900,
+        height=260,
+        expand=True
+    )
+
+    def node_options():
+        store = NodeStore.get_instance()
+        options = [ft.dropdown.Option(key=MESH_AVERAGE, text="Mesh average")]
+        for key in telemetry.nodes():
+            record = store.get(key)
+            name = record.long_name if record and record.long_name != "Unknown" else key
+            options.append(ft.dropdown.Option(key=key, text=f"{name} (me)" if key == my_node["key"] else name))
+        return options
+
+    def load_chart(e=None, update=True):
+        """Plot mean with min/max envelope from the coarsest-enough telemetry tier."""
+        chart_node.options = node_options()
+        if chart_node.value not in {o.key for o in chart_node.options}:
+            chart_node.value = my_node["key"] if my_node["key"] in telemetry.nodes() else MESH_AVERAGE
+        now = time.time()
+        since = now - CHART_RANGES[chart_range.value]
+        if chart_node.value == MESH_AVERAGE:
+            rows = telemetry.mesh_series(chart_metric.value, since=since)
+        else:
+            rows = telemetry.series(chart_node.value, chart_metric.value, since=since)
+
+        def line(index, color, width):
+            return ft.LineChartData(
+                data_points=[ft.LineChartDataPoint(round((r[0] - now) / 3600, 2), round(float(r[index]), 2))
+                             for r in rows],
+                color=color, stroke_width=width, curved=False
+            )
+
+        chart.data_series = [line(1, ft.Colors.BLUE_GREY_500, 1), line(2, ft.Colors.BLUE_GREY_500, 1),
+                             line(3, ft.Colors.BLUE_300, 3)] if rows else []
+        chart_status.value = f"{len(rows)} points (mean, min and max)" if rows else "No telemetry recorded yet"
+        if update:
+            page.update()
+
+    for control in (chart_node, chart_metric, chart_range):
+        control.on_change = load_chart
+
+    telemetry_card = ft.Card(
+        content=ft.Container(
+            content=ft.Column([
+                ft.Text("Telemetry History", size=18, weight="bold", color=ft.Colors.BLUE_200),
+                ft.Row([chart_node, chart_metric, chart_range], spacing=10),
+                chart,
+                chart_status
+            ], spacing=10),
+            padding=15
         )
-        page.update()
+    )
+
+    # --- Node info cards, reused and patched in place on every refresh (see utils.keyed_render) ---
+    def create_header(info):
+        title = ft.Text("", size=20, weight="bold", color=ft.Colors.WHITE)
+        favorite = ft.Text("", size=14, color=ft.Colors.AMBER)
+        card = ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Row([title, ft.Container(content=favorite, padding=ft.padding.only(left=10))])
+                ]),
+                padding=15
+            ),
+            elevation=3,
+            color=ft.Colors.BLUE_400,
+            margin=ft.margin.only(bottom=15)
+        )
+        card.data = {"title": title, "favorite": favorite}
+        return patch_header(card, info)
+
+    def patch_header(card, info):
+        num, is_favorite = info
+        status_icon = "★" if is_favorite else "◆"
+        card.data["title"].value = f"{status_icon} Node #{num}"
+        card.data["favorite"].value = "★ Favorite" if is_favorite else ""
+        return card
+
+    def create_error(message):
+        return ft.Container(
+            content=ft.Text(message, color=ft.Colors.RED_400, size=14),
+            padding=15,
+            bgcolor=ft.Colors.RED_900,
+            border_radius=5
+        )
+
+    def create_card(key, props):
+        if key == "header":
+            return create_header(props)
+        if key == "error":
+            return create_error(props)
+        if key == "telemetry":
+            return telemetry_card
+        return create_info_section(INFO_SECTIONS[key], "", props)
+
+    def patch_card(key, control, props):
+        if key == "header":
+            return patch_header(control, props)
+        if key == "error":
+            control.content.value = props
+            return control
+        if key == "telemetry":
+            return control
+        return update_info_section(control, INFO_SECTIONS[key], "", props)
+
+    cards = KeyedControls(node_info_container.content, create_card, patch_card)
+
+    def load_node_info(e=None, nodes=None, update=True):
+        """Reload node info; with update=False (scheduled refresh) only mutate controls, no snackbar/update.
+
+        Cards are patched in place, so a refresh with unchanged data sends no updates to the page.
+        """
         try:
             info = get_node_info()
-            node_info_container.content.controls.clear()
-
-            # Add node number and favorite status
-            status_icon = "★" if info.get("is_favorite") else "◆"
-            node_info_container.content.controls.append(
-                ft.Card(
-                    content=ft.Container(
-                        content=ft.Column([
-                            ft.Row([
-                                ft.Text(f"{status_icon} Node #{info.get('num', 'N/A')}", 
-                                       size=20, weight="bold", color=ft.Colors.WHITE),
-                                ft.Container(
-                                    content=ft.Text("★ Favorite" if info.get("is_favorite") else "", 
-                                                   size=14, color=ft.Colors.AMBER),
-                                    padding=ft.padding.only(left=10)
-                                )
-                            ])
-                        ]),
-                        padding=15
-                    ),
-                    elevation=3,
-                    color=ft.Colors.BLUE_400,
-                    margin=ft.margin.only(bottom=15)
-                )
-            )
+            items = [("header", (info.get("num", "N/A"), bool(info.get("is_favorite"))))]
 
             # Add sections for user, position, and metrics
-            if info.get("user"):
-                node_info_container.content.controls.append(
-                    create_info_section("User Information", "", info["user"])
-                )
-            if info.get("position"):
-                node_info_container.content.controls.append(
-                    create_info_section("Position Information", "", info["position"])
-                )
+            for key in INFO_SECTIONS:
+                if info.get(key):
+                    # A copy: these are the radio's live dicts (telemetry updates them in place), and
+                    # KeyedControls only patches a card when its props compare unequal to the last ones
+                    items.append((key, dict(info[key])))
             if info.get("metrics"):
-                node_info_container.content.controls.append(
-                    create_info_section("Device Metrics", "", info["metrics"])
-                )
+                my_node["key"] = info.get("user", {}).get("id")
+                if my_node["key"]:
+                    # Our own radio's metrics don't arrive as telemetry packets; sample them on refresh
+                    telemetry.add_sample(my_node["key"], info["metrics"], min_interval=LOCAL_SAMPLE_INTERVAL)
+            items.append(("telemetry", None))
+            cards.render(items)
+            load_chart(update=False)
 
-            show_snackbar(page, "Node information loaded successfully", success=True)
+            if update:
+                show_snackbar(page, "Node information loaded successfully", success=True)
         except Exception as ex:
-            node_info_container.content.controls.clear()
-            node_info_container.content.controls.append(
-                ft.Container(
-                    content=ft.Text(f"Error: {ex}", color=ft.Colors.RED_400, size=14),
-                    padding=15,
-                    bgcolor=ft.Colors.RED_900,
-                    border_radius=5
-                )
-            )
-            show_snackbar(page, f"Error loading node info: {ex}", success=False)
-        page.update()
+            cards.render([("error", f"Error: {ex}")])
+            if update:
+                show_snackbar(page, f"Error loading node info: {ex}", success=False)
+        if update:
+            page.update()
 
-    # Load node info on startup
-    load_node_info()
+    # Load node info now only if a radio is already up; otherwise the connect refresh loads it
+    if MeshtasticHandler.get_instance().is_connected():
+        load_node_info(update=False)
 
     tab_content = ft.Container(
         content=ft.Column([
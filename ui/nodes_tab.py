@@ -1,17 +1,62 @@
 # ui/nodes_tab.py
 import flet as ft
-from scripts.nodes import list_nodes
+import threading
+from datetime import datetime
+from scripts.nodes import get_node_changes
 from ui.components import show_snackbar
+from utils.meshtastic_helpers import MeshtasticHandler
+from utils.node_store import NodeStore
+from utils.paging import Pager, LruCache, SortedIndex
+
+PAGE_SIZE = 50
+ROW_CACHE_SIZE = 4 * PAGE_SIZE
+
+
+def _node_number(n):
+    try:
+        return int(str(n.num).lstrip("!"), 16)
+    except ValueError:
+        return None
+
+
+def _lower(value):
+    return value.lower() if value and value != "Unknown" else None
+
+
+# (heading, sort value, cell text, numeric) per column, in display order
+COLUMNS = [
+    ("Node #", _node_number, lambda n: str(n.num), False),
+    ("Long Name", lambda n: _lower(n.long_name), lambda n: n.long_name, False),
+    ("Short Name", lambda n: _lower(n.short_name), lambda n: n.short_name, False),
+    ("Last Heard", lambda n: n.last_heard,
+     lambda n: datetime.fromtimestamp(n.last_heard).strftime("%Y-%m-%d %H:%M") if n.last_heard else "", False),
+    ("SNR", lambda n: n.snr, lambda n: f"{n.snr:.1f} dB" if n.snr is not None else "", True),
+    ("Hops", lambda n: n.hops_away, lambda n: str(n.hops_away) if n.hops_away is not None else "", True),
+    ("Battery", lambda n: n.battery,
+     lambda n: ("Powered" if n.battery > 100 else f"{n.battery}%") if n.battery is not None else "", True),
+    ("MAC", lambda n: _lower(n.mac), lambda n: n.mac, False),
+]
+DEFAULT_SORT = 3  # most recently heard first
+DESCENDING_FIRST = {3, 4, 6}  # columns whose first click sorts high-to-low
+
+
+def _filter_text(n):
+    return f"{n.num} {n.long_name} {n.short_name} {n.mac}".lower()
+
 
 def create_nodes_tab(page: ft.Page):
+    sort = {"column": DEFAULT_SORT, "descending": True}
+
+    def on_sort(e: ft.DataColumnSortEvent):
+        descending = (not e.ascending) if e.column_index == sort["column"] else e.column_index in DESCENDING_FIRST
+        set_sort(e.column_index, descending)
+
     nodes_table = ft.DataTable(
-        columns=[
-            ft.DataColumn(ft.Text("Node #")),
-            ft.DataColumn(ft.Text("Long Name")),
-            ft.DataColumn(ft.Text("Short Name")),
-            ft.DataColumn(ft.Text("MAC"))
-        ],
+        columns=[ft.DataColumn(ft.Text(heading), numeric=numeric, on_sort=on_sort)
+                 for heading, _key, _text, numeric in COLUMNS],
         rows=[],
+        sort_column_index=sort["column"],
+        sort_ascending=not sort["descending"],
         border_radius=5,
         column_spacing=30,
         heading_row_color=ft.Colors.BLUE_GREY_900,
@@ -19,42 +64,172 @@ def create_nodes_tab(page: ft.Page):
         data_row_color=ft.Colors.BLUE_GREY_800
     )
 
-    def refresh_nodes(e=None):
-        try:
-            nodes = list_nodes()
-            nodes_table.rows.clear()
+    store = NodeStore.get_instance()
+    cursor = store.open_cursor()
+    records = {}  # node num -> latest node record
+    # Sort keys of every column are kept up to date as nodes change, so re-sorting is a list read
+    sort_index = SortedIndex({str(i): column[1] for i, column in enumerate(COLUMNS)})
+    filter_state = {"text": "", "haystack": {}, "matches": set()}  # node num -> lowercase text to filter on
+    pager = Pager(page_size=PAGE_SIZE)
+    row_cache = LruCache(capacity=ROW_CACHE_SIZE)  # node num -> ft.DataRow, only for recently shown rows
+    patch_lock = threading.Lock()
+
+    page_label = ft.Text("", size=12, color=ft.Colors.GREY_400)
+    first_button = ft.IconButton(ft.Icons.FIRST_PAGE, tooltip="First page")
+    prev_button = ft.IconButton(ft.Icons.CHEVRON_LEFT, tooltip="Previous page")
+    next_button = ft.IconButton(ft.Icons.CHEVRON_RIGHT, tooltip="Next page")
+    last_button = ft.IconButton(ft.Icons.LAST_PAGE, tooltip="Last page")
+    filter_input = ft.TextField(label="Filter", hint_text="name, node id or MAC", width=300, dense=True,
+                                prefix_icon=ft.Icons.FILTER_LIST, on_change=lambda e: set_filter(e.control.value))
+
+    def build_row(n):
+        return ft.DataRow(cells=[ft.DataCell(ft.Text(text(n))) for _heading, _key, text, _numeric in COLUMNS])
+
+    def patch_row(row, n):
+        for cell, (_heading, _key, text, _numeric) in zip(row.cells, COLUMNS):
+            cell.content.value = text(n)
+
+    def matches(num):
+        return not filter_state["text"] or num in filter_state["matches"]
+
+    def reorder():
+        """Lay the pager out in the current sort order, keeping only filter matches."""
+        ordered = sort_index.ordered(str(sort["column"]), sort["descending"])
+        pager.set_keys(ordered if not filter_state["text"] else [k for k in ordered if k in filter_state["matches"]])
+
+    def render_window():
+        """Materialize only the rows of the current page, reusing cached rows."""
+        rows = []
+        for num in pager.window():
+            row = row_cache.get(num)
+            if row is None:
+                row = build_row(records[num])
+                row_cache.put(num, row)
+            rows.append(row)
+        nodes_table.rows = rows
+        nodes_table.sort_column_index = sort["column"]
+        nodes_table.sort_ascending = not sort["descending"]
+        shown = f"{len(pager)} of {len(records)} nodes" if filter_state["text"] else f"{len(pager)} nodes"
+        if store.warm:
+            shown += ", last known"
+        page_label.value = f"Page {pager.page + 1} of {pager.page_count} ({shown})"
+        first_button.disabled = prev_button.disabled = pager.page == 0
+        next_button.disabled = last_button.disabled = pager.page >= pager.page_count - 1
+
+    def apply_node_changes(drain=get_node_changes):
+        """Fold nodes changed since the last call into the table; returns True if the visible page changed."""
+        with patch_lock:
+            reset, nodes = drain(cursor)
+            if reset:
+                records.clear()
+                row_cache.clear()
+                sort_index.clear()
+                filter_state["haystack"].clear()
+                filter_state["matches"].clear()
+            before = pager.window()
+            resort = reset
+            patched = False
+            sort_column = str(sort["column"])
             for n in nodes:
-                nodes_table.rows.append(
-                    ft.DataRow(
-                        cells=[
-                            ft.DataCell(ft.Text(str(n["num"]))),
-                            ft.DataCell(ft.Text(n["long_name"])),
-                            ft.DataCell(ft.Text(n["short_name"])),
-                            ft.DataCell(ft.Text(n["mac"]))
-                        ]
-                    )
-                )
-            show_snackbar(page, f"Loaded {len(nodes)} nodes", success=True)
+                num = n.num
+                is_new = num not in records
+                records[num] = n
+                haystack = _filter_text(n)
+                if filter_state["haystack"].get(num) != haystack:
+                    filter_state["haystack"][num] = haystack
+                    was_match = num in filter_state["matches"]
+                    if filter_state["text"] and filter_state["text"] in haystack:
+                        filter_state["matches"].add(num)
+                    else:
+                        filter_state["matches"].discard(num)
+                    resort = resort or was_match != (num in filter_state["matches"])
+                moved = sort_index.update(num, n)
+                resort = resort or sort_column in moved or (is_new and matches(num))
+                row = row_cache.peek(num)
+                if row is not None:
+                    patch_row(row, n)
+                    patched = patched or num in before
+            if resort:
+                reorder()
+            visible_changed = reset or patched or pager.window() != before
+            if visible_changed:
+                render_window()
+            return visible_changed
+
+    def on_nodes_changed():
+        # Drain the store directly so a disconnect (reset with no nodes) clears the table quietly
+        try:
+            if apply_node_changes(store.drain):
+                page.update()
         except Exception as ex:
-            show_snackbar(page, f"Error: {ex}", success=False)
+            print(f"Node table patch error: {ex}")
+
+    store.add_listener(on_nodes_changed)
+
+    def set_sort(column, descending):
+        with patch_lock:
+            sort.update(column=column, descending=descending)
+            reorder()
+            pager.first()
+            render_window()
+        page.update()
+
+    def set_filter(text):
+        with patch_lock:
+            text = (text or "").strip().lower()
+            filter_state["text"] = text
+            filter_state["matches"] = {num for num, haystack in filter_state["haystack"].items()
+                                       if text and text in haystack}
+            reorder()
+            pager.first()
+            render_window()
+        page.update()
+
+    def change_page(move):
+        with patch_lock:
+            move()
+            render_window()
         page.update()
 
-    refresh_nodes()
+    first_button.on_click = lambda _e: change_page(pager.first)
+    prev_button.on_click = lambda _e: change_page(pager.prev)
+    next_button.on_click = lambda _e: change_page(pager.next)
+    last_button.on_click = lambda _e: change_page(pager.last)
+
+    def refresh_nodes(e=None, nodes=None, update=True):
+        """Apply pending node changes; the table reads NodeStore, so a shared node list is not needed."""
+        try:
+            apply_node_changes()
+            if update:
+                show_snackbar(page, f"Loaded {len(records)} nodes", success=True)
+        except Exception as ex:
+            if update:
+                show_snackbar(page, f"Error: {ex}", success=False)
+        if update:
+            page.update()
+
+    render_window()
+    # Load nodes now only if a radio is up or cached nodes were preloaded; otherwise the connect refresh loads them
+    if MeshtasticHandler.get_instance().is_connected() or store.warm:
+        refresh_nodes(update=False)
 
     tab_content = ft.Container(
         content=ft.Column([
             ft.Row([
                 ft.Text("Connected Nodes", size=24, weight="bold"),
-                ft.ElevatedButton("Refresh Nodes", on_click=refresh_nodes)
+                ft.ElevatedButton("Refresh Nodes", on_click=refresh_nodes),
+                filter_input
             ]),
             ft.Container(
                 content=ft.Column([nodes_table], scroll="auto"),
                 expand=True,
                 padding=10
-            )
+            ),
+            ft.Row([first_button, prev_button, page_label, next_button, last_button],
+                   alignment="center", spacing=5)
         ], spacing=10),
         expand=True
     )
-    
+
     # Return both the content and the refresh function
-    return tab_content, refresh_nodes
\ No newline at end of file
+    return tab_content, refresh_nodes
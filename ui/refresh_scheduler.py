@@ -0,0 +1,69 @@
+# ui/refresh_scheduler.py
+import threading
+import time
+from scripts.nodes import list_nodes
+from utils.metrics import MetricsRegistry
+
+
+class RefreshScheduler:
+    """Coalesces tab refresh requests into one background pass and a single page.update().
+
+    Requests arriving within `window` seconds share one pass. The node list is fetched once
+    per pass and handed to every registered refresh function as refresh(nodes=..., update=False);
+    refresh functions must then only mutate controls, never call page.update() themselves.
+    """
+
+    def __init__(self, page, window=0.25):
+        self.page = page
+        self.window = window
+        self._refreshers = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._running = False
+        self._rerun = False
+        self._requested_at = None
+        self._metrics = MetricsRegistry.get_instance()
+
+    def register(self, refresh):
+        if callable(refresh) and refresh not in self._refreshers:
+            self._refreshers.append(refresh)
+
+    def request(self):
+        """Schedule a refresh of every registered tab; cheap to call repeatedly."""
+        with self._lock:
+            if self._running:
+                self._rerun = True
+                return
+            if self._timer is None:
+                self._requested_at = time.perf_counter()
+                self._timer = threading.Timer(self.window, self._run)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+            self._running = True
+            requested_at = self._requested_at
+        try:
+            try:
+                nodes = list_nodes()
+            except Exception:
+                nodes = []  # not connected: tabs show their empty state
+            for refresh in list(self._refreshers):
+                try:
+                    with self._metrics.timed("ui_tab_refresh_seconds", "Time spent in one tab's refresh function",
+                                             tab=refresh.__name__):
+                        refresh(nodes=nodes, update=False)
+                except Exception as e:
+                    print(f"Tab refresh error: {e}")
+            self.page.update()
+            # Request to paint, including the coalescing window
+            self._metrics.histogram("ui_refresh_latency_seconds", "Time from a refresh request to its page.update()"
+                                    ).observe(time.perf_counter() - requested_at)
+        finally:
+            with self._lock:
+                self._running = False
+                rerun, self._rerun = self._rerun, False
+            if rerun:
+                self.request()
@@ -27,7 +27,7 @@ def create_settings_tab(page: ft.Page):
         expand=True
     )
     
-    def refresh_settings():
+    def refresh_settings(nodes=None, update=True):
         """Settings tab doesn't need refresh, but we provide a no-op function"""
         pass
     
@@ -0,0 +1,200 @@
+# utils/async_mesh.py
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pubsub import pub
+from utils.connection_supervisor import READY
+from utils.meshtastic_helpers import MeshtasticHandler, DEFAULT_CONNECTION
+from utils.metrics import MetricsRegistry
+from utils.send_queue import BROADCAST_ADDR
+
+BLOCKING_WORKERS = 4  # threads for calls that really block (port scans, opening and closing radios)
+STREAM_SIZE = 1000
+
+
+class PacketStream:
+    """Bounded async iterator over packets published on a pubsub topic (see AsyncMesh.packets()).
+
+    Packets arrive on the radio's reader thread and go into a ring buffer; the event loop is woken
+    at most once per burst rather than once per packet. When the consumer falls behind, the oldest
+    buffered packets are dropped (counted in `dropped`), so a slow consumer never stalls the radio.
+    """
+
+    def __init__(self, loop, topic, maxsize=STREAM_SIZE, connection_id=None):
+        self.topic = topic
+        self.connection_id = connection_id
+        self.dropped = 0
+        self._loop = loop
+        self._buffer = deque(maxlen=maxsize)
+        self._buffer_lock = threading.Lock()
+        self._ready = asyncio.Event()
+        self._wakeup_pending = False
+        self._closed = False
+        self._handler = MeshtasticHandler.get_instance()
+        self._dropped_total = MetricsRegistry.get_instance().counter(
+            "meshtastic_async_stream_dropped_total", "Packets dropped because an async consumer fell behind",
+            topic=topic)
+        pub.subscribe(self._on_packet, topic)
+
+    def _on_packet(self, packet, interface):
+        if self.connection_id is not None:
+            try:
+                if interface is not self._handler.get_interface(self.connection_id):
+                    return
+            except Exception:
+                return
+        with self._buffer_lock:
+            if self._closed:
+                return
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+                self._dropped_total.inc()
+            self._buffer.append(packet)
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            self.close()  # the loop is gone
+
+    def _wake(self):
+        self._wakeup_pending = False
+        self._ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            with self._buffer_lock:
+                if self._buffer:
+                    return self._buffer.popleft()
+                if self._closed:
+                    raise StopAsyncIteration
+                self._ready.clear()
+            await self._ready.wait()
+
+    def close(self):
+        """Stop receiving; packets already buffered are still returned before the iterator ends."""
+        with self._buffer_lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            pub.unsubscribe(self._on_packet, self.topic)
+        except Exception:
+            pass
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.close()
+
+
+class AsyncMesh:
+    """Singleton asyncio facade over MeshtasticHandler for Flet's async handlers and scripts.
+
+    Sends and ACK waits are awaitables over the SendQueue's futures, so any number of in-flight
+    messages cost no threads; only calls that really block (port scans, opening and closing
+    radios) run on a small shared executor.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._handler = MeshtasticHandler.get_instance()
+                    cls._instance._executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS,
+                                                                 thread_name_prefix="async-mesh")
+        return cls._instance
+
+    async def _blocking(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # --- Connections ---
+    async def scan_serial_ports(self):
+        return await self._blocking(self._handler.scan_serial_ports)
+
+    async def find_serial_radios(self):
+        return await self._blocking(self._handler.find_serial_radios)
+
+    async def find_network_radios(self, subnet=None):
+        return await self._blocking(self._handler.find_network_radios, subnet)
+
+    async def connect(self, port=None, hostname=None, portnum=None, connection_id=DEFAULT_CONNECTION, timeout=None):
+        """Start a supervised connection and wait until it is READY (raises TimeoutError after `timeout`)."""
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def on_state(cid, state):
+            if cid == connection_id and state == READY:
+                loop.call_soon_threadsafe(lambda: ready.done() or ready.set_result(None))
+
+        self._handler.register_state_listener(on_state)
+        try:
+            supervisor = self._handler.connect_in_background(port, hostname, portnum, connection_id)
+            if self._handler.get_state(connection_id) != READY:
+                try:
+                    await asyncio.wait_for(ready, timeout)
+                except asyncio.TimeoutError:
+                    raise Exception(f"Could not connect within {timeout}s: {supervisor.last_error or 'no response'}")
+        finally:
+            self._handler.remove_state_listener(on_state)
+        return self._handler.get_interface(connection_id)
+
+    async def disconnect(self, connection_id=None):
+        await self._blocking(self._handler.disconnect, connection_id)
+
+    def is_connected(self, connection_id=None):
+        return self._handler.is_connected(connection_id)
+
+    # --- Node queries (served from NodeStore, so they don't block) ---
+    async def nodes(self, connection_id=None):
+        from scripts.nodes import list_nodes
+        return list_nodes(connection_id)
+
+    async def node_info(self, connection_id=None):
+        from scripts.my_node_info import get_node_info
+        return get_node_info(connection_id)
+
+    # --- Sending ---
+    async def send_text(self, text, destination=BROADCAST_ADDR, channel_index=0, connection_id=None,
+                        wait=True, timeout=None):
+        """Queue a text message; with wait, return once it is sent (broadcast) or ACKed (direct).
+
+        Returns the OutboundMessage; a failed delivery raises its error when waited for.
+        """
+        from scripts.channels import queue_broadcast
+        from scripts.direct_msg import queue_message
+        if destination in (None, BROADCAST_ADDR):
+            outbound = queue_broadcast(text, channel_index, connection_id)
+        else:
+            outbound = queue_message(text, destination, connection_id=connection_id)
+        if wait:
+            await asyncio.wait_for(asyncio.wrap_future(outbound.future), timeout)
+        return outbound
+
+    # --- Receiving ---
+    def packets(self, topic="meshtastic.receive", maxsize=STREAM_SIZE, connection_id=None):
+        """Async iterator of received packet dicts on a topic (e.g. "meshtastic.receive.text").
+
+        Use as `async with mesh.packets() as stream: async for packet in stream: ...`, or call
+        close() when done; must be created on the event loop that consumes it.
+        """
+        return PacketStream(asyncio.get_running_loop(), topic, maxsize, connection_id)
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
@@ -0,0 +1,184 @@
+# utils/capture.py
+
+import functools
+import mmap
+import os
+import struct
+import threading
+import time
+
+# File layout: MAGIC, then records of RECORD header (payload length, unix time) + raw FromRadio bytes
+MAGIC = b"MTCAP\x00\x00\x01"
+RECORD = struct.Struct("<Id")
+CAPTURE_SUFFIX = ".mtcap"
+
+
+class CaptureRecorder:
+    """Appends every FromRadio protobuf an interface receives to a capture file.
+
+    attach() wraps the interface's _handleFromRadio, so recording happens on the radio's
+    reader thread before meshtastic decodes the packet; a record is one struct.pack and a
+    buffered write.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._write_lock = threading.Lock()
+        self._interface = None
+        self._original = None
+
+    def write(self, data, ts=None):
+        with self._write_lock:
+            if self._file.closed:
+                return
+            self._file.write(RECORD.pack(len(data), ts or time.time()))
+            self._file.write(data)
+            self.count += 1
+
+    def attach(self, interface, snapshot=True):
+        """Start recording `interface`; with snapshot, first write its current NodeDB so replays start populated."""
+        self.detach()
+        if snapshot:
+            try:
+                for data in snapshot_records(interface):
+                    self.write(data)
+            except Exception as e:
+                print(f"Capture snapshot error: {e}")
+        original = interface._handleFromRadio
+
+        def handle_from_radio(from_radio_bytes):
+            try:
+                self.write(bytes(from_radio_bytes))
+            except Exception as e:
+                print(f"Capture write error: {e}")
+            return original(from_radio_bytes)
+
+        interface._handleFromRadio = handle_from_radio
+        self._interface, self._original = interface, original
+
+    def detach(self):
+        if self._interface is not None:
+            try:
+                del self._interface._handleFromRadio  # drop the instance attribute, back to the class method
+            except AttributeError:
+                pass
+            self._interface = self._original = None
+        with self._write_lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        self.detach()
+        with self._write_lock:
+            self._file.close()
+
+
+def _mesh_pb2():
+    try:
+        from meshtastic.protobuf import mesh_pb2
+    except ImportError:
+        from meshtastic import mesh_pb2  # meshtastic < 2.5
+    return mesh_pb2
+
+
+def snapshot_records(interface):
+    """FromRadio bytes recreating an interface's my_info and NodeDB (best effort; unknown fields are skipped)."""
+    from google.protobuf.json_format import ParseDict
+    mesh_pb2 = _mesh_pb2()
+    records = []
+    my_info = getattr(interface, "myInfo", None)
+    if my_info is not None:
+        records.append(mesh_pb2.FromRadio(my_info=my_info).SerializeToString())
+    for node in list((getattr(interface, "nodes", None) or {}).values()):
+        try:
+            node_info = ParseDict(node, mesh_pb2.NodeInfo(), ignore_unknown_fields=True)
+            records.append(mesh_pb2.FromRadio(node_info=node_info).SerializeToString())
+        except Exception as e:
+            print(f"Capture snapshot skipped a node: {e}")
+    return records
+
+
+def read_capture(path):
+    """Yield (timestamp, FromRadio bytes) from a capture file, memory-mapped; stops at a truncated tail."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise Exception(f"{path} is not a capture file")
+            offset, end = len(MAGIC), len(data)
+            while offset + RECORD.size <= end:
+                length, ts = RECORD.unpack_from(data, offset)
+                offset += RECORD.size
+                if offset + length > end:
+                    return  # recorder was killed mid-write
+                yield ts, data[offset:offset + length]
+                offset += length
+
+
+@functools.lru_cache(maxsize=None)
+def _replay_class():
+    from meshtastic.mesh_interface import MeshInterface
+
+    class ReplayInterface(MeshInterface):
+        """A MeshInterface fed from a capture file instead of a radio; sends are dropped (noProto)."""
+
+        def __init__(self, path, speed=1.0):
+            self.capture_path = str(path)
+            self.speed = speed  # 1.0 = recorded pace, 10.0 = ten times faster, 0 = as fast as possible
+            self.port = self.devPath = f"replay:{os.path.basename(self.capture_path)}"
+            self.replayed = 0
+            self.finished = threading.Event()
+            self._stop = threading.Event()
+            super().__init__(noProto=True)
+            # With noProto, _startConfig() never runs, and captures start after the config download,
+            # so the NodeDB maps are never created; the replayed node_info records fill them in
+            self.nodes = {}
+            self.nodesByNum = {}
+            self.isConnected.set()
+
+        def start(self):
+            threading.Thread(target=self._replay, name="capture-replay", daemon=True).start()
+            return self
+
+        def _replay(self):
+            started, first = time.monotonic(), None
+            try:
+                for ts, data in read_capture(self.capture_path):
+                    if self._stop.is_set():
+                        return
+                    if self.speed:
+                        first = ts if first is None else first
+                        delay = started + (ts - first) / self.speed - time.monotonic()
+                        if delay > 0 and self._stop.wait(delay):
+                            return
+                    try:
+                        self._handleFromRadio(data)
+                    except Exception as e:
+                        print(f"Replay decode error: {e}")
+                    else:
+                        self.replayed += 1
+            except Exception as e:
+                print(f"Replay error: {e}")
+            finally:
+                self.finished.set()
+
+        def close(self):
+            self._stop.set()
+            self.isConnected.clear()
+            try:
+                super().close()
+            except Exception:
+                pass
+
+    return ReplayInterface
+
+
+def open_replay(path, speed=1.0):
+    """Create (but don't start) a replay interface for a capture file; requires meshtastic."""
+    if not os.path.exists(path):
+        raise Exception(f"Capture not found: {path}")
+    return _replay_class()(path, speed)
@@ -0,0 +1,156 @@
+# utils/connection_supervisor.py
+
+import random
+import threading
+import time
+from pubsub import pub
+
+# Connection states, in the order a healthy connection goes through them
+CONNECTING = "connecting"  # opening the serial port / TCP socket
+SYNCING = "syncing"        # radio is streaming its config and NodeDB
+READY = "ready"
+DEGRADED = "degraded"      # link is up but nothing heard for IDLE_TIMEOUT
+LOST = "lost"              # link dropped or connect failed; a retry is scheduled
+DISCONNECTED = "disconnected"
+
+
+class ConnectionSupervisor:
+    """Keeps one pooled connection alive in a background thread.
+
+    Connects without blocking the caller, probes the link (time since last packet, heartbeat writes)
+    and reconnects with jittered exponential backoff after a drop. State changes are reported as
+    on_state(connection_id, state).
+    """
+
+    PROBE_INTERVAL = 5.0
+    IDLE_TIMEOUT = 120.0
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
+    def __init__(self, handler, connection_id, target, on_state=None):
+        self.connection_id = connection_id
+        self.state = DISCONNECTED
+        self.last_error = None
+        self.retry_at = None
+        self._handler = handler
+        self._target = target  # connect() kwargs: port / hostname / portnum
+        self._on_state = on_state
+        self._interface = None
+        self._last_rx = 0.0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"supervisor-{connection_id}", daemon=True)
+
+    # --- Lifecycle ---
+    def start(self):
+        pub.subscribe(self._on_receive, "meshtastic.receive")
+        pub.subscribe(self._on_node_updated, "meshtastic.node.updated")
+        pub.subscribe(self._on_connection_lost, "meshtastic.connection.lost")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for listener, topic in ((self._on_receive, "meshtastic.receive"),
+                                (self._on_node_updated, "meshtastic.node.updated"),
+                                (self._on_connection_lost, "meshtastic.connection.lost")):
+            try:
+                pub.unsubscribe(listener, topic)
+            except Exception:
+                pass
+        self._set_state(DISCONNECTED)
+
+    def is_running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def _set_state(self, state):
+        if state == self.state or (self._stop.is_set() and state != DISCONNECTED):
+            return
+        self.state = state
+        if self._on_state:
+            try:
+                self._on_state(self.connection_id, state)
+            except Exception as e:
+                print(f"State listener error: {e}")
+
+    # --- Supervisor loop ---
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            self._set_state(CONNECTING)
+            self._wake.clear()
+            try:
+                self._interface = self._handler.connect(connection_id=self.connection_id, **self._target)
+            except Exception as e:
+                attempt += 1
+                self._schedule_retry(attempt, e)
+                continue
+            if self._stop.is_set():
+                self._handler.disconnect(self.connection_id, stop_supervisor=False)
+                break
+            attempt = 0
+            self.last_error = None
+            self.retry_at = None
+            self._last_rx = time.monotonic()
+            self._set_state(READY)
+            self._watch()
+            if self._stop.is_set():
+                break
+            self._handler.disconnect(self.connection_id, stop_supervisor=False)
+            self._interface = None
+            attempt = 1
+            self._schedule_retry(attempt, self.last_error or "Connection lost")
+
+    def _schedule_retry(self, attempt, error):
+        delay = self.backoff(attempt)
+        self.last_error = str(error)
+        self.retry_at = time.time() + delay
+        self._set_state(LOST)
+        self._stop.wait(delay)
+
+    @classmethod
+    def backoff(cls, attempt):
+        """Exponential delay for the given attempt (1-based) with 50-100% jitter to avoid retry storms."""
+        return min(cls.BACKOFF_MAX, cls.BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    def _watch(self):
+        """Return when the link is considered lost (or the supervisor is stopped)."""
+        while not self._stop.is_set():
+            self._wake.wait(self.PROBE_INTERVAL)
+            if self._stop.is_set() or self._wake.is_set():
+                return
+            connected = getattr(self._interface, "isConnected", None)
+            if connected is not None and not connected.is_set():
+                self.last_error = "Reader stopped"
+                return
+            if time.monotonic() - self._last_rx < self.IDLE_TIMEOUT:
+                self._set_state(READY)
+                continue
+            try:
+                self._interface.sendHeartbeat()  # a write on a dead link raises
+            except Exception as e:
+                self.last_error = f"Heartbeat failed: {e}"
+                return
+            self._set_state(DEGRADED)
+
+    # --- Pubsub handlers ---
+    def _is_target(self, interface):
+        port, hostname = self._target.get("port"), self._target.get("hostname")
+        return bool(
+            (port and getattr(interface, "devPath", None) == port)
+            or (hostname and getattr(interface, "hostname", None) == hostname)
+        )
+
+    def _on_receive(self, packet, interface):
+        if interface is self._interface:
+            self._last_rx = time.monotonic()
+
+    def _on_node_updated(self, node, interface):
+        # The NodeDB streams in while connect() is still waiting for the config download
+        if self.state == CONNECTING and self._interface is None and self._is_target(interface):
+            self._set_state(SYNCING)
+
+    def _on_connection_lost(self, interface):
+        if interface is self._interface:
+            self.last_error = "Connection lost"
+            self._wake.set()
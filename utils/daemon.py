@@ -0,0 +1,158 @@
+# utils/daemon.py
+
+import os
+import queue
+import secrets
+import threading
+from multiprocessing.connection import Client, Listener
+from utils.paths import get_data_dir
+
+DEFAULT_ADDRESS = ("127.0.0.1", 4410)
+KEY_FILE = "daemon.key"
+
+
+def _authkey(create=False):
+    """Shared secret for local clients, kept in the data dir (readable by the owner only)."""
+    path = get_data_dir() / KEY_FILE
+    if not path.exists():
+        if not create:
+            raise Exception("No daemon key found. Start the daemon first.")
+        try:
+            # Created with owner-only permissions, so the key is never readable under the umask
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # another daemon created it first
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(32))
+    return path.read_bytes()
+
+
+class DaemonServer:
+    """Serves scripts/* over a local multiprocessing connection, reusing one persistent radio connection.
+
+    Requests are dicts {"cmd": name, **args}; replies are {"ok": True, "result": ...} or
+    {"ok": False, "error": message}. "tail" switches the client connection to a stream of
+    received messages.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.address = address
+        self._listener = Listener(address, authkey=_authkey(create=True))
+
+    def serve_forever(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                print(f"Daemon accept error: {e}")
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self._listener.close()
+
+    def _serve_client(self, conn):
+        with conn:
+            try:
+                request = conn.recv()
+                if request.get("cmd") == "tail":
+                    self._stream_messages(conn)
+                    return
+                conn.send({"ok": True, "result": self._dispatch(request)})
+            except EOFError:
+                pass
+            except Exception as e:
+                try:
+                    conn.send({"ok": False, "error": str(e)})
+                except Exception:
+                    pass
+
+    def _dispatch(self, request):
+        # Imported here so the client side of this module never pulls in the radio stack
+        from scripts.nodes import list_nodes
+        from scripts.my_node_info import get_node_info
+        from scripts.direct_msg import queue_message, get_message_history
+        from scripts.channels import send_to_channel, get_channel_history
+        from scripts.group_msg import send_to_group, get_batch, list_batches
+        from utils.meshtastic_helpers import MeshtasticHandler
+
+        cmd = request.get("cmd")
+        connection_id = request.get("connection")
+        if cmd == "status":
+            handler = MeshtasticHandler.get_instance()
+            return {cid: {"state": handler.get_state(cid), "port": handler.get_connected_port(cid)}
+                    for cid in handler.list_connections() or [handler.get_active_id()]}
+        if cmd == "nodes":
+            return [n.as_dict() for n in list_nodes(connection_id)]
+        if cmd == "info":
+            return get_node_info(connection_id)
+        if cmd == "send":
+            if request.get("group"):
+                return {"batch": send_to_group(request["text"], request["group"], connection_id=connection_id)}
+            if request.get("destination") is None:
+                return send_to_channel(request["text"], request.get("channel") or 0, connection_id=connection_id)
+            outbound = queue_message(request["text"], request["destination"], connection_id=connection_id)
+            if request.get("wait"):
+                outbound.future.result(timeout=request.get("timeout", 120))
+            return {"id": outbound.id, "status": outbound.status}
+        if cmd == "channels":
+            from scripts.channels import list_channels, get_unread_counts
+            unread = get_unread_counts()
+            return [dict(c, unread=unread.get(c["index"], 0)) for c in list_channels(connection_id)]
+        if cmd == "batch":
+            if request.get("id") is None:
+                return list_batches()
+            return get_batch(request["id"])
+        if cmd == "metrics":
+            from utils.metrics import MetricsRegistry
+            metrics = MetricsRegistry.get_instance()
+            return metrics.to_json() if request.get("format") == "json" else metrics.to_prometheus()
+        if cmd == "history":
+            if request.get("destination") is not None:
+                return get_message_history(request["destination"])
+            return get_channel_history(request.get("channel", 0))
+        raise Exception(f"Unknown command: {cmd}")
+
+    def _stream_messages(self, conn):
+        from utils.receive_pipeline import ReceivePipeline
+
+        pending = queue.Queue(maxsize=1000)
+
+        def sink(batch):
+            for message in batch:
+                try:
+                    pending.put_nowait(message)
+                except queue.Full:
+                    pass  # slow client: drop rather than stall the pipeline
+
+        pipeline = ReceivePipeline.get_instance()
+        pipeline.add_sink(sink)
+        try:
+            while True:
+                conn.send(pending.get())
+        except Exception:
+            pass
+        finally:
+            pipeline.remove_sink(sink)
+
+
+def call(request, address=DEFAULT_ADDRESS):
+    """Send one request to a running daemon and return its result (raises on daemon-side errors)."""
+    with Client(address, authkey=_authkey()) as conn:
+        conn.send(request)
+        reply = conn.recv()
+    if not reply.get("ok"):
+        raise Exception(reply.get("error"))
+    return reply["result"]
+
+
+def tail(address=DEFAULT_ADDRESS):
+    """Yield received messages from a running daemon until the connection closes."""
+    with Client(address, authkey=_authkey()) as conn:
+        conn.send({"cmd": "tail"})
+        while True:
+            try:
+                yield conn.recv()
+            except EOFError:
+                return
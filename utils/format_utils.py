@@ -1,6 +1,8 @@
 # utils/format_utils.py
 import flet as ft
 import re
+from datetime import datetime
+from utils.keyed_render import KeyedControls
 
 def format_key(key):
     """Convert snake_case or camelCase to Title Case"""
@@ -18,64 +20,107 @@ def format_value(value):
         return str(value)
     return str(value) if value else "N/A"
 
+def _info_items(data):
+    """(key, formatted value) pairs of a section, skipping empty values; none if every value is falsy."""
+    if not isinstance(data, dict) or not any(data.values()):
+        return []
+    return [(k, format_value(v)) for k, v in data.items() if v is not None and v != ""]
+
+def _empty_section(title, icon):
+    return ft.Container(
+        content=ft.Text(f"{icon} {title}\nNo data available", color=ft.Colors.GREY_400),
+        padding=10,
+        bgcolor=ft.Colors.BLUE_GREY_900,
+        border_radius=5,
+        margin=ft.margin.only(bottom=10)
+    )
+
+def _info_row(key, value):
+    return ft.Row([
+        ft.Text(f"{format_key(key)}:", weight="bold", width=180, color=ft.Colors.BLUE_300),
+        ft.Text(value, color=ft.Colors.WHITE, expand=True, selectable=True)
+    ], spacing=10)
+
+def _patch_info_row(_key, row, value):
+    row.controls[1].value = value
+    return row
+
 def create_info_section(title, icon, data):
     """Create a formatted section card for node information"""
-    if not data or (isinstance(data, dict) and not any(data.values())):
-        return ft.Container(
-            content=ft.Text(f"{icon} {title}\nNo data available", color=ft.Colors.GREY_400),
-            padding=10,
-            bgcolor=ft.Colors.BLUE_GREY_900,
-            border_radius=5,
-            margin=ft.margin.only(bottom=10)
-        )
-    
-    items = []
-    for k, v in data.items():
-        if v is not None and v != "":
-            formatted_key = format_key(k)
-            formatted_val = format_value(v)
-            items.append(
-                ft.Row([
-                    ft.Text(f"{formatted_key}:", weight="bold", width=180, color=ft.Colors.BLUE_300),
-                    ft.Text(formatted_val, color=ft.Colors.WHITE, expand=True, selectable=True)
-                ], spacing=10)
-            )
-    
+    items = _info_items(data)
     if not items:
-        return ft.Container(
-            content=ft.Text(f"{icon} {title}\nNo data available", color=ft.Colors.GREY_400),
-            padding=10,
-            bgcolor=ft.Colors.BLUE_GREY_900,
-            border_radius=5,
-            margin=ft.margin.only(bottom=10)
-        )
-    
-    return ft.Card(
-        content=ft.Container(
-            content=ft.Column([
-                ft.Text(f"{icon} {title}", size=18, weight="bold", color=ft.Colors.BLUE_200),
-                ft.Divider(height=1, color=ft.Colors.BLUE_GREY_700),
-                *items
-            ], spacing=8),
-            padding=15
-        ),
+        return _empty_section(title, icon)
+
+    title_text = ft.Text(f"{icon} {title}", size=18, weight="bold", color=ft.Colors.BLUE_200)
+    column = ft.Column([title_text, ft.Divider(height=1, color=ft.Colors.BLUE_GREY_700)], spacing=8)
+    rows = KeyedControls(column, _info_row, _patch_info_row, start=2)
+    rows.render(items)
+    card = ft.Card(
+        content=ft.Container(content=column, padding=15),
         elevation=2,
         margin=ft.margin.only(bottom=15)
     )
+    card.data = {"title": title_text, "rows": rows}
+    return card
+
+def update_info_section(section, title, icon, data):
+    """Bring a section from create_info_section up to date, changing only the values that differ.
+
+    Returns the section to show: the same control, or a new one when it switches between the
+    "No data available" placeholder and a card.
+    """
+    items = _info_items(data)
+    refs = section.data if isinstance(section.data, dict) else None
+    if not items:
+        return section if refs is None else _empty_section(title, icon)
+    if refs is None:
+        return create_info_section(title, icon, data)
+    label = f"{icon} {title}"
+    if refs["title"].value != label:
+        refs["title"].value = label
+    refs["rows"].render(items)
+    return section
 
 def create_contact_card(node_num, display_name, short_name, on_click):
-    """Create a contact card for the direct messages sub-tab"""
-    return ft.Card(
-        content=ft.Container(
-            content=ft.Row([
-                ft.Column([
-                    ft.Text(display_name, weight="bold", size=16),
-                    ft.Text(f"Short: {short_name} | Node #{node_num}", 
-                           size=12, color=ft.Colors.GREY_400)
-                ], expand=True, spacing=2)
-            ], alignment="spaceBetween"),
-            padding=15,
-            on_click=on_click
-        ),
-        elevation=1
-    )
\ No newline at end of file
+    """Create a contact card for the direct messages sub-tab (on_click finds (node_num, name) in e.control.data)"""
+    name_text = ft.Text(display_name, weight="bold", size=16)
+    detail_text = ft.Text(f"Short: {short_name} | Node #{node_num}", size=12, color=ft.Colors.GREY_400)
+    target = ft.Container(
+        content=ft.Row([
+            ft.Column([name_text, detail_text], expand=True, spacing=2)
+        ], alignment="spaceBetween"),
+        padding=15,
+        on_click=on_click,
+        data=(node_num, display_name)
+    )
+    card = ft.Card(content=target, elevation=1)
+    card.data = {"name": name_text, "detail": detail_text, "target": target}
+    return card
+
+def update_contact_card(card, node_num, display_name, short_name):
+    """Point a card from create_contact_card (possibly a pooled one) at a contact, setting only changed values"""
+    refs = card.data
+    detail = f"Short: {short_name} | Node #{node_num}"
+    if refs["name"].value != display_name:
+        refs["name"].value = display_name
+    if refs["detail"].value != detail:
+        refs["detail"].value = detail
+    refs["target"].data = (node_num, display_name)
+    return card
+
+def create_message_bubble(text, outgoing, timestamp=None, sender=None):
+    """Create a chat bubble for the direct messages chat view"""
+    time_label = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else ""
+    if sender:
+        time_label = f"{sender} · {time_label}"
+    return ft.Row([
+        ft.Container(
+            content=ft.Column([
+                ft.Text(text, color=ft.Colors.WHITE, selectable=True),
+                ft.Text(time_label, size=10, color=ft.Colors.GREY_400)
+            ], spacing=2),
+            padding=10,
+            bgcolor=ft.Colors.BLUE_700 if outgoing else ft.Colors.BLUE_GREY_800,
+            border_radius=8
+        )
+    ], alignment="end" if outgoing else "start")
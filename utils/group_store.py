@@ -0,0 +1,159 @@
+# utils/group_store.py
+
+import json
+import sqlite3
+import threading
+import time
+from utils.paths import get_data_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    name TEXT PRIMARY KEY,
+    members TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    group_name TEXT,
+    text TEXT NOT NULL,
+    connection_id TEXT,
+    created REAL NOT NULL,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS batch_recipients (
+    batch_id INTEGER NOT NULL,
+    node_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (batch_id, node_id)
+);
+CREATE INDEX IF NOT EXISTS idx_recipients_status ON batch_recipients(status, batch_id);
+"""
+
+# Recipient states: pending (not yet handed to the send queue in this process) -> queued -> acked | failed
+FINAL_STATES = ("acked", "failed", "cancelled")
+_RECIPIENT_COLUMNS = ("node_id", "status", "attempts", "error", "updated")
+
+
+class GroupStore:
+    """Singleton SQLite store of saved node groups and group-message batches with per-recipient status.
+
+    Batches survive restarts: recipients that never reached a final state are sent again on resume.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, path=None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._open(path or get_data_dir() / "groups.db")
+        return cls._instance
+
+    def _open(self, path):
+        self.path = path
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+
+    # --- Groups ---
+    def save_group(self, name, members):
+        with self._db_lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO groups (name, members, updated) VALUES (?, ?, ?)",
+                             (name, json.dumps(sorted(set(members))), time.time()))
+
+    def delete_group(self, name):
+        with self._db_lock, self._db:
+            self._db.execute("DELETE FROM groups WHERE name = ?", (name,))
+
+    def get_group(self, name):
+        with self._db_lock:
+            row = self._db.execute("SELECT members FROM groups WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_groups(self):
+        """{name: [node ids]} of every saved group."""
+        with self._db_lock:
+            rows = self._db.execute("SELECT name, members FROM groups ORDER BY name").fetchall()
+        return {name: json.loads(members) for name, members in rows}
+
+    # --- Batches ---
+    def create_batch(self, text, recipients, group_name=None, connection_id=None):
+        now = time.time()
+        with self._db_lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO batches (group_name, text, connection_id, created) VALUES (?, ?, ?, ?)",
+                (group_name, text, connection_id, now))
+            batch_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT OR IGNORE INTO batch_recipients (batch_id, node_id, status, updated) VALUES (?, ?, 'pending', ?)",
+                [(batch_id, node_id, now) for node_id in recipients])
+        return batch_id
+
+    def update_recipient(self, batch_id, node_id, status, attempts=None, error=None):
+        with self._db_lock, self._db:
+            self._db.execute(
+                "UPDATE batch_recipients SET status = ?, attempts = COALESCE(?, attempts), error = ?, updated = ? "
+                "WHERE batch_id = ? AND node_id = ?",
+                (status, attempts, error, time.time(), batch_id, node_id))
+
+    def cancel_batch(self, batch_id):
+        """Mark a batch cancelled; recipients not yet in a final state won't be sent on resume."""
+        with self._db_lock, self._db:
+            self._db.execute("UPDATE batches SET cancelled = 1 WHERE id = ?", (batch_id,))
+            self._db.execute(
+                "UPDATE batch_recipients SET status = 'cancelled', updated = ? "
+                "WHERE batch_id = ? AND status NOT IN ('acked', 'failed')", (time.time(), batch_id))
+
+    def get_batch(self, batch_id):
+        """Batch dict with a "recipients" list of {node_id, status, attempts, error, updated}."""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT id, group_name, text, connection_id, created, cancelled FROM batches WHERE id = ?",
+                (batch_id,)).fetchone()
+            if row is None:
+                return None
+            recipients = self._db.execute(
+                f"SELECT {', '.join(_RECIPIENT_COLUMNS)} FROM batch_recipients WHERE batch_id = ? ORDER BY node_id",
+                (batch_id,)).fetchall()
+        batch = dict(zip(("id", "group_name", "text", "connection_id", "created", "cancelled"), row))
+        batch["recipients"] = [dict(zip(_RECIPIENT_COLUMNS, r)) for r in recipients]
+        return batch
+
+    def list_batches(self, limit=20):
+        """Newest batches first, with per-status recipient counts."""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT id, group_name, text, created, cancelled FROM batches ORDER BY id DESC LIMIT ?",
+                (limit,)).fetchall()
+            counts = self._db.execute(
+                f"SELECT batch_id, status, COUNT(*) FROM batch_recipients WHERE batch_id IN "
+                f"({', '.join('?' * len(rows))}) GROUP BY batch_id, status", [r[0] for r in rows]).fetchall()
+        batches = [dict(zip(("id", "group_name", "text", "created", "cancelled"), r), counts={}) for r in rows]
+        by_id = {b["id"]: b for b in batches}
+        for batch_id, status, count in counts:
+            by_id[batch_id]["counts"][status] = count
+        return batches
+
+    def unfinished(self):
+        """[(batch id, text, connection id, [node ids])] of batches with recipients still to deliver."""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT b.id, b.text, b.connection_id, r.node_id FROM batches b "
+                "JOIN batch_recipients r ON r.batch_id = b.id "
+                "WHERE b.cancelled = 0 AND r.status NOT IN ('acked', 'failed', 'cancelled') "
+                "ORDER BY b.id, r.node_id").fetchall()
+        batches = {}
+        for batch_id, text, connection_id, node_id in rows:
+            batches.setdefault(batch_id, (batch_id, text, connection_id, []))[3].append(node_id)
+        return list(batches.values())
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
@@ -0,0 +1,88 @@
+# utils/keyed_render.py
+
+
+class ControlPool:
+    """Bounded free list of released controls of one kind, handed out again instead of building new ones."""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._free = []
+
+    def __len__(self):
+        return len(self._free)
+
+    def take(self):
+        return self._free.pop() if self._free else None
+
+    def give(self, control):
+        if len(self._free) < self.capacity:
+            self._free.append(control)
+
+
+class KeyedControls:
+    """Keeps `parent.controls[start:]` in sync with keyed items, reusing controls across renders.
+
+    render() takes (key, props) pairs in display order. A key seen before keeps its control, which
+    is only patched when its props changed; a new key gets a pooled control (patched) or a new one
+    from create(); controls of keys that went away go back to the pool. The controls list is only
+    reassigned when order or membership changed, so refreshing unchanged data sends Flet nothing.
+
+    create(key, props) returns a control; patch(key, control, props) mutates it and returns the
+    control to show (normally the same one, or a replacement if its shape has to change).
+    Props are kept and compared with ==, so pass values or copies, never an object that is
+    mutated in place between renders.
+    """
+
+    def __init__(self, parent, create, patch, pool=None, start=0):
+        self.parent = parent
+        self.create = create
+        self.patch = patch
+        self.pool = pool
+        self.start = start
+        self._shown = {}  # key -> (control, props) as last rendered
+        self.created = self.reused = self.patched = 0  # counters for benchmarks and diagnostics
+
+    def __len__(self):
+        return len(self._shown)
+
+    def get(self, key):
+        entry = self._shown.get(key)
+        return entry[0] if entry else None
+
+    def render(self, items):
+        """Show `items`; returns True if the controls list changed (added, removed or moved controls)."""
+        shown = {}
+        controls = []
+        for key, props in items:
+            if key in shown:
+                continue  # duplicate key: first one wins
+            entry = self._shown.pop(key, None)
+            if entry is None:
+                control = self.pool.take() if self.pool is not None else None
+                if control is None:
+                    control = self.create(key, props)
+                    self.created += 1
+                else:
+                    control = self.patch(key, control, props)
+                    self.reused += 1
+            else:
+                control, old_props = entry
+                if old_props != props:
+                    control = self.patch(key, control, props)
+                    self.patched += 1
+            shown[key] = (control, props)
+            controls.append(control)
+        if self.pool is not None:
+            for control, _props in self._shown.values():
+                self.pool.give(control)
+        self._shown = shown
+
+        current = self.parent.controls
+        if len(current) - self.start == len(controls) and all(
+                a is b for a, b in zip(current[self.start:], controls)):
+            return False
+        self.parent.controls = current[:self.start] + controls
+        return True
+
+    def clear(self):
+        self.render(())
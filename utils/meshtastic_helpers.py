@@ -1,20 +1,46 @@
 # utils/meshtastic_helpers.py
 
 import threading
-import serial.tools.list_ports
-import meshtastic.serial_interface
+from utils.metrics import MetricsRegistry
+from utils.node_store import NodeStore
+from utils.nodedb_cache import NodeDbCache
+from utils.receive_pipeline import ReceivePipeline
+from utils.telemetry_store import TelemetryStore
+from utils.capture import CaptureRecorder, open_replay
+from utils.connection_supervisor import ConnectionSupervisor, READY, DISCONNECTED
 
-# Try importing TCP interface
-try:
-    from meshtastic import tcp_interface
-    TCP_AVAILABLE = True
-except ImportError:
-    TCP_AVAILABLE = False
-    print("Warning: TCP interface not available. Network connections will not work.")
+# meshtastic and pyserial are imported on first use so that importing this module (e.g. for the
+# headless CLI client) stays cheap.
+DEFAULT_CONNECTION = "default"
+REPLAY_CONNECTION = "replay"
+
+
+def _tcp_interface():
+    """Return meshtastic.tcp_interface, or None if this meshtastic build lacks it."""
+    try:
+        from meshtastic import tcp_interface
+        return tcp_interface
+    except ImportError:
+        print("Warning: TCP interface not available. Network connections will not work.")
+        return None
+
+
+class MeshConnection:
+    """One radio in the handler's pool; the meshtastic interface runs its own reader thread."""
+
+    def __init__(self, connection_id, interface, connection_type, info):
+        self.id = connection_id
+        self.interface = interface
+        self.connection_type = connection_type
+        self.info = info
 
 
 class MeshtasticHandler:
-    """Singleton handler for Meshtastic serial and network connections with connection callbacks."""
+    """Singleton pool of named Meshtastic serial and network connections with connection callbacks.
+
+    Calls that take an optional `connection_id` act on the active connection when it is omitted;
+    the active connection is the one mirrored into NodeStore for the UI.
+    """
 
     _instance = None
     _lock = threading.Lock()
@@ -24,117 +50,296 @@ class MeshtasticHandler:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super().__new__(cls)
-                    cls._instance.interface = None
                     cls._instance._connection_lock = threading.Lock()
-                    cls._instance._connected_port = None
-                    cls._instance._connection_type = None
-                    cls._instance._connection_info = None
+                    cls._instance._connections = {}  # connection id -> MeshConnection
+                    cls._instance._active_id = None
                     cls._instance._callbacks = []  # <-- list of connection state change callbacks
+                    cls._instance._connection_callbacks = {}  # connection id -> callbacks for that radio only
+                    cls._instance._connecting = set()  # ids whose interface is being opened (lock not held)
+                    cls._instance._supervisors = {}  # connection id -> ConnectionSupervisor
+                    cls._instance._state_listeners = []
+                    cls._instance._recorders = {}  # connection id -> CaptureRecorder
         return cls._instance
 
     # --- Callback registration ---
-    def register_callback(self, callback):
-        """Register a function to be called on connect/disconnect events."""
-        if callable(callback) and callback not in self._callbacks:
-            self._callbacks.append(callback)
+    def register_callback(self, callback, connection_id=None):
+        """Register a function to be called on connect/disconnect events (of one connection, if given)."""
+        callbacks = self._callbacks if connection_id is None else self._connection_callbacks.setdefault(connection_id, [])
+        if callable(callback) and callback not in callbacks:
+            callbacks.append(callback)
 
-    def _run_callbacks(self):
+    def register_state_listener(self, callback):
+        """Register a function called as callback(connection_id, state) on supervised state changes."""
+        if callable(callback) and callback not in self._state_listeners:
+            self._state_listeners.append(callback)
+
+    def remove_state_listener(self, callback):
+        if callback in self._state_listeners:
+            self._state_listeners.remove(callback)
+
+    def _run_state_listeners(self, connection_id, state):
+        for cb in list(self._state_listeners):
+            try:
+                cb(connection_id, state)
+            except Exception as e:
+                print(f"State listener error: {e}")
+
+    def _run_callbacks(self, connection_id=None):
         """Call all registered callbacks in a thread-safe way."""
-        for cb in self._callbacks:
+        metrics = MetricsRegistry.get_instance()
+        for cb in self._callbacks + self._connection_callbacks.get(connection_id, []):
+            name = getattr(cb, "__qualname__", repr(cb))
             try:
-                cb()
+                with metrics.timed("meshtastic_callback_seconds", "Connection callback duration", callback=name):
+                    cb()
             except Exception as e:
+                metrics.counter("meshtastic_callback_errors_total", "Connection callbacks that raised",
+                                callback=name).inc()
                 print(f"Callback error: {e}")
 
     # --- Serial scanning ---
     def scan_serial_ports(self):
-        """Scan available serial ports."""
-        ports = serial.tools.list_ports.comports()
-        return [{"device": p.device, "description": p.description, "hwid": p.hwid} for p in ports]
+        """Scan available serial ports, likely radios first (each dict has a "verdict", see serial_discovery)."""
+        from utils.serial_discovery import SerialDiscovery
+        return SerialDiscovery.get_instance().ports()
+
+    def find_serial_radios(self):
+        """Probe the serial ports not already connected; returns device paths of Meshtastic radios, best first."""
+        from utils.serial_discovery import SerialDiscovery
+        return SerialDiscovery.get_instance().find_radios(exclude=self.connected_endpoints('serial'))
+
+    def find_network_radios(self, subnet=None):
+        """Sweep the local subnet (or `subnet`) for radios on the API port; returns NetworkDiscovery.hosts()."""
+        from utils.network_discovery import NetworkDiscovery
+        return NetworkDiscovery.get_instance().scan_subnet(subnet)
+
+    def connected_endpoints(self, connection_type):
+        """Port paths ('serial') or "host:port" strings ('network') of the open connections of a type."""
+        with self._connection_lock:
+            return {c.info for c in self._connections.values() if c.connection_type == connection_type}
 
     # --- Connect ---
-    def connect(self, port=None, hostname=None, portnum=None):
+    def connect(self, port=None, hostname=None, portnum=None, connection_id=DEFAULT_CONNECTION):
+        """Open a connection and wait for the radio's config download.
+
+        The pool lock is only held to reserve the connection id, so other connections and
+        status queries are never blocked behind a slow radio.
+        """
         with self._connection_lock:
-            if self.interface:
+            if connection_id in self._connections or connection_id in self._connecting:
                 raise Exception("Already connected. Disconnect first.")
+            self._connecting.add(connection_id)
+            in_use = {c.info for c in self._connections.values() if c.connection_type == 'serial'}
 
-            # --- Network connection ---
-            if hostname:
-                if not TCP_AVAILABLE:
-                    raise Exception("TCP interface not available.")
-                portnum = portnum or 4403
-                try:
-                    self.interface = tcp_interface.TCPInterface(hostname=hostname, portNumber=portnum)
-                    self._connection_type = 'network'
-                    self._connected_port = f"{hostname}:{portnum}"
-                    self._connection_info = self._connected_port
-                except Exception as e:
-                    raise Exception(f"Failed to connect via TCP: {e}")
-                finally:
-                    self._run_callbacks()
-                return self.interface
-
-            # --- Serial connection ---
+        ReceivePipeline.get_instance()  # start recording received messages before packets flow
+        TelemetryStore.get_instance()  # ...and device metrics
+        NodeDbCache.get_instance()  # ...and keep the NodeDB cache for the next warm start
+        try:
+            connection = self._open(port, hostname, portnum, connection_id, in_use)
+            with self._connection_lock:
+                self._add_connection(connection)
+            return connection.interface
+        finally:
+            with self._connection_lock:
+                self._connecting.discard(connection_id)
+            self._run_callbacks(connection_id)  # <-- refresh tabs/UI on connect
+
+    def _open(self, port, hostname, portnum, connection_id, in_use):
+        # --- Network connection ---
+        if hostname:
+            tcp_interface = _tcp_interface()
+            if tcp_interface is None:
+                raise Exception("TCP interface not available.")
+            portnum = portnum or 4403
             try:
-                if port:
-                    self.interface = meshtastic.serial_interface.SerialInterface(devPath=port)
-                else:
-                    available_ports = self.scan_serial_ports()
-                    if not available_ports:
-                        raise Exception("No serial ports found.")
-                    self.interface = meshtastic.serial_interface.SerialInterface(devPath=available_ports[0]["device"])
-
-                # Set connected info
-                if hasattr(self.interface, "port") and self.interface.port:
-                    self._connected_port = self.interface.port
-                    self._connection_info = self.interface.port
-                elif hasattr(self.interface, "stream") and hasattr(self.interface.stream, "port"):
-                    self._connected_port = self.interface.stream.port
-                    self._connection_info = self.interface.stream.port
-
-                self._connection_type = 'serial'
+                interface = tcp_interface.TCPInterface(hostname=hostname, portNumber=portnum)
+                from utils.network_discovery import NetworkDiscovery
+                NetworkDiscovery.get_instance().remember(hostname, portnum)
+                return MeshConnection(connection_id, interface, 'network', f"{hostname}:{portnum}")
             except Exception as e:
-                raise Exception(f"Serial connection failed: {e}")
-            finally:
-                self._run_callbacks()  # <-- refresh tabs/UI on connect
-            return self.interface
+                raise Exception(f"Failed to connect via TCP: {e}")
+
+        # --- Serial connection ---
+        from utils.serial_discovery import SerialDiscovery
+        discovery = SerialDiscovery.get_instance()
+        auto_port = not port
+        try:
+            if auto_port:
+                port = discovery.best_port(exclude=in_use)
+                if not port:
+                    raise Exception("No Meshtastic radio found on the serial ports.")
+            import meshtastic.serial_interface
+            try:
+                interface = meshtastic.serial_interface.SerialInterface(devPath=port)
+            except Exception:
+                if auto_port:
+                    discovery.forget(port)  # probe it again next time rather than trusting the cache
+                raise
+
+            # Set connected info
+            info = port
+            if hasattr(interface, "port") and interface.port:
+                info = interface.port
+            elif hasattr(interface, "stream") and hasattr(interface.stream, "port"):
+                info = interface.stream.port
+
+            return MeshConnection(connection_id, interface, 'serial', info)
+        except Exception as e:
+            raise Exception(f"Serial connection failed: {e}")
+
+    def attach_interface(self, interface, connection_id=DEFAULT_CONNECTION, connection_type='simulated', info=None):
+        """Add an already-open interface (simulated radio, capture replay) to the pool as if it had connected."""
+        with self._connection_lock:
+            if connection_id in self._connections or connection_id in self._connecting:
+                raise Exception("Already connected. Disconnect first.")
+            ReceivePipeline.get_instance()
+            TelemetryStore.get_instance()
+            NodeDbCache.get_instance()
+            self._add_connection(MeshConnection(connection_id, interface, connection_type, info or connection_type))
+        self._run_callbacks(connection_id)
+        return interface
+
+    def connect_in_background(self, port=None, hostname=None, portnum=None, connection_id=DEFAULT_CONNECTION):
+        """Connect from a supervisor thread and return immediately; the link is re-established after drops."""
+        with self._connection_lock:
+            supervisor = self._supervisors.get(connection_id)
+            if connection_id in self._connections or (supervisor and supervisor.is_running()):
+                raise Exception("Already connected. Disconnect first.")
+            supervisor = ConnectionSupervisor(
+                self, connection_id, {"port": port, "hostname": hostname, "portnum": portnum},
+                on_state=self._run_state_listeners
+            )
+            self._supervisors[connection_id] = supervisor
+        supervisor.start()
+        return supervisor
+
+    def get_state(self, connection_id=None):
+        """Supervisor state of a connection (READY/DISCONNECTED for unsupervised ones)."""
+        connection_id = connection_id or self._active_id or DEFAULT_CONNECTION
+        supervisor = self._supervisors.get(connection_id)
+        if supervisor and supervisor.is_running():
+            return supervisor.state
+        return READY if connection_id in self._connections else DISCONNECTED
+
+    def get_supervisor(self, connection_id=None):
+        return self._supervisors.get(connection_id or self._active_id or DEFAULT_CONNECTION)
+
+    def _add_connection(self, connection):
+        self._connections[connection.id] = connection
+        recorder = self._recorders.get(connection.id)
+        if recorder:
+            recorder.attach(connection.interface)  # keep recording across supervised reconnects
+        if self._active_id is None:
+            self.set_active(connection.id)
 
     # --- Disconnect ---
-    def disconnect(self):
+    def disconnect(self, connection_id=None, stop_supervisor=True):
+        connection_id = connection_id or self._active_id or DEFAULT_CONNECTION
+        supervisor = self._supervisors.pop(connection_id, None) if stop_supervisor else None
+        if supervisor:
+            supervisor.stop()
+        if stop_supervisor:
+            self.stop_capture(connection_id)
+        elif connection_id in self._recorders:
+            self._recorders[connection_id].detach()  # the supervisor reconnects; recording resumes then
         with self._connection_lock:
-            if self.interface:
+            connection = self._connections.pop(connection_id, None)
+            if connection:
                 try:
-                    self.interface.close()
+                    connection.interface.close()
                 except:
                     pass
-            self.interface = None
-            self._connected_port = None
-            self._connection_type = None
-            self._connection_info = None
-            self._run_callbacks()  # <-- refresh tabs/UI on disconnect
+            if connection_id == self._active_id:
+                self._active_id = None
+                NodeStore.get_instance().detach()
+                if self._connections:
+                    self.set_active(next(iter(self._connections)))
+            self._run_callbacks(connection_id)  # <-- refresh tabs/UI on disconnect
+
+    # --- Capture and replay ---
+    def start_capture(self, path, connection_id=None):
+        """Record everything a connection's radio sends to a capture file (see utils.capture)."""
+        connection = self._get_connection(connection_id)
+        if connection.id in self._recorders:
+            raise Exception("Already recording this connection.")
+        recorder = CaptureRecorder(path)
+        recorder.attach(connection.interface)
+        self._recorders[connection.id] = recorder
+        return recorder
+
+    def stop_capture(self, connection_id=None):
+        """Stop recording; returns the recorder (None if the connection wasn't recording)."""
+        recorder = self._recorders.pop(connection_id or self._active_id, None)
+        if recorder:
+            recorder.close()
+        return recorder
+
+    def get_capture(self, connection_id=None):
+        return self._recorders.get(connection_id or self._active_id)
+
+    def replay_capture(self, path, speed=1.0, connection_id=REPLAY_CONNECTION):
+        """Add a connection that replays a capture file (speed 0 = as fast as possible) and start it."""
+        interface = open_replay(path, speed)
+        try:
+            self.attach_interface(interface, connection_id, 'replay', interface.devPath)
+        except Exception:
+            interface.close()
+            raise
+        return interface.start()
+
+    def disconnect_all(self):
+        for connection_id in set(self._connections) | set(self._supervisors):
+            self.disconnect(connection_id)
+
+    # --- Pool helpers ---
+    def set_active(self, connection_id):
+        """Make a connection the default for calls without a connection id (and the one shown in the UI)."""
+        connection = self._get_connection(connection_id)
+        self._active_id = connection_id
+        NodeStore.get_instance().attach(connection.interface)
+
+    def get_active_id(self):
+        return self._active_id
+
+    def list_connections(self):
+        return list(self._connections)
+
+    def _get_connection(self, connection_id=None):
+        connection = self._connections.get(connection_id or self._active_id)
+        if not connection:
+            raise Exception("Not connected.")
+        return connection
+
+    @property
+    def interface(self):
+        """Interface of the active connection (None when nothing is connected)."""
+        connection = self._connections.get(self._active_id)
+        return connection.interface if connection else None
 
     # --- Status helpers ---
-    def is_connected(self):
-        if not self.interface:
+    def is_connected(self, connection_id=None):
+        connection = self._connections.get(connection_id or self._active_id)
+        if not connection:
             return False
         try:
-            return hasattr(self.interface, 'port') or hasattr(self.interface, 'stream') or hasattr(self.interface, 'hostname')
+            interface = connection.interface
+            return hasattr(interface, 'port') or hasattr(interface, 'stream') or hasattr(interface, 'hostname')
         except:
             return False
 
-    def get_interface(self):
-        if not self.interface:
-            raise Exception("Not connected.")
-        return self.interface
+    def get_interface(self, connection_id=None):
+        return self._get_connection(connection_id).interface
 
-    def get_connected_port(self):
-        return self._connected_port
+    def get_connected_port(self, connection_id=None):
+        connection = self._connections.get(connection_id or self._active_id)
+        return connection.info if connection else None
 
-    def get_connection_type(self):
-        return self._connection_type
+    def get_connection_type(self, connection_id=None):
+        connection = self._connections.get(connection_id or self._active_id)
+        return connection.connection_type if connection else None
 
-    def get_connection_info(self):
-        return self._connection_info
+    def get_connection_info(self, connection_id=None):
+        return self.get_connected_port(connection_id)
 
     @classmethod
     def get_instance(cls):
@@ -0,0 +1,141 @@
+# utils/message_store.py
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from utils.metrics import MetricsRegistry
+from utils.paths import get_data_dir
+
+BROADCAST_NUM = 0xFFFFFFFF
+PAGE_SIZE = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    direction TEXT NOT NULL,
+    peer TEXT,
+    channel INTEGER,
+    from_id TEXT,
+    to_id TEXT,
+    packet_id INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_peer_ts ON messages(peer, ts, id);
+CREATE INDEX IF NOT EXISTS idx_messages_channel_ts ON messages(channel, ts, id);
+"""
+
+_COLUMNS = ("id", "ts", "direction", "peer", "channel", "from_id", "to_id", "packet_id", "text")
+
+
+class MessageStore:
+    """Singleton append-only SQLite message history; writes are streamed through a background writer thread.
+
+    Received messages arrive via ReceivePipeline; sent ones are added by the send scripts.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, path=None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._open(path or get_data_dir() / "messages.db")
+        return cls._instance
+
+    def _open(self, path):
+        self.path = path
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="message-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        MetricsRegistry.get_instance().gauge("meshtastic_message_store_queue_depth",
+                                             "Messages waiting to be written to the store", fn=self._queue.qsize)
+
+    # --- Writes ---
+    def add_message(self, text, direction, peer=None, channel=None, from_id=None, to_id=None,
+                    packet_id=None, ts=None):
+        """Queue a message for appending; peer is the other node for DMs, channel the index for broadcasts."""
+        self._queue.put((ts or time.time(), direction, peer, channel, from_id, to_id, packet_id, text))
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Coalesce whatever else is already waiting into one transaction
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    with self._db_lock, self._db:
+                        self._db.executemany(
+                            "INSERT INTO messages (ts, direction, peer, channel, from_id, to_id, packet_id, text) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            except Exception as e:
+                print(f"Message store write error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(rows) != len(batch):
+                return  # close() sentinel
+
+    def flush(self):
+        """Block until every queued message has been written."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    # --- Reads ---
+    def get_direct_history(self, peer, before=None, limit=PAGE_SIZE):
+        """Direct messages with a peer, oldest first; pass the first row of a page as `before` for older ones."""
+        return self._page("peer = ?", (peer,), before, limit)
+
+    def get_channel_history(self, channel, before=None, limit=PAGE_SIZE):
+        """Broadcast messages on a channel index, oldest first; paged like get_direct_history."""
+        return self._page("channel = ?", (channel,), before, limit)
+
+    def _page(self, where, params, before, limit):
+        if before is not None:
+            where += " AND (ts < ? OR (ts = ? AND id < ?))"
+            params += (before["ts"], before["ts"], before["id"])
+        sql = (f"SELECT {', '.join(_COLUMNS)} FROM messages WHERE {where} "
+               f"ORDER BY ts DESC, id DESC LIMIT ?")
+        with self._db_lock:
+            rows = self._db.execute(sql, params + (limit,)).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in reversed(rows)]
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
+
+
+def message_from_packet(packet):
+    """Map a decoded meshtastic text packet to MessageStore.add_message() keyword arguments."""
+    decoded = packet.get("decoded", {})
+    from_id = packet.get("fromId") or (f"!{packet['from']:08x}" if isinstance(packet.get("from"), int) else None)
+    is_direct = packet.get("to") not in (None, BROADCAST_NUM) and packet.get("toId") != "^all"
+    return {
+        "text": decoded.get("text", ""),
+        "direction": "in",
+        "peer": from_id if is_direct else None,
+        "channel": None if is_direct else packet.get("channel", 0),
+        "from_id": from_id,
+        "to_id": packet.get("toId"),
+        "packet_id": packet.get("id"),
+        "ts": packet.get("rxTime") or time.time()
+    }
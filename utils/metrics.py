@@ -0,0 +1,258 @@
+# utils/metrics.py
+
+import bisect
+import json
+import threading
+import time
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Gauge:
+    """A value that goes up and down; with `fn`, it is read from fn() at collection time (e.g. queue depths)."""
+
+    kind = "gauge"
+
+    def __init__(self, fn=None):
+        self._value = 0
+        self._fn = fn
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    @property
+    def value(self):
+        if self._fn is not None:
+            try:
+                return self._fn()
+            except Exception:
+                return 0
+        return self._value
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics), typically of durations in seconds."""
+
+    kind = "histogram"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def max(self):
+        return self._max
+
+    def mean(self):
+        return self._sum / self._count if self._count else 0.0
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with +Inf."""
+        with self._lock:
+            counts = list(self._counts)
+        total, out = 0, []
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation within buckets."""
+        buckets = self.cumulative()
+        total = buckets[-1][1]
+        if not total:
+            return 0.0
+        rank, lower, below = q * total, 0.0, 0
+        for bound, cumulative in buckets:
+            if cumulative >= rank:
+                if bound == float("inf"):
+                    return self._max
+                inside = cumulative - below
+                return min(lower + (bound - lower) * ((rank - below) / inside if inside else 0), self._max)
+            lower, below = bound, cumulative
+        return self._max
+
+
+class Timer:
+    """Context manager and decorator observing elapsed seconds into a histogram."""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self.histogram
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, fn):
+        histogram = self.histogram
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+
+class MetricsRegistry:
+    """Singleton registry of process-wide counters, gauges and histograms.
+
+    Metrics are identified by name plus optional labels; asking for the same name and labels
+    again returns the same metric, so call sites don't need to keep references around.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._metrics = {}  # name -> {labels tuple: metric}
+                    cls._instance._help = {}
+                    cls._instance._metrics_lock = threading.Lock()
+        return cls._instance
+
+    def _get(self, factory, name, help, labels):
+        key = tuple(sorted(labels.items()))
+        family = self._metrics.get(name)
+        metric = family.get(key) if family else None
+        if metric is None:
+            with self._metrics_lock:
+                family = self._metrics.setdefault(name, {})
+                metric = family.get(key)
+                if metric is None:
+                    metric = family[key] = factory()
+                    if help:
+                        self._help.setdefault(name, help)
+        return metric
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help="", fn=None, **labels):
+        return self._get(lambda: Gauge(fn), name, help, labels)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get(lambda: Histogram(buckets), name, help, labels)
+
+    def timed(self, name, help="", **labels):
+        """Time a block (`with`) or, used as a decorator, each call, into a histogram of seconds."""
+        return Timer(self.histogram(name, help, **labels))
+
+    def collect(self):
+        """[(name, help, kind, [(labels dict, metric)])] sorted by name."""
+        with self._metrics_lock:
+            families = [(name, dict(family)) for name, family in self._metrics.items()]
+        out = []
+        for name, family in sorted(families):
+            samples = [(dict(key), metric) for key, metric in sorted(family.items())]
+            out.append((name, self._help.get(name, ""), samples[0][1].kind, samples))
+        return out
+
+    # --- Export ---
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, help, kind, samples in self.collect():
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in samples:
+                if kind == "histogram":
+                    for bound, count in metric.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        out = {}
+        for name, help, kind, samples in self.collect():
+            entries = []
+            for labels, metric in samples:
+                entry = {"labels": labels}
+                if kind == "histogram":
+                    entry.update(count=metric.count, sum=metric.sum, mean=metric.mean(), max=metric.max,
+                                 p50=metric.quantile(0.5), p95=metric.quantile(0.95), p99=metric.quantile(0.99))
+                else:
+                    entry["value"] = metric.value
+                entries.append(entry)
+            out[name] = {"type": kind, "help": help, "samples": entries}
+        return out
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def timed(name, help="", **labels):
+    """Shortcut for MetricsRegistry.get_instance().timed(...); works as a context manager or decorator."""
+    return MetricsRegistry.get_instance().timed(name, help, **labels)
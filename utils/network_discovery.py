@@ -0,0 +1,280 @@
+# utils/network_discovery.py
+
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.paths import get_data_dir
+from utils.serial_discovery import handshake_request, is_stream_frame
+
+try:
+    from zeroconf import ServiceBrowser, Zeroconf  # optional: mDNS discovery of network radios
+except ImportError:
+    Zeroconf = None
+
+API_PORT = 4403
+MDNS_SERVICE = "_meshtastic._tcp.local."  # advertised by WiFi/Ethernet firmware
+CONNECT_TIMEOUT = 0.4
+VERIFY_TIMEOUT = 0.6
+SCAN_WORKERS = 64
+MAX_SCAN_HOSTS = 1024  # a /22; anything larger is not a LAN sweep
+MAX_CACHED_HOSTS = 50
+
+
+def local_subnet():
+    """The /24 around this machine's primary IPv4 address, or None when offline."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("10.255.255.255", 1))  # UDP connect sends nothing, it only picks the outgoing interface
+            address = s.getsockname()[0]
+    except OSError:
+        return None
+    if address.startswith("127."):
+        return None
+    return ipaddress.ip_network(f"{address}/24", strict=False)
+
+
+def probe_host(host, port=API_PORT, timeout=CONNECT_TIMEOUT, verify=True):
+    """Connect to host:port; returns (latency in ms, answered the stream API handshake) or None if closed.
+
+    The firmware serves one API client at a time, so never probe a radio this app is connected to.
+    """
+    started = time.monotonic()
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError:
+        return None
+    latency = (time.monotonic() - started) * 1000
+    with sock:
+        if not verify:
+            return latency, False
+        try:
+            sock.settimeout(0.05)
+            sock.sendall(handshake_request())
+            received = b""
+            deadline = time.monotonic() + VERIFY_TIMEOUT
+            while time.monotonic() < deadline:
+                try:
+                    chunk = sock.recv(256)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    break
+                received += chunk
+                if is_stream_frame(received):
+                    return latency, True
+        except OSError:
+            pass
+    return latency, False
+
+
+def _connected_hosts():
+    from utils.meshtastic_helpers import MeshtasticHandler
+    return {info.rpartition(":")[0] for info in MeshtasticHandler.get_instance().connected_endpoints("network")}
+
+
+class _MdnsListener:
+    def __init__(self, discovery):
+        self.discovery = discovery
+
+    def add_service(self, zc, type_, name):
+        try:
+            info = zc.get_service_info(type_, name, timeout=1000)
+        except Exception as e:
+            print(f"mDNS lookup error: {e}")
+            return
+        if info is None:
+            return
+        label = name[:-len(type_)].rstrip(".") if name.endswith(type_) else name
+        for address in info.parsed_addresses():
+            if ":" not in address:  # IPv4 only; TCPInterface takes a plain host name
+                self.discovery._executor.submit(self.discovery._check, address, info.port or API_PORT, "mdns", label)
+
+    update_service = add_service
+
+    def remove_service(self, zc, type_, name):
+        pass  # the next scan or probe will find it unreachable; goodbyes are often lost anyway
+
+
+class NetworkDiscovery:
+    """Singleton finder for Meshtastic radios reachable over TCP.
+
+    Radios come from three sources: mDNS announcements (when zeroconf is installed), a parallel
+    sweep of port 4403 on the local subnet, and the cache of hosts seen or connected to before
+    (<data dir>/network_hosts.json), so a known radio is one click away. Every reachable host gets
+    a connect latency. Listeners are called with no arguments, from a worker thread, on changes.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, path=None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._open(path or get_data_dir() / "network_hosts.json")
+        return cls._instance
+
+    def _open(self, path):
+        self.path = path
+        self._hosts = {}  # "host:port" -> host dict (see hosts())
+        self._hosts_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="net-probe")
+        self._listeners = []
+        self._zeroconf = None
+        try:
+            for entry in json.loads(path.read_text()):
+                entry.update(latency_ms=None, reachable=False)
+                self._hosts[f"{entry['host']}:{entry['port']}"] = entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Network host cache load error: {e}")
+
+    # --- Results ---
+    def hosts(self):
+        """Known radios as {host, port, name, source, latency_ms, verified, reachable, last_seen, last_connected}:
+        reachable ones first by latency, then cached ones, most recently used first."""
+        with self._hosts_lock:
+            entries = [dict(entry) for entry in self._hosts.values()]
+        return sorted(entries, key=lambda h: (not h["reachable"], h["latency_ms"] or 0,
+                                              -(h["last_connected"] or 0), -(h["last_seen"] or 0)))
+
+    def _update(self, host, port, **fields):
+        key = f"{host}:{port}"
+        with self._hosts_lock:
+            entry = self._hosts.get(key)
+            if entry is None:
+                entry = self._hosts[key] = {"host": host, "port": port, "name": None, "source": None,
+                                            "latency_ms": None, "verified": False, "reachable": False,
+                                            "last_seen": None, "last_connected": None}
+            fields = {k: v for k, v in fields.items() if v is not None or k == "latency_ms"}
+            changed = any(entry.get(k) != v for k, v in fields.items())
+            entry.update(fields)
+        return changed
+
+    def remember(self, host, port=API_PORT):
+        """Record a successful connection, for one-click reconnect."""
+        now = time.time()
+        self._update(host, port, reachable=True, last_seen=now, last_connected=now, source="history")
+        self._save()
+        self._notify()
+
+    def forget(self, host, port=API_PORT):
+        with self._hosts_lock:
+            removed = self._hosts.pop(f"{host}:{port}", None)
+        if removed:
+            self._save()
+            self._notify()
+
+    def _save(self):
+        with self._hosts_lock:  # also keeps concurrent probes from interleaving writes
+            keep = [e for e in self._hosts.values() if e["verified"] or e["last_connected"]]
+            keep.sort(key=lambda e: -max(e["last_connected"] or 0, e["last_seen"] or 0))
+            data = json.dumps([{k: v for k, v in e.items() if k not in ("latency_ms", "reachable")}
+                               for e in keep[:MAX_CACHED_HOSTS]])
+            try:
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(data)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                print(f"Network host cache save error: {e}")
+
+    # --- Probing ---
+    def _check(self, host, port, source, name=None, busy=None, notify=True):
+        """Probe one host and fold the result in; returns True if it looks like a Meshtastic radio."""
+        busy = _connected_hosts() if busy is None else busy
+        if host in busy:
+            changed = self._update(host, port, reachable=True, last_seen=time.time(), name=name, source=source)
+        else:
+            result = probe_host(host, port, verify=True)
+            if result is None:
+                if not self._known(host, port):
+                    return False
+                changed = self._update(host, port, reachable=False, latency_ms=None)
+            else:
+                latency, verified = result
+                # An open port that doesn't speak the API is only worth listing if mDNS vouched for it
+                if not verified and source == "scan":
+                    return False
+                changed = self._update(host, port, reachable=True, latency_ms=round(latency, 1), verified=verified,
+                                       last_seen=time.time(), name=name, source=source)
+        if changed and notify:
+            self._save()
+            self._notify()
+        with self._hosts_lock:
+            entry = self._hosts.get(f"{host}:{port}")
+            return entry is not None and entry["reachable"]
+
+    def _known(self, host, port):
+        with self._hosts_lock:
+            return f"{host}:{port}" in self._hosts
+
+    def scan_subnet(self, subnet=None, port=API_PORT):
+        """Probe port `port` on every host of `subnet` (default: the local /24) and re-check cached hosts,
+        CONNECT_TIMEOUT each on SCAN_WORKERS threads; returns hosts()."""
+        network = ipaddress.ip_network(subnet, strict=False) if subnet else local_subnet()
+        targets = {}
+        if network is not None:
+            if network.num_addresses > MAX_SCAN_HOSTS:
+                raise Exception(f"Subnet {network} is too large to scan (max {MAX_SCAN_HOSTS} addresses).")
+            targets = {(str(ip), port): "scan" for ip in network.hosts()}
+        for entry in self.hosts():
+            targets[(entry["host"], entry["port"])] = entry["source"] or "history"
+        busy = _connected_hosts()
+        futures = [self._executor.submit(self._check, host, p, source, None, busy, False)
+                   for (host, p), source in targets.items()]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Network probe error: {e}")
+        self._save()
+        self._notify()
+        return self.hosts()
+
+    # --- mDNS ---
+    def start_mdns(self):
+        """Listen for radios announcing themselves; returns False if zeroconf isn't installed."""
+        if Zeroconf is None:
+            return False
+        with self._hosts_lock:
+            if self._zeroconf is None:
+                try:
+                    self._zeroconf = Zeroconf()
+                    ServiceBrowser(self._zeroconf, MDNS_SERVICE, _MdnsListener(self))
+                except Exception as e:
+                    print(f"mDNS start error: {e}")
+                    self._zeroconf = None
+                    return False
+        return True
+
+    def stop_mdns(self):
+        with self._hosts_lock:
+            zc, self._zeroconf = self._zeroconf, None
+        if zc is not None:
+            zc.close()
+
+    # --- Listeners ---
+    def add_listener(self, callback):
+        if callable(callback) and callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        for cb in list(self._listeners):
+            try:
+                cb()
+            except Exception as e:
+                print(f"Network discovery listener error: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
@@ -0,0 +1,319 @@
+# utils/node_store.py
+
+import threading
+import time
+from pubsub import pub
+
+
+def node_key(node):
+    """Return the NodeDB key ("!xxxxxxxx") for a node dict."""
+    user = node.get("user") if isinstance(node, dict) else None
+    if isinstance(user, dict) and user.get("id"):
+        return user["id"]
+    num = node.get("num") if isinstance(node, dict) else None
+    return f"!{num:08x}" if isinstance(num, int) else None
+
+
+class NodeRecord:
+    """Compact, flattened NodeDB entry as shown by the UI; treat as immutable once built."""
+
+    __slots__ = ("num", "long_name", "short_name", "mac", "last_heard", "snr", "hops_away", "battery")
+
+    def __init__(self, num, long_name="Unknown", short_name="Unknown", mac="Unknown",
+                 last_heard=None, snr=None, hops_away=None, battery=None):
+        self.num = num
+        self.long_name = long_name
+        self.short_name = short_name
+        self.mac = mac
+        self.last_heard = last_heard
+        self.snr = snr
+        self.hops_away = hops_away
+        self.battery = battery
+
+    @classmethod
+    def from_node(cls, key, node):
+        if not isinstance(node, dict):
+            return cls(key)
+        user = node.get("user") if isinstance(node.get("user"), dict) else {}
+        metrics = node.get("deviceMetrics") if isinstance(node.get("deviceMetrics"), dict) else {}
+        return cls(key, user.get("longName", "Unknown"), user.get("shortName", "Unknown"),
+                   user.get("macaddr", "Unknown"), node.get("lastHeard"), node.get("snr"),
+                   node.get("hopsAway"), metrics.get("batteryLevel"))
+
+    def __eq__(self, other):
+        return isinstance(other, NodeRecord) and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"NodeRecord({self.as_dict()})"
+
+
+def my_node_num(interface):
+    """The connected radio's own node number, from myInfo (available early in the config download)."""
+    my_info = getattr(interface, "myInfo", None)
+    num = getattr(my_info, "my_node_num", None)
+    if num is None:
+        num = getattr(getattr(interface, "localNode", None), "nodeNum", None)
+    return num if isinstance(num, int) else None
+
+
+def build_records(nodes):
+    """Flatten a whole interface.nodes dict into {key: NodeRecord}, skipping malformed entries."""
+    records = {}
+    for key, node in list((nodes or {}).items()):
+        try:
+            records[key] = NodeRecord.from_node(key, node)
+        except Exception as e:
+            print(f"Error processing node {key}: {e}")
+    return records
+
+
+class NodeCursor:
+    """Per-consumer change tracker; filled by NodeStore, emptied by NodeStore.drain()."""
+
+    def __init__(self):
+        self.dirty = set()
+        self.reset = True
+
+
+class NodeStore:
+    """Singleton in-memory mirror of the connected radio's NodeDB, patched from pubsub events.
+
+    `version` increases whenever any record changes; snapshot() hands every caller the same
+    tuple of records until then, so repeated reads between updates cost nothing. Snapshots also
+    expire after SNAPSHOT_TTL, which re-reads interface.nodes in case an update was missed.
+
+    Before a radio is attached the store can be preloaded with that radio's last known NodeDB
+    (see utils.nodedb_cache); it is then `warm`, and updates from the radio's config download and
+    the final attach() are folded in as ordinary changes instead of a reset.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    SNAPSHOT_TTL = 30.0
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._nodes = {}  # node key -> NodeRecord
+                    cls._instance._interface = None
+                    cls._instance._store_lock = threading.Lock()
+                    cls._instance._cursors = []
+                    cls._instance._listeners = []
+                    cls._instance.version = 0
+                    cls._instance._node_versions = {}  # node key -> sequence number of its last NodeDB event
+                    cls._instance._events = 0
+                    cls._instance._snapshot = ()
+                    cls._instance._snapshot_version = -1
+                    cls._instance._snapshot_expires = 0.0
+                    cls._instance._other_snapshots = {}  # id(interface) -> (expires, records, interface) for non-active radios
+                    cls._instance._warm_num = None  # my node number of the preloaded NodeDB, until attach()
+                    pub.subscribe(cls._instance._on_receive, "meshtastic.receive")
+                    pub.subscribe(cls._instance._on_node_updated, "meshtastic.node.updated")
+        return cls._instance
+
+    # --- Consumers ---
+    def open_cursor(self):
+        """Create a change cursor; its first drain() returns every node."""
+        cursor = NodeCursor()
+        with self._store_lock:
+            self._cursors.append(cursor)
+        return cursor
+
+    def add_listener(self, callback):
+        """Register a function called (on the radio's reader thread) after nodes change."""
+        if callable(callback) and callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def drain(self, cursor):
+        """Return (reset, records) for a cursor: all records after a reset, otherwise only changed ones."""
+        with self._store_lock:
+            if cursor.reset:
+                records = list(self._nodes.values())
+            else:
+                records = [self._nodes[k] for k in cursor.dirty if k in self._nodes]
+            reset = cursor.reset
+            cursor.reset = False
+            cursor.dirty.clear()
+        return reset, records
+
+    def snapshot(self):
+        """Tuple of all records, shared between callers and rebuilt only after a change or TTL expiry."""
+        now = time.monotonic()
+        if now >= self._snapshot_expires and self._interface is not None:
+            self._reload()
+        with self._store_lock:
+            if self._snapshot_version != self.version:
+                self._snapshot = tuple(self._nodes.values())
+                self._snapshot_version = self.version
+                self._snapshot_expires = now + self.SNAPSHOT_TTL
+            return self._snapshot
+
+    def records(self):
+        """List of all records as they are now, without the TTL reload snapshot() may do.
+
+        For store listeners: a reload notifies them again, on the same thread.
+        """
+        with self._store_lock:
+            return list(self._nodes.values())
+
+    def snapshot_of(self, interface):
+        """Snapshot for any interface; radios other than the active one are cached by TTL only."""
+        if interface is self._interface:
+            return self.snapshot()
+        now = time.monotonic()
+        cached = self._other_snapshots.get(id(interface))
+        if cached and cached[0] > now and cached[2] is interface:
+            return cached[1]
+        records = tuple(build_records(getattr(interface, "nodes", None)).values())
+        self._other_snapshots[id(interface)] = (now + self.SNAPSHOT_TTL, records, interface)
+        return records
+
+    def node_version(self, key):
+        """Sequence number of the last NodeDB event for one node (changes even if its record did not)."""
+        return self._node_versions.get(key, 0)
+
+    def get(self, key):
+        with self._store_lock:
+            return self._nodes.get(key)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    @property
+    def interface(self):
+        """The interface whose NodeDB is mirrored (None when detached)."""
+        return self._interface
+
+    @property
+    def warm(self):
+        """True while showing a preloaded NodeDB with no radio attached."""
+        return self._warm_num is not None
+
+    # --- Interface binding ---
+    def preload(self, records, num):
+        """Show the last known NodeDB ({key: NodeRecord}) of radio `num` until it is attached."""
+        with self._store_lock:
+            if self._interface is not None:
+                return False
+            self._nodes = dict(records)
+            self._node_versions = {}
+            self._warm_num = num
+            self.version += 1
+            self._mark_reset()
+        self._notify()
+        return True
+
+    def attach(self, interface):
+        """Load the full NodeDB of a freshly connected interface and follow its updates.
+
+        Over a preloaded NodeDB of the same radio only the differences are applied; nodes the radio
+        no longer has still force a reset, as cursors can't report removals.
+        """
+        records = build_records(getattr(interface, "nodes", None))
+        with self._store_lock:
+            reconcile = self._warm_num is not None and self._warm_num == my_node_num(interface)
+            self._interface = interface
+            self._warm_num = None
+            self._node_versions = {}
+            self._other_snapshots.pop(id(interface), None)
+            if reconcile and records.keys() >= self._nodes.keys():
+                for key, record in records.items():
+                    if self._nodes.get(key) != record:
+                        self._store(key, record)
+            else:
+                self._nodes = records
+                self.version += 1
+                self._mark_reset()
+        self._notify()
+
+    def detach(self):
+        """Forget the current interface and its nodes."""
+        with self._store_lock:
+            self._interface = None
+            self._nodes = {}
+            self._node_versions = {}
+            self._warm_num = None
+            self.version += 1
+            self._mark_reset()
+        self._notify()
+
+    def _reload(self):
+        """TTL expiry: re-read the whole NodeDB and treat any difference as a normal update."""
+        interface = self._interface
+        records = build_records(getattr(interface, "nodes", None))
+        changed = False
+        with self._store_lock:
+            if interface is not self._interface:
+                return
+            for key, record in records.items():
+                if self._nodes.get(key) != record:
+                    self._store(key, record)
+                    changed = True
+            self._snapshot_expires = time.monotonic() + self.SNAPSHOT_TTL
+        if changed:
+            self._notify()
+
+    def _mark_reset(self):
+        for cursor in self._cursors:
+            cursor.reset = True
+            cursor.dirty.clear()
+
+    # --- Pubsub handlers ---
+    def _on_receive(self, packet, interface):
+        if interface is not self._interface or not isinstance(packet, dict):
+            return
+        key = packet.get("fromId")
+        if not key and isinstance(packet.get("from"), int):
+            key = f"!{packet['from']:08x}"
+        nodes = getattr(interface, "nodes", None) or {}
+        if key in nodes:
+            self._update(key, nodes[key])
+
+    def _on_node_updated(self, node, interface):
+        if interface is not self._interface:
+            # A radio still downloading its config patches its own preloaded NodeDB as entries arrive
+            if self._interface is not None or self._warm_num is None or my_node_num(interface) != self._warm_num:
+                return
+        key = node_key(node)
+        if key:
+            self._update(key, node)
+
+    def _update(self, key, node):
+        try:
+            record = NodeRecord.from_node(key, node)
+        except Exception as e:
+            print(f"Error processing node {key}: {e}")
+            return
+        with self._store_lock:
+            self._events += 1
+            self._node_versions[key] = self._events
+            if self._nodes.get(key) == record:
+                return
+            self._store(key, record)
+        self._notify()
+
+    def _store(self, key, record):
+        # Caller holds _store_lock
+        self._nodes[key] = record
+        self.version += 1
+        for cursor in self._cursors:
+            if not cursor.reset:
+                cursor.dirty.add(key)
+
+    def _notify(self):
+        for cb in self._listeners:
+            try:
+                cb()
+            except Exception as e:
+                print(f"Node listener error: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
@@ -0,0 +1,150 @@
+# utils/nodedb_cache.py
+
+import atexit
+import gzip
+import json
+import os
+import threading
+from utils.node_store import NodeStore, NodeRecord, my_node_num
+from utils.paths import get_data_dir
+
+FORMAT_VERSION = 1
+SAVE_INTERVAL = 30.0  # seconds between saves while nodes keep changing
+CACHE_SUFFIX = ".nodes.json.gz"
+
+
+def cache_dir():
+    path = get_data_dir() / "nodedb"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def cache_path(num):
+    return cache_dir() / f"!{num:08x}{CACHE_SUFFIX}"
+
+
+def save_records(num, records):
+    """Write a radio's NodeRecords as gzipped JSON rows (one list per record, in NodeRecord.__slots__ order)."""
+    data = {"version": FORMAT_VERSION, "my_node_num": num, "fields": list(NodeRecord.__slots__),
+            "nodes": [[getattr(r, slot) for slot in NodeRecord.__slots__] for r in records]}
+    path = cache_path(num)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_records(num):
+    """{key: NodeRecord} last saved for radio `num`; empty if there is no usable cache."""
+    try:
+        with gzip.open(cache_path(num), "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"NodeDB cache load error: {e}")
+        return {}
+    if data.get("version") != FORMAT_VERSION:
+        return {}
+    fields = data["fields"]
+    records = {}
+    for row in data["nodes"]:
+        record = NodeRecord(**{field: value for field, value in zip(fields, row) if field in NodeRecord.__slots__})
+        records[record.num] = record
+    return records
+
+
+def last_radio():
+    """Node number of the radio whose cache was written last, or None."""
+    caches = sorted(cache_dir().glob(f"*{CACHE_SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in caches:
+        try:
+            return int(path.name[1:9], 16)
+        except ValueError:
+            continue
+    return None
+
+
+class NodeDbCache:
+    """Singleton that keeps <data dir>/nodedb/!xxxxxxxx.nodes.json.gz up to date for the attached radio.
+
+    It mirrors NodeStore through a cursor, so saving never walks interface.nodes; writes happen at
+    most every SAVE_INTERVAL, when the store switches radios or disconnects, and at exit.
+    warm_start() preloads the last radio's NodeDB so the UI has nodes before any connection.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        self._store = NodeStore.get_instance()
+        self._cursor = self._store.open_cursor()
+        self._num = None  # radio being mirrored
+        self._records = {}
+        self._dirty = False
+        self._timer = None
+        self._cache_lock = threading.Lock()
+        self._store.add_listener(self._on_nodes_changed)
+        atexit.register(self.flush)
+
+    def warm_start(self):
+        """Preload NodeStore with the last radio's cached NodeDB; returns the number of nodes loaded."""
+        num = last_radio()
+        if num is None:
+            return 0
+        records = load_records(num)
+        if records and self._store.preload(records, num):
+            return len(records)
+        return 0
+
+    def _on_nodes_changed(self):
+        with self._cache_lock:
+            reset, records = self._store.drain(self._cursor)
+            num = my_node_num(self._store.interface)
+            if reset or num != self._num:
+                self._flush()
+                self._num = num
+                self._records = {}
+                if num is not None and not reset:
+                    # Attached over a preloaded NodeDB: nothing was reset. Not snapshot(), whose TTL reload
+                    # would call this listener again while _cache_lock is held.
+                    records = self._store.records()
+            if num is None:
+                return
+            for record in records:
+                self._records[record.num] = record
+            if records or reset:
+                self._dirty = True
+                if self._timer is None:
+                    self._timer = threading.Timer(SAVE_INTERVAL, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def flush(self):
+        with self._cache_lock:
+            self._flush()
+
+    def _flush(self):
+        # Caller holds _cache_lock
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._dirty or self._num is None or not self._records:
+            return
+        try:
+            save_records(self._num, list(self._records.values()))
+            self._dirty = False
+        except Exception as e:
+            print(f"NodeDB cache save error: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
@@ -0,0 +1,136 @@
+# utils/paging.py
+
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+
+class Pager:
+    """Ordered key list with a movable window of `page_size` keys (the rows actually on screen)."""
+
+    def __init__(self, page_size=50):
+        self.page_size = page_size
+        self.page = 0
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def set_keys(self, keys):
+        """Replace the key order, keeping the current page where possible."""
+        self._keys = list(keys)
+        self.page = min(self.page, self.page_count - 1)
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self._keys) // self.page_size))
+
+    def window(self):
+        start = self.page * self.page_size
+        return self._keys[start:start + self.page_size]
+
+    # --- Navigation ---
+    def goto(self, page):
+        self.page = max(0, min(page, self.page_count - 1))
+
+    def first(self):
+        self.goto(0)
+
+    def prev(self):
+        self.goto(self.page - 1)
+
+    def next(self):
+        self.goto(self.page + 1)
+
+    def last(self):
+        self.goto(self.page_count - 1)
+
+
+class SortedIndex:
+    """Keys kept sorted by every column at once, from sort keys computed when a record changes.
+
+    `columns` maps a column name to a function returning a record's sort value (None = no value).
+    Each column is a sorted list of (0, value, key) / (1, key) entries patched with bisect, so an
+    update costs O(columns * log n) comparisons plus a list shift, and switching the sort column
+    or direction needs no sorting at all. Keys without a value come last in either direction.
+    """
+
+    def __init__(self, columns):
+        self._columns = columns
+        self._lists = {name: [] for name in columns}
+        self._entries = {}  # key -> {column: entry}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def update(self, key, record):
+        """Add or re-sort one record; returns the names of the columns whose sort key changed."""
+        old = self._entries.get(key)
+        entries = {}
+        moved = set()
+        for name, sort_value in self._columns.items():
+            value = sort_value(record)
+            entry = (1, key) if value is None else (0, value, key)
+            entries[name] = entry
+            if old is not None and old[name] == entry:
+                continue
+            column = self._lists[name]
+            if old is not None:
+                del column[bisect_left(column, old[name])]
+            insort(column, entry)
+            moved.add(name)
+        self._entries[key] = entries
+        return moved
+
+    def remove(self, key):
+        old = self._entries.pop(key, None)
+        if old is None:
+            return
+        for name, entry in old.items():
+            column = self._lists[name]
+            del column[bisect_left(column, entry)]
+
+    def clear(self):
+        self._entries.clear()
+        for column in self._lists.values():
+            column.clear()
+
+    def ordered(self, column, descending=False):
+        """All keys in column order."""
+        entries = self._lists[column]
+        if not descending:
+            return [entry[-1] for entry in entries]
+        split = bisect_left(entries, (1,))
+        return [entry[-1] for entry in reversed(entries[:split])] + [entry[-1] for entry in entries[split:]]
+
+
+class LruCache:
+    """Small bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, capacity=200):
+        self.capacity = capacity
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def peek(self, key):
+        """Get without touching recency (for patching cached entries in place)."""
+        return self._items.get(key)
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
@@ -0,0 +1,11 @@
+# utils/paths.py
+
+import os
+from pathlib import Path
+
+
+def get_data_dir():
+    """Directory for local app data (message history, caches); override with MESHTASTIC_DESKTOP_HOME."""
+    path = Path(os.environ.get("MESHTASTIC_DESKTOP_HOME") or Path.home() / ".meshtastic-desktop")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
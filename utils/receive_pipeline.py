@@ -0,0 +1,120 @@
+# utils/receive_pipeline.py
+
+import threading
+import time
+from collections import deque
+from pubsub import pub
+from utils.message_store import MessageStore, message_from_packet
+from utils.metrics import MetricsRegistry
+
+
+class ReceivePipeline:
+    """Singleton receive path for text messages.
+
+    Each meshtastic.receive.text packet is decoded once, persisted to MessageStore and pushed
+    into a bounded ring buffer. A dispatcher thread hands the buffered messages to the
+    registered sinks every FLUSH_INTERVAL, so UI work (and page.update()) happens once per
+    batch instead of once per packet. When the UI falls behind, the oldest buffered messages
+    are dropped from the live view; they are still in the store.
+
+    Unread counters are kept per conversation: ("channel", index) for broadcasts, ("peer", node id)
+    for direct messages; the UI clears them with mark_read() when it shows a conversation.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    FLUSH_INTERVAL = 0.1
+    BUFFER_SIZE = 1000
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._ring = deque(maxlen=cls.BUFFER_SIZE)
+                    cls._instance._ring_lock = threading.Lock()
+                    cls._instance._sinks = []
+                    cls._instance.received = 0
+                    cls._instance.dropped = 0
+                    cls._instance._unread = {}  # ("channel", index) | ("peer", node id) -> count
+                    cls._instance._store = MessageStore.get_instance()
+                    cls._instance._metrics = MetricsRegistry.get_instance()
+                    cls._instance._metrics.gauge("meshtastic_receive_buffer_depth", "Messages waiting for the UI sinks",
+                                                 fn=lambda: len(cls._instance._ring))
+                    cls._instance._dispatcher = threading.Thread(
+                        target=cls._instance._dispatch_loop, name="receive-dispatch", daemon=True)
+                    cls._instance._dispatcher.start()
+                    pub.subscribe(cls._instance._on_text, "meshtastic.receive.text")
+                    pub.subscribe(cls._instance._on_packet, "meshtastic.receive")
+        return cls._instance
+
+    def add_sink(self, callback):
+        """Register callback(messages) to receive batches of decoded messages (MessageStore row dicts)."""
+        if callable(callback) and callback not in self._sinks:
+            self._sinks.append(callback)
+
+    def remove_sink(self, callback):
+        if callback in self._sinks:
+            self._sinks.remove(callback)
+
+    # --- Unread counters ---
+    def unread_counts(self):
+        """Copy of the unread counters, {("channel", index) | ("peer", node id): count}."""
+        with self._ring_lock:
+            return dict(self._unread)
+
+    def unread(self, channel=None, peer=None):
+        with self._ring_lock:
+            return self._unread.get(_conversation(channel, peer), 0)
+
+    def mark_read(self, channel=None, peer=None):
+        with self._ring_lock:
+            self._unread.pop(_conversation(channel, peer), None)
+
+    def _on_packet(self, packet, interface):
+        decoded = packet.get("decoded", {}) if isinstance(packet, dict) else {}
+        self._metrics.counter("meshtastic_packets_received_total", "Packets received from the radio",
+                              portnum=decoded.get("portnum", "UNKNOWN")).inc()
+
+    def _on_text(self, packet, interface):
+        try:
+            message = message_from_packet(packet)
+        except Exception as e:
+            print(f"Receive pipeline decode error: {e}")
+            return
+        self._store.add_message(**message)
+        with self._ring_lock:
+            if len(self._ring) == self._ring.maxlen:
+                self.dropped += 1
+                self._metrics.counter("meshtastic_receive_dropped_total",
+                                      "Messages dropped from the live view because the UI fell behind").inc()
+            self._ring.append(message)
+            self.received += 1
+            key = _conversation(message["channel"], message["peer"])
+            self._unread[key] = self._unread.get(key, 0) + 1
+
+    def _dispatch_loop(self):
+        while True:
+            time.sleep(self.FLUSH_INTERVAL)
+            with self._ring_lock:
+                if not self._ring:
+                    continue
+                batch = list(self._ring)
+                self._ring.clear()
+            self._metrics.histogram("meshtastic_receive_batch_size", "Messages per batch handed to the sinks",
+                                    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)).observe(len(batch))
+            for sink in list(self._sinks):
+                try:
+                    with self._metrics.timed("meshtastic_receive_sink_seconds", "Time a sink spends on one batch"):
+                        sink(batch)
+                except Exception as e:
+                    print(f"Receive sink error: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
+
+
+def _conversation(channel=None, peer=None):
+    return ("peer", peer) if peer is not None else ("channel", channel or 0)
@@ -0,0 +1,243 @@
+# utils/search_index.py
+
+import base64
+import binascii
+import heapq
+import re
+import threading
+from utils.node_store import NodeStore
+
+MIN_FUZZY_SCORE = 0.34  # share of the query's trigrams a name must contain to count as a fuzzy match
+_WORD = re.compile(r"[\w']+")
+_MAC_SEPARATORS = re.compile(r"[:\-\s.]")
+
+# Result ranks, best first
+RANK_EXACT = 0    # node number, node id or MAC
+RANK_NAME = 1     # long or short name starts with the query
+RANK_WORD = 2     # a later word of the long name starts with the query
+RANK_FUZZY = 3    # trigram match
+
+
+def normalize_mac(mac):
+    """Lowercase hex without separators for a MAC given as hex or as base64 (how the NodeDB dict holds it)."""
+    if not isinstance(mac, str) or not mac or mac == "Unknown":
+        return None
+    plain = _MAC_SEPARATORS.sub("", mac).lower()
+    if len(plain) == 12 and all(c in "0123456789abcdef" for c in plain):
+        return plain
+    try:
+        raw = base64.b64decode(mac, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return raw.hex() if len(raw) == 6 else None
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PrefixTrie:
+    """Maps string tokens to sets of keys; prefix() returns every key with a token starting with a prefix."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self):
+        self._root = {}  # char -> child node; the "" entry of a node holds the keys ending there
+
+    def add(self, token, key):
+        node = self._root
+        for char in token:
+            node = node.setdefault(char, {})
+        node.setdefault("", set()).add(key)
+
+    def discard(self, token, key):
+        path = []
+        node = self._root
+        for char in token:
+            child = node.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child
+        keys = node.get("")
+        if not keys:
+            return
+        keys.discard(key)
+        if not keys:
+            del node[""]
+        # Prune branches left empty
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def prefix(self, prefix, limit=None):
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        found = set()
+        stack = [node]
+        while stack and (limit is None or len(found) < limit):
+            node = stack.pop()
+            for char, child in node.items():
+                if char == "":
+                    found.update(child)
+                else:
+                    stack.append(child)
+        return found
+
+
+class SearchIndex:
+    """In-memory index of NodeRecords: prefix trie over names, exact number/id/MAC lookup and a
+    trigram index for typo-tolerant matches. add() on an indexed key replaces its old entry.
+    """
+
+    def __init__(self):
+        self._records = {}  # key -> NodeRecord
+        self._entries = {}  # key -> (name tokens, word tokens, exact tokens, trigrams) as indexed
+        self._names = PrefixTrie()  # whole long name, short name and "!xxxxxxxx" node id
+        self._words = PrefixTrie()  # later words of the long name
+        self._exact = {}  # "!a1b2c3d4" / "a1b2c3d4" / decimal number / MAC hex -> keys
+        self._trigrams = {}  # trigram -> keys
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, key):
+        return self._records.get(key)
+
+    def add(self, record):
+        key = record.num
+        self.discard(key)
+        long_name = record.long_name.lower() if record.long_name != "Unknown" else ""
+        short_name = record.short_name.lower() if record.short_name != "Unknown" else ""
+        names = {t for t in (long_name, short_name) if t}
+        words = set(_WORD.findall(long_name)[1:]) - names
+        grams = trigrams(long_name) | trigrams(short_name) if names else set()
+        exact = set()
+        if isinstance(key, str) and key.startswith("!"):
+            names.add(key.lower())
+            exact.update((key.lower(), key[1:].lower()))
+            try:
+                exact.add(str(int(key[1:], 16)))
+            except ValueError:
+                pass
+        mac = normalize_mac(record.mac)
+        if mac:
+            exact.add(mac)
+
+        for token in names:
+            self._names.add(token, key)
+        for token in words:
+            self._words.add(token, key)
+        for token in exact:
+            self._exact.setdefault(token, set()).add(key)
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(key)
+        self._records[key] = record
+        self._entries[key] = (names, words, exact, grams)
+
+    def discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        names, words, exact, grams = entry
+        for token in names:
+            self._names.discard(token, key)
+        for token in words:
+            self._words.discard(token, key)
+        for index, tokens in ((self._exact, exact), (self._trigrams, grams)):
+            for token in tokens:
+                keys = index.get(token)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[token]
+        del self._records[key]
+
+    def clear(self):
+        self.__init__()
+
+    def search(self, query, limit=50, fuzzy=True):
+        """[(key, rank)] best first: exact number/id/MAC, name prefix, word prefix, then fuzzy matches."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        ranked = {}
+
+        def take(keys, rank):
+            # Only the first `limit` by name can make it into the results
+            for key in heapq.nsmallest(limit, (k for k in keys if k not in ranked), key=self._sort_name):
+                ranked[key] = rank
+
+        take(self._exact.get(query, ()), RANK_EXACT)
+        mac = normalize_mac(query)
+        if mac:
+            take(self._exact.get(mac, ()), RANK_EXACT)
+        take(self._names.prefix(query), RANK_NAME)
+        if len(ranked) < limit:
+            take(self._words.prefix(query), RANK_WORD)
+        if fuzzy and len(ranked) < limit and len(query) >= 3:
+            grams = trigrams(query)
+            scores = {}
+            for gram in grams:
+                keys = self._trigrams.get(gram, ())
+                if len(keys) * 2 > len(self._records):
+                    continue  # in most names (e.g. a shared prefix): costs a lot, tells nothing apart
+                for key in keys:
+                    scores[key] = scores.get(key, 0) + 1
+            matches = [(-count, self._sort_name(key), key) for key, count in scores.items()
+                       if key not in ranked and count / len(grams) >= MIN_FUZZY_SCORE]
+            for _count, _name, key in heapq.nsmallest(limit - len(ranked), matches):
+                ranked[key] = RANK_FUZZY
+        return list(ranked.items())[:limit]
+
+    def _sort_name(self, key):
+        record = self._records.get(key)
+        return (record.long_name.lower() if record else "", str(key))
+
+
+class NodeSearch:
+    """Singleton SearchIndex over the NodeStore's records, kept current through a NodeStore cursor.
+
+    Changes are folded in lazily on the next search, so node updates on the radio thread only
+    mark the cursor dirty.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._index = SearchIndex()
+                    cls._instance._index_lock = threading.Lock()
+                    cls._instance._nodes = NodeStore.get_instance()
+                    cls._instance._cursor = cls._instance._nodes.open_cursor()
+        return cls._instance
+
+    def _sync(self):
+        # Caller holds _index_lock
+        reset, records = self._nodes.drain(self._cursor)
+        if reset:
+            self._index.clear()
+        for record in records:
+            self._index.add(record)
+
+    def search(self, query, limit=50, fuzzy=True):
+        """NodeRecords matching a query, best first (see SearchIndex.search)."""
+        with self._index_lock:
+            self._sync()
+            return [self._index.get(key) for key, _rank in self._index.search(query, limit, fuzzy)]
+
+    def __len__(self):
+        return len(self._index)
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
@@ -0,0 +1,246 @@
+# utils/send_queue.py
+
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pubsub import pub
+from utils.meshtastic_helpers import MeshtasticHandler
+from utils.metrics import MetricsRegistry
+
+BROADCAST_ADDR = "^all"
+
+# LoRa modem presets by Config.LoRaConfig.ModemPreset value: (spreading factor, bandwidth Hz, coding rate 4/x)
+MODEM_PRESETS = {
+    0: (11, 250000, 5),   # LONG_FAST
+    1: (12, 125000, 8),   # LONG_SLOW
+    2: (12, 62500, 8),    # VERY_LONG_SLOW
+    3: (10, 250000, 5),   # MEDIUM_SLOW
+    4: (9, 250000, 5),    # MEDIUM_FAST
+    5: (8, 250000, 5),    # SHORT_SLOW
+    6: (7, 250000, 5),    # SHORT_FAST
+    7: (11, 125000, 8),   # LONG_MODERATE
+    8: (7, 500000, 5),    # SHORT_TURBO
+}
+PACKET_OVERHEAD = 32  # mesh header + protobuf framing, bytes
+ACK_BUCKETS = (0.5, 1, 2, 5, 10, 15, 20, 30, 60)  # seconds; mesh ACKs take far longer than DEFAULT_BUCKETS
+
+
+def lora_airtime(payload_bytes, preset=0, preamble=16):
+    """Estimate on-air time in seconds for a LoRa packet (Semtech time-on-air formula)."""
+    sf, bw, cr = MODEM_PRESETS.get(preset, MODEM_PRESETS[0])
+    t_sym = (2 ** sf) / bw
+    de = 1 if t_sym > 0.016 else 0
+    payload_symbols = 8 + max(math.ceil((8 * payload_bytes - 4 * sf + 28 + 16) / (4 * (sf - 2 * de))) * cr, 0)
+    return (preamble + 4.25 + payload_symbols) * t_sym
+
+
+class TokenBucket:
+    """Airtime budget: holds up to `capacity` seconds of airtime, refilled at `rate` seconds per second."""
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, cost, now):
+        """Seconds until `cost` can be spent (0 if it can be spent now)."""
+        self._refill(now)
+        cost = min(cost, self.capacity)
+        return 0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def consume(self, cost, now):
+        self._refill(now)
+        self.tokens -= min(cost, self.capacity)
+
+
+class OutboundMessage:
+    """A queued text message; `future` resolves to the message once sent (or ACKed, if want_ack)."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, text, destination, channel_index, want_ack, connection_id=None):
+        self.id = next(self._ids)
+        self.connection_id = connection_id
+        self.text = text
+        self.destination = destination
+        self.channel_index = channel_index
+        self.want_ack = want_ack
+        self.status = "queued"  # queued -> sent -> acked | failed
+        self.attempts = 0
+        self.packet_id = None
+        self.error = None  # also set when a want_ack message was sent but its ACK can't be tracked
+        self.future = Future()
+        self._deadline = None
+        self._sent_at = None
+
+
+class SendQueue:
+    """Singleton outbound queue: a worker thread paces sends by airtime and tracks ACKs with retries."""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    ACK_TIMEOUT = 30.0
+    MAX_RETRIES = 2
+    CHANNEL_DUTY = 0.25      # share of channel airtime this node may use
+    DESTINATION_DUTY = 0.10  # share any single destination may use
+    BURST_SECONDS = 5.0      # airtime that may be spent back-to-back
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._cond = threading.Condition()
+                    cls._instance._queue = deque()
+                    cls._instance._awaiting_ack = {}  # packet id -> OutboundMessage
+                    cls._instance._channel_buckets = {}  # connection id -> TokenBucket
+                    cls._instance._buckets = {}  # (connection id, destination) -> TokenBucket
+                    cls._instance._metrics = MetricsRegistry.get_instance()
+                    cls._instance._metrics.gauge("meshtastic_send_queue_depth", "Messages waiting to be sent",
+                                                 fn=lambda: len(cls._instance._queue))
+                    cls._instance._metrics.gauge("meshtastic_send_awaiting_ack", "Sent messages waiting for an ACK",
+                                                 fn=lambda: len(cls._instance._awaiting_ack))
+                    cls._instance._worker = threading.Thread(target=cls._instance._run, name="send-queue", daemon=True)
+                    cls._instance._worker.start()
+                    pub.subscribe(cls._instance._on_routing, "meshtastic.receive.routing")
+        return cls._instance
+
+    # --- Public API ---
+    def enqueue(self, text, destination=BROADCAST_ADDR, channel_index=0, want_ack=True, connection_id=None):
+        """Queue a text message (on the active connection unless one is given) and return its OutboundMessage."""
+        connection_id = connection_id or MeshtasticHandler.get_instance().get_active_id()
+        msg = OutboundMessage(text, destination, channel_index, want_ack, connection_id)
+        with self._cond:
+            self._queue.append(msg)
+            self._cond.notify()
+        return msg
+
+    def pending(self):
+        """Number of messages waiting to be sent or waiting for an ACK."""
+        with self._cond:
+            return len(self._queue) + len(self._awaiting_ack)
+
+    # --- Worker ---
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                self._expire_acks(now)
+                msg, wait = self._next_ready(now)
+                if msg is None:
+                    self._cond.wait(timeout=wait)
+                    continue
+            self._transmit(msg)
+
+    def _airtime(self, msg):
+        preset = 0
+        try:
+            interface = MeshtasticHandler.get_instance().get_interface(msg.connection_id)
+            preset = interface.localNode.localConfig.lora.modem_preset
+        except Exception:
+            pass
+        return lora_airtime(len(msg.text.encode("utf-8")) + PACKET_OVERHEAD, preset)
+
+    def _next_ready(self, now):
+        """Pop the first message whose destination and the channel both have airtime left; else (None, wait)."""
+        wait = None
+        blocked = set()  # keep per-destination order: once one message waits, later ones to it wait too
+        for msg in self._queue:
+            key = (msg.connection_id, msg.destination)
+            if key in blocked:
+                continue
+            cost = self._airtime(msg)
+            bucket = self._buckets.setdefault(key, TokenBucket(self.BURST_SECONDS, self.DESTINATION_DUTY))
+            channel_bucket = self._channel_buckets.setdefault(
+                msg.connection_id, TokenBucket(self.BURST_SECONDS, self.CHANNEL_DUTY))
+            delay = max(bucket.delay(cost, now), channel_bucket.delay(cost, now))
+            if delay == 0:
+                bucket.consume(cost, now)
+                channel_bucket.consume(cost, now)
+                self._queue.remove(msg)
+                return msg, None
+            blocked.add(key)
+            wait = delay if wait is None else min(wait, delay)
+        for pending in self._awaiting_ack.values():
+            remaining = max(pending._deadline - now, 0)
+            wait = remaining if wait is None else min(wait, remaining)
+        return None, wait
+
+    def _transmit(self, msg):
+        msg.attempts += 1
+        try:
+            interface = MeshtasticHandler.get_instance().get_interface(msg.connection_id)
+            packet = interface.sendText(msg.text, destinationId=msg.destination,
+                                        wantAck=msg.want_ack, channelIndex=msg.channel_index)
+        except Exception as e:
+            self._fail(msg, e)
+            return
+        msg.status = "sent"
+        msg.packet_id = getattr(packet, "id", None)
+        self._metrics.counter("meshtastic_packets_sent_total", "Text packets handed to the radio").inc()
+        msg._sent_at = time.monotonic()
+        if not msg.want_ack or msg.packet_id is None:
+            if msg.want_ack:
+                # Sent, but there is nothing to match an ACK against; say so instead of resolving silently
+                msg.error = Exception("Sent, but the radio returned no packet id, so delivery can't be confirmed")
+            msg.future.set_result(msg)
+            return
+        with self._cond:
+            msg._deadline = time.monotonic() + self.ACK_TIMEOUT
+            self._awaiting_ack[msg.packet_id] = msg
+            self._cond.notify()
+
+    def _expire_acks(self, now):
+        retries = []
+        for packet_id, msg in list(self._awaiting_ack.items()):
+            if msg._deadline > now:
+                continue
+            del self._awaiting_ack[packet_id]
+            if msg.attempts <= self.MAX_RETRIES:
+                msg.status = "queued"
+                retries.append(msg)
+                self._metrics.counter("meshtastic_send_retries_total", "Messages re-sent after a missing ACK").inc()
+            else:
+                self._fail(msg, Exception(f"No ACK after {msg.attempts} attempts"))
+        # Retries go ahead of new messages, in their original order
+        self._queue.extendleft(sorted(retries, key=lambda m: m.id, reverse=True))
+
+    def _fail(self, msg, error):
+        msg.status = "failed"
+        msg.error = error
+        self._metrics.counter("meshtastic_send_failures_total", "Messages that could not be delivered").inc()
+        if not msg.future.done():
+            msg.future.set_exception(error)
+
+    # --- ACK path ---
+    def _on_routing(self, packet, interface):
+        decoded = packet.get("decoded", {}) if isinstance(packet, dict) else {}
+        with self._cond:
+            msg = self._awaiting_ack.pop(decoded.get("requestId"), None)
+            if msg is None:
+                return
+            reason = decoded.get("routing", {}).get("errorReason", "NONE")
+            if reason == "NONE":
+                msg.status = "acked"
+                self._metrics.histogram("meshtastic_ack_seconds", "Time from send to ACK", buckets=ACK_BUCKETS
+                                        ).observe(time.monotonic() - msg._sent_at)
+                msg.future.set_result(msg)
+            elif msg.attempts <= self.MAX_RETRIES:
+                msg.status = "queued"
+                self._queue.appendleft(msg)
+            else:
+                self._fail(msg, Exception(f"Delivery failed: {reason}"))
+            self._cond.notify()
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
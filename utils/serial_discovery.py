@@ -0,0 +1,263 @@
+# utils/serial_discovery.py
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.paths import get_data_dir
+
+# USB vendor ids of boards that run Meshtastic natively (Adafruit/RAK nRF52 bootloaders, Espressif USB)
+RADIO_VIDS = {0x239A, 0x303A}
+# USB-UART bridges used on most ESP32 radios (T-Beam, Heltec, T-Lora...): (vid, pid); also on plenty of other gear
+BRIDGE_IDS = {(0x10C4, 0xEA60), (0x1A86, 0x7523), (0x1A86, 0x55D4), (0x0403, 0x6001), (0x0403, 0x6015)}
+# Debug probes and dev kits that never are a Meshtastic API port (J-Link, ST-Link, Nordic, Cypress)
+IGNORED_VIDS = {0x1366, 0x0483, 0x1915, 0x0925, 0x04B4}
+
+# Verdicts, best first
+MESHTASTIC = "meshtastic"  # answered the handshake (now or in a cached probe)
+LIKELY = "likely"          # known radio VID, not probed yet
+POSSIBLE = "possible"      # USB-serial bridge used on radios, not probed yet
+UNKNOWN = "unknown"        # other USB serial device; only probed when no likelier port answers
+NOT_MESHTASTIC = "not meshtastic"
+IGNORED = "ignored"        # debug probe or a non-USB port
+_VERDICT_ORDER = {MESHTASTIC: 0, LIKELY: 1, POSSIBLE: 2, UNKNOWN: 3, NOT_MESHTASTIC: 4, IGNORED: 5}
+
+START1, START2 = 0x94, 0xC3  # stream API frame header
+CONFIG_ONLY_NONCE = 69420    # want_config_id the firmware answers with config only (no NodeDB dump)
+PROBE_TIMEOUT = 0.6
+PROBE_WORKERS = 8
+NEGATIVE_TTL = 3600          # re-probe a port that didn't answer after this long (it may have been flashed)
+HOTPLUG_INTERVAL = 2.0
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def handshake_request():
+    """Wake-up bytes plus a framed ToRadio{want_config_id} (field 3, varint)."""
+    payload = b"\x18" + _varint(CONFIG_ONLY_NONCE)
+    return bytes([START2] * 32) + bytes([START1, START2, len(payload) >> 8, len(payload) & 0xFF]) + payload
+
+
+def is_stream_frame(data):
+    """True if data contains a plausible FromRadio frame header (0x94 0xC3, length < 512)."""
+    start = data.find(bytes([START1, START2]))
+    while start != -1 and start + 3 < len(data):
+        if (data[start + 2] << 8 | data[start + 3]) < 512:
+            return True
+        start = data.find(bytes([START1, START2]), start + 1)
+    return False
+
+
+def usb_verdict(vid, pid, hwid):
+    """Verdict from USB ids alone, without opening the port."""
+    if vid is None:
+        return IGNORED if not hwid or hwid == "n/a" else UNKNOWN
+    if vid in IGNORED_VIDS:
+        return IGNORED
+    if vid in RADIO_VIDS:
+        return LIKELY
+    return POSSIBLE if (vid, pid) in BRIDGE_IDS else UNKNOWN
+
+
+def probe_port(device, timeout=PROBE_TIMEOUT):
+    """Open a port without toggling DTR/RTS (which resets many ESP32 boards), send the handshake and
+    wait up to `timeout` for a framed reply. Returns True/False; raises if the port can't be opened.
+    """
+    import serial
+    port = serial.Serial()
+    port.port = device
+    port.baudrate = 115200
+    port.timeout = 0.05
+    port.write_timeout = timeout
+    port.dtr = False
+    port.rts = False
+    port.open()
+    try:
+        _disable_hangup(port)
+        port.reset_input_buffer()
+        port.write(handshake_request())
+        received = b""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            received += port.read(256)
+            if is_stream_frame(received):
+                return True
+        return False
+    finally:
+        port.close()
+
+
+def _disable_hangup(port):
+    # Like the meshtastic library: closing with HUPCL set drops DTR and resets the board
+    try:
+        import termios
+        attrs = termios.tcgetattr(port.fileno())
+        attrs[2] &= ~termios.HUPCL
+        termios.tcsetattr(port.fileno(), termios.TCSAFLUSH, attrs)
+    except Exception:
+        pass
+
+
+class SerialDiscovery:
+    """Singleton finder for Meshtastic radios on the serial ports.
+
+    Ports are ranked by USB ids, then candidates are probed in parallel with the stream API
+    handshake. Results are cached by hwid (in <data dir>/serial_ports.json), so a radio that
+    answered before is picked without opening anything. A polling thread reports hot-plugged
+    ports to listeners as callback(added, removed), lists of port dicts.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, path=None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._open(path or get_data_dir() / "serial_ports.json")
+        return cls._instance
+
+    def _open(self, path):
+        self.path = path
+        self._cache = {}  # hwid -> {"meshtastic": bool, "checked": ts, "device": last path}
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="serial-probe")
+        self._listeners = []
+        self._known = {}  # device -> port dict, as of the last hot-plug poll
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+        try:
+            self._cache = json.loads(path.read_text())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Serial port cache load error: {e}")
+
+    # --- Listing ---
+    def ports(self):
+        """Every serial port as {device, description, hwid, vid, pid, verdict}, most promising first."""
+        import serial.tools.list_ports
+        now = time.time()
+        ports = []
+        for p in serial.tools.list_ports.comports():
+            verdict = usb_verdict(p.vid, p.pid, p.hwid)
+            with self._cache_lock:
+                cached = self._cache.get(p.hwid)
+            if verdict != IGNORED and cached:
+                if cached["meshtastic"]:
+                    verdict = MESHTASTIC
+                elif now - cached["checked"] < NEGATIVE_TTL:
+                    verdict = NOT_MESHTASTIC
+            ports.append({"device": p.device, "description": p.description, "hwid": p.hwid,
+                          "vid": p.vid, "pid": p.pid, "verdict": verdict})
+        return sorted(ports, key=lambda p: (_VERDICT_ORDER[p["verdict"]], p["device"]))
+
+    # --- Probing ---
+    def find_radios(self, exclude=(), timeout=PROBE_TIMEOUT):
+        """Device paths of Meshtastic radios, best first.
+
+        Ports with a cached positive result are returned without probing; the rest of the candidates
+        (skipping ignored and recently negative ports) are probed in parallel within `timeout`, other
+        USB serial devices only if none of those answers.
+        """
+        ports = [p for p in self.ports() if p["device"] not in exclude]
+        radios = [p["device"] for p in ports if p["verdict"] == MESHTASTIC]
+        if radios:
+            return radios
+        radios = self._probe([p for p in ports if p["verdict"] in (LIKELY, POSSIBLE)], timeout)
+        if not radios:
+            radios = self._probe([p for p in ports if p["verdict"] == UNKNOWN], timeout)
+        self._save()
+        order = {p["device"]: i for i, p in enumerate(ports)}
+        return sorted(radios, key=order.get)
+
+    def _probe(self, candidates, timeout):
+        radios = []
+        futures = {self._executor.submit(probe_port, p["device"], timeout): p for p in candidates}
+        done, _pending = wait(futures, timeout=timeout + 0.5)
+        for future in done:
+            port = futures[future]
+            try:
+                answered = future.result()
+            except Exception as e:
+                print(f"Serial probe of {port['device']} failed: {e}")
+                continue  # busy or no permission: says nothing about the device, so don't cache it
+            self._remember(port, answered)
+            if answered:
+                radios.append(port["device"])
+        return radios
+
+    def best_port(self, exclude=()):
+        radios = self.find_radios(exclude)
+        return radios[0] if radios else None
+
+    def _remember(self, port, answered):
+        with self._cache_lock:
+            self._cache[port["hwid"]] = {"meshtastic": answered, "checked": time.time(), "device": port["device"]}
+
+    def forget(self, device):
+        """Drop the cached result for a device path (e.g. after it failed to connect)."""
+        with self._cache_lock:
+            for hwid in [h for h, entry in self._cache.items() if entry.get("device") == device]:
+                del self._cache[hwid]
+        self._save()
+
+    def _save(self):
+        with self._cache_lock:
+            data = json.dumps(self._cache)
+        try:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(data)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Serial port cache save error: {e}")
+
+    # --- Hot-plug ---
+    def add_listener(self, callback):
+        """Register callback(added, removed), called from the polling thread; starts polling."""
+        if callable(callback) and callback not in self._listeners:
+            self._listeners.append(callback)
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._known = {p["device"]: p for p in self.ports()}
+                self._watcher = threading.Thread(target=self._watch, name="serial-hotplug", daemon=True)
+                self._watcher.start()
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _watch(self):
+        while True:
+            time.sleep(HOTPLUG_INTERVAL)
+            try:
+                current = {p["device"]: p for p in self.ports()}
+            except Exception as e:
+                print(f"Serial hot-plug poll error: {e}")
+                continue
+            added = [p for device, p in current.items() if device not in self._known]
+            removed = [p for device, p in self._known.items() if device not in current]
+            self._known = current
+            if not (added or removed):
+                continue
+            for cb in list(self._listeners):
+                try:
+                    cb(added, removed)
+                except Exception as e:
+                    print(f"Serial hot-plug listener error: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
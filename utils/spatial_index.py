@@ -0,0 +1,333 @@
+# utils/spatial_index.py
+
+import math
+import threading
+from pubsub import pub
+from utils.node_store import NodeStore, node_key
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+GRID_CELL_DEG = 0.1  # ~11 km cells: a few nodes per cell for a typical city mesh
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def node_position(position):
+    """(lat, lon) from a meshtastic position dict (float or 1e-7 integer fields), or None without a fix."""
+    if not isinstance(position, dict):
+        return None
+    lat, lon = position.get("latitude"), position.get("longitude")
+    if lat is None and position.get("latitudeI") is not None:
+        lat = position["latitudeI"] * 1e-7
+    if lon is None and position.get("longitudeI") is not None:
+        lon = position["longitudeI"] * 1e-7
+    if lat is None or lon is None or (lat == 0 and lon == 0) or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+class Cluster:
+    __slots__ = ("lat", "lon", "count", "keys")
+
+    def __init__(self, lat, lon, count, keys):
+        self.lat = lat
+        self.lon = lon
+        self.count = count
+        self.keys = keys
+
+
+class GridIndex:
+    """Uniform lat/lon grid over point keys: O(1) insert/move/remove, viewport queries that touch
+    only the cells in view, ring-search nearest neighbour and per-cell aggregates for clustering.
+    """
+
+    def __init__(self, cell_deg=GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._columns = round(360 / cell_deg)  # cell columns around the globe
+        self._points = {}  # key -> (lat, lon, cell)
+        self._cells = {}  # cell -> {key: (lat, lon)}
+        self._sums = {}  # cell -> [count, sum lat, sum lon], kept incrementally for clustering
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def get(self, key):
+        point = self._points.get(key)
+        return point[:2] if point else None
+
+    def insert(self, key, lat, lon):
+        """Add a point, or move it if the key is already indexed."""
+        cell = self._cell(lat, lon)
+        old = self._points.get(key)
+        if old is not None:
+            if old[2] == cell:
+                sums = self._sums[cell]
+                sums[1] += lat - old[0]
+                sums[2] += lon - old[1]
+                self._points[key] = (lat, lon, cell)
+                self._cells[cell][key] = (lat, lon)
+                return
+            self.remove(key)
+        self._points[key] = (lat, lon, cell)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        sums = self._sums.setdefault(cell, [0, 0.0, 0.0])
+        sums[0] += 1
+        sums[1] += lat
+        sums[2] += lon
+
+    def remove(self, key):
+        old = self._points.pop(key, None)
+        if old is None:
+            return
+        lat, lon, cell = old
+        members = self._cells[cell]
+        del members[key]
+        if members:
+            sums = self._sums[cell]
+            sums[0] -= 1
+            sums[1] -= lat
+            sums[2] -= lon
+        else:
+            del self._cells[cell]
+            del self._sums[cell]
+
+    def clear(self):
+        self._points.clear()
+        self._cells.clear()
+        self._sums.clear()
+
+    def _cells_in(self, min_lat, min_lon, max_lat, max_lon):
+        (y0, x0), (y1, x1) = self._cell(min_lat, min_lon), self._cell(max_lat, max_lon)
+        if (y1 - y0 + 1) * (x1 - x0 + 1) > len(self._cells):
+            # Zoomed far out: walking the occupied cells is cheaper than the empty ones in view
+            return [c for c in self._cells if y0 <= c[0] <= y1 and x0 <= c[1] <= x1]
+        return [(y, x) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1) if (y, x) in self._cells]
+
+    def query(self, min_lat, min_lon, max_lat, max_lon):
+        """Keys of the points inside a bounding box (min_lon > max_lon wraps across the antimeridian)."""
+        if min_lon > max_lon:
+            return self.query(min_lat, min_lon, max_lat, 180) + self.query(min_lat, -180, max_lat, max_lon)
+        keys = []
+        for cell in self._cells_in(min_lat, min_lon, max_lat, max_lon):
+            keys.extend(k for k, (lat, lon) in self._cells[cell].items()
+                        if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon)
+        return keys
+
+    def clusters(self, min_lat, min_lon, max_lat, max_lon, cluster_deg):
+        """Group the points in a bounding box into clusters about cluster_deg across.
+
+        When clusters are at least a grid cell wide, whole cells are merged through their running
+        sums, so the cost depends on the number of occupied cells in view, not on the number of points.
+        """
+        if min_lon > max_lon:
+            return (self.clusters(min_lat, min_lon, max_lat, 180, cluster_deg)
+                    + self.clusters(min_lat, -180, max_lat, max_lon, cluster_deg))
+        groups = {}
+        if cluster_deg >= self.cell_deg:
+            for cell in self._cells_in(min_lat, min_lon, max_lat, max_lon):
+                count, sum_lat, sum_lon = self._sums[cell]
+                bucket = (math.floor(sum_lat / count / cluster_deg), math.floor(sum_lon / count / cluster_deg))
+                group = groups.setdefault(bucket, [0, 0.0, 0.0, []])
+                group[0] += count
+                group[1] += sum_lat
+                group[2] += sum_lon
+                group[3].append(cell)
+            return [Cluster(s_lat / n, s_lon / n, n, [k for cell in cells for k in self._cells[cell]])
+                    for n, s_lat, s_lon, cells in groups.values()]
+        for key in self.query(min_lat, min_lon, max_lat, max_lon):
+            lat, lon, _cell = self._points[key]
+            bucket = (math.floor(lat / cluster_deg), math.floor(lon / cluster_deg))
+            group = groups.setdefault(bucket, [0, 0.0, 0.0, []])
+            group[0] += 1
+            group[1] += lat
+            group[2] += lon
+            group[3].append(key)
+        return [Cluster(s_lat / n, s_lon / n, n, keys) for n, s_lat, s_lon, keys in groups.values()]
+
+    def _columns_at(self, x):
+        """Column indices of the cells at column `x`, wrapped around the antimeridian.
+
+        Columns run from -columns/2 (at -180°) to columns/2, which only holds points exactly on +180°.
+        """
+        half = self._columns // 2
+        x = (x + half) % self._columns - half
+        return (x, half) if x == -half else (x,)
+
+    def _column_distance(self, x1, x2):
+        dx = abs(x1 - x2) % self._columns
+        return min(dx, self._columns - dx)
+
+    def _ring(self, cy, cx, ring):
+        """Occupied cells exactly `ring` cells (Chebyshev distance, wrapping east-west) from (cy, cx)."""
+        if ring == 0:
+            candidates = [(cy, cx)]
+        else:
+            candidates = [(y, x) for x in range(cx - ring, cx + ring + 1) for y in (cy - ring, cy + ring)]
+            candidates += [(y, x) for y in range(cy - ring + 1, cy + ring) for x in (cx - ring, cx + ring)]
+        half = self._columns // 2
+        if -half < cx - ring and cx + ring < half:
+            return [c for c in candidates if c in self._cells]
+        cells = dict.fromkeys((y, wx) for y, x in candidates for wx in self._columns_at(x))
+        return [c for c in cells if c in self._cells]
+
+    def nearest(self, lat, lon, k=1, max_km=None, exclude=()):
+        """The k nearest keys as [(key, km)], searching rings of cells outward from (lat, lon)."""
+        cy, cx = self._cell(lat, lon)
+        found = []
+        ring = 0
+        while self._cells:
+            last = 8 * ring > len(self._cells)
+            if last:
+                # The ring is now bigger than the occupied set: scan whatever is left in one go
+                cells = [c for c in self._cells
+                         if max(abs(c[0] - cy), self._column_distance(c[1], cx)) >= ring]
+            else:
+                cells = self._ring(cy, cx, ring)
+            for cell in cells:
+                for key, (p_lat, p_lon) in self._cells[cell].items():
+                    if key in exclude:
+                        continue
+                    km = haversine_km(lat, lon, p_lat, p_lon)
+                    if max_km is None or km <= max_km:
+                        found.append((km, key))
+            found.sort()
+            del found[k:]
+            # Everything beyond this ring is at least `ring` cells away (narrowest east-west, toward the pole)
+            reach = ring * self.cell_deg * KM_PER_DEGREE * math.cos(
+                math.radians(min(89.9, abs(lat) + (ring + 1) * self.cell_deg)))
+            if last or (len(found) == k and found[-1][0] <= reach) or (max_km is not None and reach > max_km):
+                break
+            ring += 1
+        return [(key, km) for km, key in found]
+
+    def items(self):
+        """[(key, lat, lon)] for every indexed point."""
+        return [(key, lat, lon) for key, (lat, lon, _cell) in self._points.items()]
+
+
+class PositionStore:
+    """Singleton spatial index of node positions on the connected radio (the one NodeStore follows).
+
+    Loaded from interface.nodes on attach and patched from position packets and node updates;
+    listeners are called without arguments after positions change.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._index = GridIndex()
+                    cls._instance._index_lock = threading.Lock()
+                    cls._instance._interface = None
+                    cls._instance._listeners = []
+                    cls._instance.version = 0
+                    cls._instance._nodes = NodeStore.get_instance()
+                    cls._instance._nodes.add_listener(cls._instance._on_nodes_changed)
+                    pub.subscribe(cls._instance._on_position, "meshtastic.receive.position")
+                    pub.subscribe(cls._instance._on_node_updated, "meshtastic.node.updated")
+                    cls._instance._on_nodes_changed()
+        return cls._instance
+
+    def add_listener(self, callback):
+        if callable(callback) and callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # --- Queries ---
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        with self._index_lock:
+            return self._index.get(key)
+
+    def query(self, min_lat, min_lon, max_lat, max_lon):
+        """[(key, lat, lon)] inside a bounding box."""
+        with self._index_lock:
+            return [(k, *self._index.get(k)) for k in self._index.query(min_lat, min_lon, max_lat, max_lon)]
+
+    def clusters(self, min_lat, min_lon, max_lat, max_lon, cluster_deg):
+        with self._index_lock:
+            return self._index.clusters(min_lat, min_lon, max_lat, max_lon, cluster_deg)
+
+    def nearest(self, lat, lon, k=1, max_km=None, exclude=()):
+        with self._index_lock:
+            return self._index.nearest(lat, lon, k, max_km, exclude)
+
+    def bounds(self):
+        """(min_lat, min_lon, max_lat, max_lon) of all positions, or None."""
+        with self._index_lock:
+            points = self._index.items()
+        if not points:
+            return None
+        _keys, lats, lons = zip(*points)
+        return min(lats), min(lons), max(lats), max(lons)
+
+    # --- Updates ---
+    def _on_nodes_changed(self):
+        interface = self._nodes.interface
+        if interface is self._interface:
+            return
+        with self._index_lock:
+            self._interface = interface
+            self._index.clear()
+            for key, node in list((getattr(interface, "nodes", None) or {}).items()):
+                position = node_position(node.get("position")) if isinstance(node, dict) else None
+                if position:
+                    self._index.insert(key, *position)
+            self.version += 1
+        self._notify()
+
+    def _on_position(self, packet, interface):
+        if interface is not self._interface or not isinstance(packet, dict):
+            return
+        key = packet.get("fromId")
+        if not key and isinstance(packet.get("from"), int):
+            key = f"!{packet['from']:08x}"
+        position = node_position(packet.get("decoded", {}).get("position"))
+        if key and position:
+            self._set(key, position)
+
+    def _on_node_updated(self, node, interface):
+        if interface is not self._interface or not isinstance(node, dict):
+            return
+        key, position = node_key(node), node_position(node.get("position"))
+        if key and position:
+            self._set(key, position)
+
+    def _set(self, key, position):
+        with self._index_lock:
+            if self._index.get(key) == position:
+                return
+            self._index.insert(key, *position)
+            self.version += 1
+        self._notify()
+
+    def _notify(self):
+        for cb in list(self._listeners):
+            try:
+                cb()
+            except Exception as e:
+                print(f"Position listener error: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
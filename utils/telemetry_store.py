@@ -0,0 +1,331 @@
+# utils/telemetry_store.py
+
+import atexit
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from pubsub import pub
+from utils.paths import get_data_dir
+
+try:
+    import numpy as np  # optional: only speeds up downsampling for charts
+except ImportError:
+    np = None
+
+METRICS = ("batteryLevel", "voltage", "channelUtilization", "airUtilTx")
+# (bucket seconds, slots); 0 = one slot per sample. Device telemetry is usually sent every 30 minutes,
+# so this keeps about a week of raw samples, a month of hourly and a year of daily min/max/mean.
+TIERS = ((0, 336), (3600, 720), (86400, 365))
+SAVE_INTERVAL = 300
+FILE_MAGIC = b"MTTLM\x00\x01"
+_TIER_HEADER = struct.Struct("<IIdI")  # slots used, head, bucket seconds, capacity
+
+
+class TierRing:
+    """Columnar ring buffer of time buckets: timestamps plus min/max/sum/count per metric.
+
+    Columns are `array`s that grow up to `capacity` slots and then wrap, overwriting the oldest
+    bucket, so memory per node is bounded by the tier sizes.
+    """
+
+    def __init__(self, resolution, capacity, metrics=len(METRICS)):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.head = 0  # oldest slot once the ring is full
+        self.ts = array("d")
+        self.vmin = [array("f") for _ in range(metrics)]
+        self.vmax = [array("f") for _ in range(metrics)]
+        self.vsum = [array("f") for _ in range(metrics)]
+        self.count = [array("H") for _ in range(metrics)]
+
+    def __len__(self):
+        return len(self.ts)
+
+    def _last(self):
+        if not self.ts:
+            return None
+        return (self.head - 1) % len(self.ts) if len(self.ts) == self.capacity else len(self.ts) - 1
+
+    def oldest(self):
+        return self.ts[self.head] if self.ts else None
+
+    def newest(self):
+        last = self._last()
+        return None if last is None else self.ts[last]
+
+    def add(self, ts, values):
+        """Fold one sample (a value or None per metric) into its bucket."""
+        bucket = ts - ts % self.resolution if self.resolution else ts
+        last = self._last()
+        if last is not None and bucket < self.ts[last]:
+            return  # out of order (e.g. a late rebroadcast): older buckets are already final
+        if last is None or not self.resolution or self.ts[last] != bucket:
+            last = self._new_slot(bucket)
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            n = self.count[i][last]
+            if n == 0 or value < self.vmin[i][last]:
+                self.vmin[i][last] = value
+            if n == 0 or value > self.vmax[i][last]:
+                self.vmax[i][last] = value
+            self.vsum[i][last] += value
+            self.count[i][last] = min(n + 1, 0xFFFF)
+
+    def _new_slot(self, ts):
+        if len(self.ts) < self.capacity:
+            self.ts.append(ts)
+            for columns in (self.vmin, self.vmax, self.vsum, self.count):
+                for column in columns:
+                    column.append(0)
+            return len(self.ts) - 1
+        slot = self.head
+        self.head = (self.head + 1) % self.capacity
+        self.ts[slot] = ts
+        for columns in (self.vmin, self.vmax, self.vsum, self.count):
+            for column in columns:
+                column[slot] = 0
+        return slot
+
+    def rows(self, metric, since=None):
+        """[(ts, min, max, mean)] for one metric index in time order, skipping buckets without samples."""
+        order = list(range(self.head, len(self.ts))) + list(range(self.head))
+        ts, vmin, vmax = self.ts, self.vmin[metric], self.vmax[metric]
+        vsum, count = self.vsum[metric], self.count[metric]
+        return [(ts[j], vmin[j], vmax[j], vsum[j] / count[j]) for j in order
+                if count[j] and (since is None or ts[j] >= since)]
+
+    # --- Persistence ---
+    def to_bytes(self):
+        parts = [_TIER_HEADER.pack(len(self.ts), self.head, self.resolution, self.capacity), self.ts.tobytes()]
+        for columns in (self.vmin, self.vmax, self.vsum, self.count):
+            parts.extend(column.tobytes() for column in columns)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, offset, metrics):
+        used, head, resolution, capacity = _TIER_HEADER.unpack_from(data, offset)
+        offset += _TIER_HEADER.size
+        ring = cls(resolution, capacity, metrics)
+        ring.head = head
+        for column in [ring.ts] + ring.vmin + ring.vmax + ring.vsum + ring.count:
+            size = used * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        return ring, offset
+
+
+class NodeSeries:
+    """All downsampling tiers for one node; every sample is folded into each tier."""
+
+    def __init__(self, tiers=None):
+        self.tiers = tiers or [TierRing(resolution, capacity) for resolution, capacity in TIERS]
+        self.dirty = False
+
+    def add(self, ts, values):
+        for tier in self.tiers:
+            tier.add(ts, values)
+        self.dirty = True
+
+    def tier_for(self, since):
+        """The finest tier that still reaches back to `since` (all history if since is None)."""
+        for tier in self.tiers:
+            if len(tier) < tier.capacity or (since is not None and tier.oldest() <= since):
+                return tier
+        return self.tiers[-1]
+
+    def to_bytes(self):
+        return FILE_MAGIC + bytes([len(METRICS), len(self.tiers)]) + b"".join(t.to_bytes() for t in self.tiers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data.startswith(FILE_MAGIC):
+            raise Exception("not a telemetry file")
+        offset = len(FILE_MAGIC)
+        metrics, count = data[offset], data[offset + 1]
+        if metrics != len(METRICS):
+            raise Exception("telemetry file has a different metric set")
+        offset += 2
+        tiers = []
+        for _ in range(count):
+            tier, offset = TierRing.from_bytes(data, offset, metrics)
+            tiers.append(tier)
+        return cls(tiers)
+
+
+def downsample(rows, max_points):
+    """Merge consecutive (ts, min, max, mean) rows so at most max_points remain."""
+    if len(rows) <= max_points:
+        return rows
+    step = math.ceil(len(rows) / max_points)
+    if np is not None:
+        data = np.asarray(rows, dtype=np.float64)
+        starts = np.arange(0, len(rows), step)
+        return list(zip(data[starts, 0], np.minimum.reduceat(data[:, 1], starts),
+                        np.maximum.reduceat(data[:, 2], starts), np.add.reduceat(data[:, 3], starts)
+                        / np.diff(np.append(starts, len(rows)))))
+    out = []
+    for i in range(0, len(rows), step):
+        chunk = rows[i:i + step]
+        out.append((chunk[0][0], min(r[1] for r in chunk), max(r[2] for r in chunk),
+                    sum(r[3] for r in chunk) / len(chunk)))
+    return out
+
+
+class TelemetryStore:
+    """Singleton time-series store of device metrics for every node heard, fed by telemetry packets.
+
+    Series are persisted per node under <data dir>/telemetry every SAVE_INTERVAL and at exit.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, path=None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._open(path or get_data_dir() / "telemetry")
+        return cls._instance
+
+    def _open(self, path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._series = {}  # node key -> NodeSeries
+        self._series_lock = threading.Lock()
+        self._listeners = []
+        self._load()
+        self._saver = threading.Thread(target=self._save_loop, name="telemetry-saver", daemon=True)
+        self._saver.start()
+        atexit.register(self.save)
+        pub.subscribe(self._on_telemetry, "meshtastic.receive.telemetry")
+
+    def add_listener(self, callback):
+        """Register callback(node_key), called on the radio thread after a sample is stored."""
+        if callable(callback) and callback not in self._listeners:
+            self._listeners.append(callback)
+
+    # --- Writes ---
+    def add_sample(self, key, metrics, ts=None, min_interval=0):
+        """Store a deviceMetrics dict; with min_interval, skip it if the node's last sample is more recent."""
+        values = [_number(metrics.get(name)) for name in METRICS]
+        if all(v is None for v in values):
+            return
+        ts = ts or time.time()
+        with self._series_lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = NodeSeries()
+            newest = series.tiers[0].newest()
+            if min_interval and newest is not None and ts - newest < min_interval:
+                return
+            series.add(ts, values)
+        for cb in list(self._listeners):
+            try:
+                cb(key)
+            except Exception as e:
+                print(f"Telemetry listener error: {e}")
+
+    def _on_telemetry(self, packet, interface):
+        if not isinstance(packet, dict):
+            return
+        telemetry = packet.get("decoded", {}).get("telemetry", {})
+        metrics = telemetry.get("deviceMetrics")
+        key = packet.get("fromId")
+        if not key and isinstance(packet.get("from"), int):
+            key = f"!{packet['from']:08x}"
+        if key and isinstance(metrics, dict):
+            self.add_sample(key, metrics, packet.get("rxTime") or telemetry.get("time"))
+
+    # --- Reads ---
+    def nodes(self):
+        with self._series_lock:
+            return list(self._series)
+
+    def latest(self, key):
+        """{metric: last raw value} for a node."""
+        with self._series_lock:
+            series = self._series.get(key)
+            if series is None:
+                return {}
+            latest = {}
+            for i, name in enumerate(METRICS):
+                rows = series.tiers[0].rows(i)
+                if rows:
+                    latest[name] = rows[-1][3]
+            return latest
+
+    def series(self, key, metric, since=None, max_points=300):
+        """[(ts, min, max, mean)] for one node and metric, from the finest tier covering `since`."""
+        index = METRICS.index(metric)
+        with self._series_lock:
+            series = self._series.get(key)
+            if series is None:
+                return []
+            rows = series.tier_for(since).rows(index, since)
+        return downsample(rows, max_points)
+
+    def mesh_series(self, metric, since=None, max_points=300):
+        """Min/max/mean of a metric across every node (mean of the nodes' bucket means).
+
+        Like series(), each node picks the finest tier covering `since`; the coarsest of those (and
+        at least hourly, as raw samples don't line up) is then read for every node, so buckets align.
+        """
+        index = METRICS.index(metric)
+        buckets = {}
+        with self._series_lock:
+            nodes = list(self._series.values())
+            level = max([series.tiers.index(series.tier_for(since)) for series in nodes] + [1])
+            for series in nodes:
+                for ts, vmin, vmax, mean in series.tiers[level].rows(index, since):
+                    b = buckets.setdefault(ts, [vmin, vmax, 0.0, 0])
+                    b[0], b[1] = min(b[0], vmin), max(b[1], vmax)
+                    b[2] += mean
+                    b[3] += 1
+        rows = [(ts, b[0], b[1], b[2] / b[3]) for ts, b in sorted(buckets.items())]
+        return downsample(rows, max_points)
+
+    # --- Persistence ---
+    def _file(self, key):
+        return self.path / f"{key.lstrip('!')}.tlm"
+
+    def _load(self):
+        for file in self.path.glob("*.tlm"):
+            try:
+                self._series[f"!{file.stem}"] = NodeSeries.from_bytes(file.read_bytes())
+            except Exception as e:
+                print(f"Telemetry load error ({file.name}): {e}")
+
+    def save(self):
+        """Write every node changed since the last save (atomically, one file per node)."""
+        with self._series_lock:
+            pending = [(key, series.to_bytes()) for key, series in self._series.items() if series.dirty]
+            for key, _data in pending:
+                self._series[key].dirty = False
+        for key, data in pending:
+            file = self._file(key)
+            try:
+                tmp = file.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, file)
+            except Exception as e:
+                print(f"Telemetry save error ({key}): {e}")
+
+    def _save_loop(self):
+        while True:
+            time.sleep(SAVE_INTERVAL)
+            self.save()
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+        return None
+    return float(value)
@@ -0,0 +1,34 @@
+# utils/timing.py
+
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """Records named, sequential phases (e.g. app startup) and formats a timing report."""
+
+    def __init__(self, name, start=None):
+        self.name = name
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []  # (phase name, seconds)
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - began))
+
+    def mark(self, name):
+        """Record a point in time as a phase measured from the timer's start."""
+        self.phases.append((name, time.perf_counter() - self.start))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def report(self):
+        lines = [f"{self.name} timing:"]
+        lines += [f"  {name:<32} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"  {'total':<32} {self.elapsed() * 1000:8.1f} ms")
+        return "\n".join(lines)